@@ -35,6 +35,11 @@ class IracemaAskRequestDto(BaseModel):
         description="Idioma desejado para a resposta textual."
     )
     explain: bool = True
+    deadline_ms: Optional[int] = Field(
+        None,
+        ge=100,
+        description="Prazo da requisição em ms (vazio = padrão do servidor). Estourado, o planner determinístico responde."
+    )
 
 class IracemaAskWithFcaRequestDto(IracemaAskRequestDto):
     fca: FCAArgsDto
@@ -63,3 +68,74 @@ class IracemaAskResponseDto(BaseModel):
         default=None,
         description="Mensagem de erro, se algo falhar no pipeline."
     )
+
+    timings: Optional[Dict[str, float]] = Field(
+        default=None,
+        description="Duração (ms) de cada etapa do pipeline (datasource, planner, execute, explain, ...)."
+    )
+
+
+class IracemaAskBatchItemDto(BaseModel):
+    """
+    Item de um lote: pergunta em linguagem natural e, opcionalmente, o FCA pronto.
+    Sem FCA, o item passa pelo mesmo fluxo do /ask/fc (cache-hit -> FC).
+    """
+    question: str
+    fca: Optional[FCAArgsDto] = None
+
+
+class IracemaAskBatchRequestDto(BaseModel):
+    """
+    Payload do endpoint /ask/fc/batch: N perguntas/FCAs contra uma única datasource.
+    """
+    table_identifier: str = Field(
+        ...,
+        description="Identificador da tabela selecionada no /start (datasources.identificador_tabela)."
+    )
+    conversation_id: Optional[UUID] = Field(
+        default=None,
+        description="ID da conversa atual. Se vazio, o serviço cria uma nova."
+    )
+    items: List[IracemaAskBatchItemDto] = Field(
+        ...,
+        min_length=1,
+        max_length=200,
+        description="Perguntas (com ou sem FCA) executadas no lote."
+    )
+    top_k: int = Field(
+        20,
+        ge=1,
+        le=1200,
+        description="Número máximo de linhas por consulta."
+    )
+    language: str = Field(
+        "pt-BR",
+        description="Idioma desejado para a resposta textual."
+    )
+    explain: bool = False
+
+
+class IracemaAskBatchItemResultDto(BaseModel):
+    index: int
+    question: str
+    answer_text: str = ""
+    sql_executed: str = ""
+    rowcount: int = 0
+    result_preview: List[Dict[str, Any]] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class IracemaAskBatchResponseDto(BaseModel):
+    """
+    Resposta do endpoint /ask/fc/batch: um resultado (ou erro) por item, na ordem do request.
+    """
+    conversation_id: UUID
+    user_message_id: UUID
+    assistant_message_id: UUID
+
+    items: List[IracemaAskBatchItemResultDto] = Field(default_factory=list)
+
+    error: Optional[str] = Field(
+        default=None,
+        description="Erro do lote inteiro (ex.: datasource inválida). Erros por item ficam em items[i].error."
+    )
@@ -0,0 +1,31 @@
+# Application/dto/iracema_ask_outcome_dto.py
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from External.ai.iracema_llm_call_recorder import LLMCallRecord
+
+
+@dataclass
+class IracemaAskOutcomeDto:
+    """
+    Resultado do pipeline sem persistência por usuário
+    (datasource -> plano -> SQL -> explicação).
+    Compartilhado entre requisições coalescidas.
+    """
+    sql_executed: str = ""
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    rowcount: int = 0
+    duration_ms: float = 0.0
+    reason: str = ""
+    answer_text: str = ""
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    # degradações aplicadas (ex.: 'deadline_template', 'explain_skipped_deadline')
+    fallback: Optional[str] = None
+    # chamadas ao LLM feitas pelo líder (persistidas em iracema_llm_call_log)
+    llm_calls: List[LLMCallRecord] = field(default_factory=list)
+    # schema da datasource no momento da execução (metadado do exemplo RAG)
+    schema_fingerprint: Optional[str] = None
+    # plano estruturado que gerou o SQL (query_plan | fca, JSON)
+    plan_kind: Optional[str] = None
+    plan_json: Optional[str] = None
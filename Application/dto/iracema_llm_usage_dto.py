@@ -0,0 +1,38 @@
+# Application/dto/iracema_llm_usage_dto.py
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class IracemaLLMUsageStatsItemDto(BaseModel):
+    model: Optional[str] = None
+    kind: Optional[str] = None
+    datasource: Optional[str] = None
+    mode: Optional[str] = None
+
+    calls: int
+    cache_hits: int = 0
+    prompt_tokens_total: Optional[int] = None
+    eval_tokens_total: Optional[int] = None
+
+    wall_ms_p50: Optional[float] = None
+    wall_ms_p95: Optional[float] = None
+    load_ms_p50: Optional[float] = None
+    load_ms_p95: Optional[float] = None
+    prompt_eval_ms_p50: Optional[float] = None
+    prompt_eval_ms_p95: Optional[float] = None
+    eval_ms_p50: Optional[float] = None
+    eval_ms_p95: Optional[float] = None
+    prompt_tokens_p50: Optional[float] = None
+    prompt_tokens_p95: Optional[float] = None
+    eval_tokens_p50: Optional[float] = None
+    eval_tokens_p95: Optional[float] = None
+
+
+class IracemaLLMUsageStatsResponseDto(BaseModel):
+    since: Optional[datetime] = None
+    group_by: List[str]
+    include_cache_hits: bool
+    items: List[IracemaLLMUsageStatsItemDto] = Field(default_factory=list)
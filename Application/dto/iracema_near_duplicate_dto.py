@@ -0,0 +1,15 @@
+# Application/dto/iracema_near_duplicate_dto.py
+from dataclasses import dataclass
+
+
+@dataclass
+class IracemaNearDuplicateHitDto:
+    """
+    SQL reaproveitado de uma pergunta quase igual (com o slot já substituído).
+    """
+    sql: str
+    source_question: str
+    kind: str            # paraphrase | value | column
+    similarity: float
+    old_value: str = ""
+    new_value: str = ""
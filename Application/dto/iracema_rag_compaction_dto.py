@@ -0,0 +1,34 @@
+# Application/dto/iracema_rag_compaction_dto.py
+
+from typing import Dict
+
+from pydantic import BaseModel, Field
+
+
+class IracemaRagCompactionReportDto(BaseModel):
+    collection: str
+    dry_run: bool = False
+
+    size_before: int
+    size_after: int
+
+    # motivo -> quantidade removida (inactive_datasource, schema_changed, duplicate_question, over_table_cap)
+    removed: Dict[str, int] = Field(default_factory=dict)
+    removed_total: int = 0
+
+    duration_ms: float = 0.0
+
+
+class IracemaRagRekeyReportDto(BaseModel):
+    collection: str
+    dry_run: bool = False
+
+    scanned: int = 0
+
+    # motivo -> quantidade re-chaveada (key_version: chave de versão antiga; columns: sinônimos de coluna mudaram)
+    rekeyed: Dict[str, int] = Field(default_factory=dict)
+    rekeyed_total: int = 0
+    # sem question_raw: não dá para recalcular a chave
+    skipped: int = 0
+
+    duration_ms: float = 0.0
@@ -0,0 +1,17 @@
+# Application/dto/iracema_rag_exact_hit_dto.py
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class IracemaRagExactHitDto:
+    """
+    Pergunta já respondida com a mesma chave canônica.
+    plan_kind/plan_json: plano estruturado (query_plan | fca), quando indexado.
+    """
+    sql: str
+    source_question: str = ""
+    plan_kind: Optional[str] = None
+    plan_json: Optional[str] = None
+    schema_fp: Optional[str] = None
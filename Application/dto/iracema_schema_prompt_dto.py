@@ -0,0 +1,9 @@
+# Application/dto/iracema_schema_prompt_dto.py
+from dataclasses import dataclass, field
+from typing import List
+
+@dataclass
+class IracemaSchemaPromptDto:
+    prompt_sql: str
+    prompt_fc: str
+    columns: List[str] = field(default_factory=list)
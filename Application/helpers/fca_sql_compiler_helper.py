@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from Application.dto.iracema_fca_dto import FCAArgsDto, FCASelectItemDto, FCAWhereDto
 from Application.helpers.sql_types_helper import SqlPlan
@@ -49,7 +49,11 @@ def _sql_literal(v: Any) -> str:
 # WHERE builder
 # -----------------------------------------------------------------------------
 
-def _compile_where_clause(where: List[FCAWhereDto]) -> str:
+def _compile_where_conditions(where: List[FCAWhereDto]) -> str:
+    """
+    Compila as condições do WHERE (sem a palavra-chave), unidas por AND.
+    Reaproveitado pelo WHERE normal e pelo FILTER (WHERE ...) do batch.
+    """
     if not where:
         return ""
 
@@ -78,7 +82,14 @@ def _compile_where_clause(where: List[FCAWhereDto]) -> str:
         else:
             parts.append(f"{col} {op} {_sql_literal(val)}")
 
-    return "WHERE " + " AND ".join(parts)
+    return " AND ".join(parts)
+
+
+def _compile_where_clause(where: List[FCAWhereDto]) -> str:
+    conditions = _compile_where_conditions(where)
+    if not conditions:
+        return ""
+    return "WHERE " + conditions
 
 
 # -----------------------------------------------------------------------------
@@ -97,26 +108,38 @@ def _compile_select_item(it: FCASelectItemDto) -> str:
     if t == "agg":
         op = (it.agg or "").lower()
         alias = _quote_alias(it.alias or f"{op}_{it.column or 'all'}")
+        return f"{_compile_agg_expr(op, it.column)} AS {alias}"
+
+    raise ValueError(f"Select item type desconhecido: {it.type}")
 
-        if op == "count":
-            if it.column:
-                col = _quote_ident(it.column)
-                return f"COUNT({col})::bigint AS {alias}"
-            return f"COUNT(*)::bigint AS {alias}"
 
-        col = _quote_ident(it.column)
-        if op == "sum":
-            return f"SUM({col})::double precision AS {alias}"
-        if op == "avg":
-            return f"AVG({col})::double precision AS {alias}"
-        if op == "min":
-            return f"MIN({col}) AS {alias}"
-        if op == "max":
-            return f"MAX({col}) AS {alias}"
+def _compile_agg_expr(op: str, column: Optional[str], filter_sql: str = "") -> str:
+    """
+    Expressão de agregação (sem alias). Com filter_sql, aplica FILTER (WHERE ...)
+    para permitir várias agregações com filtros distintos numa única varredura.
+    """
+    flt = f" FILTER (WHERE {filter_sql})" if filter_sql else ""
 
-        raise ValueError(f"Select agg op desconhecido: {op}")
+    def cast(expr: str, pg_type: str) -> str:
+        # com FILTER, o cast precisa envolver a expressão inteira
+        return f"({expr}{flt})::{pg_type}" if flt else f"{expr}::{pg_type}"
 
-    raise ValueError(f"Select item type desconhecido: {it.type}")
+    if op == "count":
+        if column:
+            return cast(f"COUNT({_quote_ident(column)})", "bigint")
+        return cast("COUNT(*)", "bigint")
+
+    col = _quote_ident(column)
+    if op == "sum":
+        return cast(f"SUM({col})", "double precision")
+    if op == "avg":
+        return cast(f"AVG({col})", "double precision")
+    if op == "min":
+        return f"MIN({col}){flt}"
+    if op == "max":
+        return f"MAX({col}){flt}"
+
+    raise ValueError(f"Select agg op desconhecido: {op}")
 
 
 def _compile_group_by(group_by: list[str]) -> str:
@@ -195,3 +218,67 @@ def compile_fca_to_sql(fca: FCAArgsDto) -> SqlPlan:
         used_template=True,
         reason="fc_args:v2",
     )
+
+
+# -----------------------------------------------------------------------------
+# Batch: agregações escalares combinadas numa única varredura
+# -----------------------------------------------------------------------------
+
+def is_scalar_aggregate_fca(fca: FCAArgsDto) -> bool:
+    """
+    True quando o FCA (já validado) retorna uma única linha de agregações:
+    só itens agg no SELECT, sem GROUP BY, ORDER BY ou OFFSET.
+    Esses FCAs podem ser combinados com outros da mesma tabela.
+    """
+    if not fca.select or fca.group_by or fca.order_by or fca.offset:
+        return False
+    return all((it.type or "column").lower() == "agg" for it in fca.select)
+
+
+def compile_fca_scalar_batch_to_sql(fcas: List[FCAArgsDto]) -> Tuple[SqlPlan, List[Dict[str, str]]]:
+    """
+    Combina N FCAs de agregação escalar (mesma tabela) em um único SELECT,
+    usando FILTER (WHERE ...) para preservar o WHERE de cada item.
+
+    Retorna (SqlPlan, alias_maps), onde alias_maps[i] mapeia
+    alias_combinado -> alias_original do item i.
+    """
+    if not fcas:
+        raise ValueError("Batch vazio: nada para combinar.")
+
+    table_fqn = str(fcas[0].table_fqn)
+    select_parts: list[str] = []
+    alias_maps: List[Dict[str, str]] = []
+
+    for i, fca in enumerate(fcas):
+        if str(fca.table_fqn) != table_fqn:
+            raise ValueError("Batch inválido: FCAs de tabelas diferentes não podem ser combinados.")
+        if not is_scalar_aggregate_fca(fca):
+            raise ValueError(f"Batch inválido: item {i} não é uma agregação escalar.")
+
+        filter_sql = _compile_where_conditions(fca.where or [])
+        alias_map: Dict[str, str] = {}
+        for it in fca.select:
+            op = (it.agg or "").lower()
+            original = it.alias or f"{op}_{it.column or 'all'}"
+            merged = f"q{i}__{original}"
+            alias_map[merged] = original
+            select_parts.append(f"{_compile_agg_expr(op, it.column, filter_sql)} AS {_quote_alias(merged)}")
+        alias_maps.append(alias_map)
+
+    sql = "SELECT " + ",\n       ".join(select_parts) + f"\nFROM {table_fqn};"
+
+    return (
+        SqlPlan(sql=sql, used_template=True, reason=f"fc_batch_merged:{len(fcas)}"),
+        alias_maps,
+    )
+
+
+def split_scalar_batch_row(row: Dict[str, Any], alias_maps: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Desfaz a combinação: devolve uma linha (com aliases originais) por item.
+    """
+    return [
+        {original: row.get(merged) for merged, original in alias_map.items()}
+        for alias_map in alias_maps
+    ]
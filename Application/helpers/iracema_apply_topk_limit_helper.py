@@ -1,4 +1,5 @@
 import re
+from typing import Optional
 
 _LIMIT_RE = re.compile(r"\blimit\s+(\d+)\b", re.IGNORECASE)
 
@@ -10,3 +11,21 @@ def apply_topk_limit(sql: str, top_k: int) -> str:
         # só aplica LIMIT se for query "listável" (opcional)
         s = f"{s}\nLIMIT {int(top_k)}"
     return s + ";"
+
+
+_TRAILING_LIMIT_RE = re.compile(r"\s+limit\s+\d+(\s+offset\s+\d+)?\s*;?\s*$", re.IGNORECASE)
+
+def extract_limit(sql: str) -> Optional[int]:
+    """
+    LIMIT mais externo (último da query), se houver.
+    """
+    found = _LIMIT_RE.findall(sql or "")
+    return int(found[-1]) if found else None
+
+def strip_trailing_limit(sql: str) -> str:
+    """
+    Remove o LIMIT/OFFSET final (sem ';'), preservando LIMITs internos (subqueries).
+    """
+    s = (sql or "").strip()
+    s = _TRAILING_LIMIT_RE.sub("", s)
+    return s.rstrip().rstrip(";")
@@ -0,0 +1,38 @@
+# Application/helpers/iracema_deadline_helper.py
+
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    Prazo de uma requisição (orçamento em ms a partir da criação).
+
+    budget_ms None/<=0 => sem prazo (remaining_secs() devolve None).
+    """
+
+    def __init__(self, budget_ms: Optional[float]) -> None:
+        self._budget_ms = float(budget_ms) if budget_ms and budget_ms > 0 else None
+        self._start = time.perf_counter()
+
+    @property
+    def budget_ms(self) -> Optional[float]:
+        return self._budget_ms
+
+    def remaining_ms(self) -> Optional[float]:
+        if self._budget_ms is None:
+            return None
+        elapsed_ms = (time.perf_counter() - self._start) * 1000.0
+        return max(0.0, self._budget_ms - elapsed_ms)
+
+    def remaining_secs(self) -> Optional[float]:
+        remaining = self.remaining_ms()
+        return None if remaining is None else remaining / 1000.0
+
+    def expired(self) -> bool:
+        remaining = self.remaining_ms()
+        return remaining is not None and remaining <= 0.0
+
+    def has_at_least(self, ms: float) -> bool:
+        remaining = self.remaining_ms()
+        return remaining is None or remaining >= ms
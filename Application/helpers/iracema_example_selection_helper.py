@@ -0,0 +1,82 @@
+# Application/helpers/iracema_example_selection_helper.py
+
+import math
+import re
+from typing import Callable, List, Sequence
+
+from Application.dto.iracema_sql_example_dto import IracemaSqlExampleDto
+
+_SQL_LINE_COMMENT = re.compile(r"--[^\n]*")
+_SQL_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"(?<![A-Za-z_])\d+(?:\.\d+)?")
+_SQL_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def sql_shape(sql: str) -> str:
+    """
+    Forma do SQL sem literais: exemplos que só diferem em valores/limites
+    (WHERE ano = 2020 vs 2021, LIMIT 10 vs 50) viram a mesma forma.
+    """
+    s = _SQL_BLOCK_COMMENT.sub(" ", sql or "")
+    s = _SQL_LINE_COMMENT.sub(" ", s)
+    s = _SQL_STRING.sub("?", s)
+    s = _SQL_NUMBER.sub("?", s)
+    s = _SQL_IN_LIST.sub("(?)", s)
+    s = re.sub(r"\s+", " ", s).strip().rstrip(";").strip()
+    return s.lower()
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    if na == 0.0 or nb == 0.0:
+        return 0.0
+    return dot / (na * nb)
+
+
+def mmr_order(
+    query_vec: Sequence[float],
+    candidate_vecs: List[Sequence[float]],
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    Maximal Marginal Relevance: ordena os candidatos equilibrando similaridade
+    com a pergunta (lambda) e diferença dos já escolhidos (1 - lambda).
+    """
+    relevance = [_cosine(query_vec, v) for v in candidate_vecs]
+    remaining = list(range(len(candidate_vecs)))
+    order: List[int] = []
+    while remaining:
+        best, best_score = remaining[0], -math.inf
+        for i in remaining:
+            redundancy = max((_cosine(candidate_vecs[i], candidate_vecs[j]) for j in order), default=0.0)
+            score = lambda_mult * relevance[i] - (1.0 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        order.append(best)
+        remaining.remove(best)
+    return order
+
+
+def pack_examples(
+    examples: List[IracemaSqlExampleDto],
+    render: Callable[[List[IracemaSqlExampleDto]], str],
+    count_tokens: Callable[[str], int],
+    token_budget: int,
+    max_examples: int,
+) -> List[IracemaSqlExampleDto]:
+    """
+    Guloso na ordem recebida (já ranqueada): entra cada exemplo cujo bloco
+    renderizado ainda cabe no orçamento; exemplos longos demais são pulados.
+    token_budget <= 0 desliga o orçamento (só max_examples).
+    """
+    chosen: List[IracemaSqlExampleDto] = []
+    for ex in examples:
+        if len(chosen) >= max_examples:
+            break
+        if token_budget > 0 and count_tokens(render(chosen + [ex])) > token_budget:
+            continue
+        chosen.append(ex)
+    return chosen
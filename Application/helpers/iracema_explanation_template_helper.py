@@ -0,0 +1,230 @@
+# Application/helpers/iracema_explanation_template_helper.py
+
+import re
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from Application.helpers.iracema_apply_topk_limit_helper import extract_limit
+from Application.helpers.iracema_plan_cache_helper import RAG_PLAN_HIT_PREFIX
+
+# Sufixos de nome de coluna -> unidade (quando colunas_tabela não traz "unit")
+_UNIT_SUFFIXES = (
+    ("_km2", "km²"),
+    ("_m2", "m²"),
+    ("_ha", "ha"),
+    ("_km", "km"),
+    ("_m", "m"),
+    ("_perc", "%"),
+    ("_pct", "%"),
+    ("_percentual", "%"),
+)
+
+# Listas (distinct/schema) acima disso viram "... e mais N"
+_MAX_LISTED_VALUES = 10
+
+
+# -----------------------------------------------------------------------------
+# Formatação numérica PT-BR (determinística, sem depender de locale do SO)
+# -----------------------------------------------------------------------------
+
+def format_number_ptbr(value: Any, decimals: int = 2) -> str:
+    """
+    1234 -> '1.234' | 1234.5 -> '1.234,50' | 1234.0 -> '1.234'
+    """
+    if value is None:
+        return "-"
+    if isinstance(value, bool):
+        return "sim" if value else "não"
+    if isinstance(value, Decimal):
+        value = float(value)
+    if isinstance(value, int):
+        return f"{value:,}".replace(",", ".")
+    if isinstance(value, float):
+        if value.is_integer():
+            return f"{int(value):,}".replace(",", ".")
+        s = f"{value:,.{decimals}f}"
+        return s.replace(",", "_").replace(".", ",").replace("_", ".")
+    return str(value)
+
+
+def _strip_ident(name: str) -> str:
+    return (name or "").strip().strip('"')
+
+
+def _column_meta(columns_meta: list[dict], column: str) -> Dict[str, Any]:
+    for c in columns_meta or []:
+        if (c.get("name") or "").strip() == column:
+            return c
+    return {}
+
+
+def _column_label(columns_meta: list[dict], column: str) -> str:
+    meta = _column_meta(columns_meta, column)
+    return (meta.get("description") or "").strip() or column
+
+
+def _column_unit(columns_meta: list[dict], column: str) -> str:
+    meta = _column_meta(columns_meta, column)
+    unit = (meta.get("unit") or "").strip()
+    if unit:
+        return unit
+    low = column.lower()
+    for suffix, u in _UNIT_SUFFIXES:
+        if low.endswith(suffix):
+            return u
+    return ""
+
+
+def _with_unit(number: str, unit: str) -> str:
+    if not unit:
+        return number
+    return f"{number}{unit}" if unit == "%" else f"{number} {unit}"
+
+
+def _format_list(values: List[Any], total: int) -> str:
+    shown = [format_number_ptbr(v) if isinstance(v, (int, float, Decimal)) else str(v) for v in values[:_MAX_LISTED_VALUES]]
+    text = ", ".join(shown)
+    if total > len(shown):
+        text += f" e mais {format_number_ptbr(total - len(shown))}"
+    return text
+
+
+def _has_user_filters(sql_executed: str) -> bool:
+    """
+    True quando o WHERE tem condições além dos 'IS NOT NULL' que os templates sempre adicionam.
+    """
+    m = re.search(
+        r"\bwhere\b(.*?)(\bgroup\s+by\b|\border\s+by\b|\blimit\b|;|$)",
+        sql_executed or "",
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+    if not m:
+        return False
+    conds = re.split(r"\band\b", m.group(1), flags=re.IGNORECASE)
+    return any(c.strip() and not re.search(r"\bis\s+not\s+null\s*$", c.strip(), flags=re.IGNORECASE) for c in conds)
+
+
+def _single_value(rows: List[Dict[str, Any]]) -> Any:
+    if len(rows) != 1 or len(rows[0]) != 1:
+        raise LookupError("resultado não é escalar")
+    return next(iter(rows[0].values()))
+
+
+# -----------------------------------------------------------------------------
+# Templates por reason
+# -----------------------------------------------------------------------------
+
+def _explain_count(table_title: str, value: Any, filtered: bool) -> str:
+    n = int(value or 0)
+    scope = " que atendem aos critérios da pergunta" if filtered else ""
+    if n == 0:
+        return f"Não há registros em {table_title}{scope}."
+    if n == 1:
+        return f"Há 1 registro em {table_title}{scope}."
+    return f"Há {format_number_ptbr(n)} registros em {table_title}{scope}."
+
+
+def _explain_sum(table_title: str, column: str, columns_meta: list[dict], value: Any, filtered: bool) -> str:
+    label = _column_label(columns_meta, column)
+    scope = " (registros que atendem aos critérios da pergunta)" if filtered else ""
+    if value is None:
+        return f"Não há valores de {label} para somar em {table_title}{scope}."
+    total = _with_unit(format_number_ptbr(value), _column_unit(columns_meta, column))
+    return f"A soma de {label} em {table_title}{scope} é {total}."
+
+
+def _explain_distinct(
+    table_title: str,
+    column: str,
+    columns_meta: list[dict],
+    rows: List[Dict[str, Any]],
+    rowcount: int,
+    filtered: bool,
+    limit: Optional[int],
+) -> str:
+    label = _column_label(columns_meta, column)
+    scope = " que atendem aos critérios da pergunta" if filtered else ""
+    if rowcount == 0:
+        return f"Não foram encontrados valores de {label} em {table_title}{scope}."
+    values = [next(iter(r.values())) for r in rows if r]
+    listed = _format_list(values, rowcount)
+    if limit is not None and rowcount >= limit:
+        # resultado truncado pelo LIMIT: não afirma o total
+        return f"Primeiros {format_number_ptbr(rowcount)} valores distintos de {label} em {table_title}{scope}: {listed}."
+    if rowcount == 1:
+        return f"Há 1 valor distinto de {label} em {table_title}{scope}: {listed}."
+    return f"Há {format_number_ptbr(rowcount)} valores distintos de {label} em {table_title}{scope}: {listed}."
+
+
+def _explain_schema(table_title: str, rows: List[Dict[str, Any]], rowcount: int) -> str:
+    cols = [f'{r.get("coluna")} ({r.get("tipo")})' for r in rows]
+    return f"A tabela {table_title} possui {format_number_ptbr(rowcount)} colunas: {_format_list(cols, rowcount)}."
+
+
+def render_template_explanation(
+    reason: str,
+    sql_executed: str,
+    rows: List[Dict[str, Any]],
+    rowcount: int,
+    table_title: str,
+    columns_meta: list[dict],
+) -> Optional[str]:
+    """
+    Explicação determinística (PT-BR) para intents simples, a partir do reason do plano.
+
+    Retorna None quando o resultado é multi-linha/ambíguo ou o reason não tem template;
+    nesse caso o chamador deve usar o explainer LLM (explain_result).
+    """
+    reason = reason or ""
+    if reason.startswith(RAG_PLAN_HIT_PREFIX):
+        reason = reason[len(RAG_PLAN_HIT_PREFIX):]
+    parts = reason.split(":")
+    kind = parts[0]
+    filtered = _has_user_filters(sql_executed)
+
+    try:
+        if kind == "count_template" or (kind == "fc" and parts[1:2] == ["count"]):
+            return _explain_count(table_title, _single_value(rows), filtered)
+
+        if kind == "sum_template" and len(parts) >= 2:
+            return _explain_sum(table_title, _strip_ident(parts[1]), columns_meta, _single_value(rows), filtered)
+
+        if kind == "fc" and parts[1:2] == ["sum"] and len(parts) >= 3:
+            return _explain_sum(table_title, _strip_ident(parts[2]), columns_meta, _single_value(rows), filtered)
+
+        if kind == "distinct_template" and len(parts) >= 2:
+            return _explain_distinct(
+                table_title, _strip_ident(parts[1]), columns_meta, rows, rowcount, filtered, extract_limit(sql_executed)
+            )
+
+        # fc:distinct com várias colunas ('"a", "b"') devolve tuplas: fica com o LLM
+        if kind == "fc" and parts[1:2] == ["distinct"] and len(parts) >= 3 and "," not in parts[2]:
+            return _explain_distinct(
+                table_title, _strip_ident(parts[2]), columns_meta, rows, rowcount, filtered, extract_limit(sql_executed)
+            )
+
+        if kind == "schema_columns_template" or (kind == "fc" and parts[1:2] == ["schema"]):
+            return _explain_schema(table_title, rows, rowcount)
+    except (LookupError, TypeError, ValueError):
+        return None
+
+    return None
+
+
+def render_template_fallback_notice() -> str:
+    """
+    Aviso quando o SQL veio do template de reserva (LLM sem prazo/sobrecarregado).
+    """
+    return (
+        "Resposta simplificada: o serviço de IA não respondeu a tempo e a consulta "
+        "foi resolvida por um modelo de consulta padrão."
+    )
+
+
+def render_degraded_explanation(rowcount: int) -> str:
+    """
+    Texto mínimo quando o explainer LLM foi descartado por sobrecarga.
+    """
+    n = format_number_ptbr(int(rowcount or 0))
+    linhas = "linha" if rowcount == 1 else "linhas"
+    return f"A consulta retornou {n} {linhas}. A explicação detalhada está indisponível no momento (alta demanda)."
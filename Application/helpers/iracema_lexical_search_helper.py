@@ -0,0 +1,85 @@
+# Application/helpers/iracema_lexical_search_helper.py
+
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from Application.helpers.iracema_schema_linking_helper import tokenize
+
+# palavras vazias de pergunta (não distinguem uma pergunta da outra)
+_STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas",
+    "um", "uma", "por", "para", "com", "que", "qual", "quais", "me", "mostre", "liste", "listar",
+}
+
+
+def lexical_terms(text: str) -> List[str]:
+    """
+    Termos do índice: palavras sem acento (w:) + trigramas de caractere (t:),
+    que toleram plural/flexão e erros de digitação ("caucaia" ~ "caucaya").
+    """
+    terms: List[str] = []
+    for word in tokenize(text):
+        if word in _STOPWORDS:
+            continue
+        terms.append("w:" + word)
+        padded = f" {word} "
+        terms.extend("t:" + padded[i : i + 3] for i in range(len(padded) - 2))
+    return terms
+
+
+class BM25Index:
+    """
+    BM25 em memória sobre (id, texto). Pensado para poucos milhares de perguntas
+    por tabela (a compactação do RAG limita o tamanho).
+    """
+
+    def __init__(self, docs: Iterable[Tuple[str, str]], k1: float = 1.2, b: float = 0.75):
+        self._k1 = float(k1)
+        self._b = float(b)
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._ids: List[str] = []
+        self._lengths: List[int] = []
+
+        for doc_id, text in docs:
+            tf = Counter(lexical_terms(text))
+            pos = len(self._ids)
+            self._ids.append(doc_id)
+            self._lengths.append(sum(tf.values()))
+            for term, freq in tf.items():
+                self._postings[term].append((pos, freq))
+
+        self._avg_len = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        n = len(self._ids)
+        if n == 0:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(lexical_terms(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for pos, freq in postings:
+                norm = 1.0 - self._b + self._b * (self._lengths[pos] / self._avg_len if self._avg_len else 1.0)
+                scores[pos] += idf * (freq * (self._k1 + 1.0)) / (freq + self._k1 * norm)
+
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[: max(0, int(k))]
+        return [(self._ids[pos], score) for pos, score in best]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k0: int = 60) -> List[Tuple[str, float]]:
+    """
+    RRF: score(d) = soma 1 / (k0 + posição). Só usa a ordem de cada lista,
+    então combina BM25 e distância de embedding sem calibrar as escalas.
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] += 1.0 / (k0 + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
@@ -0,0 +1,188 @@
+# Application/helpers/iracema_near_duplicate_helper.py
+
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from Application.helpers.iracema_schema_linking_helper import fold_text
+
+NEAR_KIND_PARAPHRASE = "paraphrase"
+NEAR_KIND_VALUE = "value"
+NEAR_KIND_COLUMN = "column"
+
+# palavras que não mudam o significado da pergunta ("quantos registros (tem) em Fortaleza")
+_FILLERS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas",
+    "um", "uma", "me", "tem", "ha", "existe", "existem", "sao", "temos", "favor",
+    "voce", "pode", "poderia", "informe", "diga",
+}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_LIMIT_NUMBER = re.compile(r"\blimit\s+\d+", re.IGNORECASE)
+
+# variações acentuadas de cada letra (a busca do valor antigo no literal ignora acento/caixa)
+_ACCENTS = {
+    "a": "aáàâãä", "e": "eéèêë", "i": "iíìîï", "o": "oóòôõö", "u": "uúùûü", "c": "cç", "n": "nñ",
+}
+
+
+@dataclass
+class NearDuplicateRewrite:
+    sql: str
+    kind: str
+    similarity: float
+    old_value: str = ""
+    new_value: str = ""
+
+
+def _content_words(question: str) -> List[Tuple[str, Tuple[int, int]]]:
+    """
+    (palavra sem acento/minúscula, posição no texto), sem as palavras de preenchimento.
+    """
+    words = []
+    for m in _WORD.finditer(question or ""):
+        folded = fold_text(m.group(0))
+        if folded and folded not in _FILLERS:
+            words.append((folded, m.span()))
+    return words
+
+
+def _span_text(text: str, words: List[Tuple[str, Tuple[int, int]]]) -> str:
+    # trecho original inteiro (com preposições internas: "Juazeiro do Norte")
+    return text[words[0][1][0] : words[-1][1][1]]
+
+
+def question_similarity(a: str, b: str) -> float:
+    fa = [f for f, _ in _content_words(a)]
+    fb = [f for f, _ in _content_words(b)]
+    if not fa and not fb:
+        return 1.0
+    return SequenceMatcher(None, fa, fb, autojunk=False).ratio()
+
+
+def _accent_insensitive_pattern(text: str) -> re.Pattern:
+    parts = []
+    for ch in fold_text(text):
+        if ch.isspace():
+            parts.append(r"\s+")
+        elif ch in _ACCENTS:
+            parts.append(f"[{_ACCENTS[ch]}]")
+        else:
+            parts.append(re.escape(ch))
+    return re.compile("".join(parts), re.IGNORECASE)
+
+
+def _match_case(template: str, value: str) -> str:
+    if template.isupper():
+        return value.upper()
+    if template.islower():
+        return value.lower()
+    return value
+
+
+def _substitute_number(sql: str, old: str, new: str) -> Optional[str]:
+    # o número do LIMIT é do top_k, não da pergunta
+    protected = [m.span() for m in _LIMIT_NUMBER.finditer(sql)]
+    pattern = re.compile(rf"(?<![\w.]){re.escape(old)}(?![\w.])")
+
+    hits = [m for m in pattern.finditer(sql) if not any(s <= m.start() < e for s, e in protected)]
+    if not hits:
+        return None
+    out, last = [], 0
+    for m in hits:
+        out.append(sql[last : m.start()])
+        out.append(new)
+        last = m.end()
+    out.append(sql[last:])
+    return "".join(out)
+
+
+def _substitute_value(sql: str, old: str, new: str) -> Optional[str]:
+    pattern = _accent_insensitive_pattern(old)
+    replaced = 0
+
+    def in_literal(m: re.Match) -> str:
+        literal = m.group(0)
+
+        def swap(v: re.Match) -> str:
+            nonlocal replaced
+            replaced += 1
+            return _match_case(v.group(0), new.replace("'", "''"))
+
+        return pattern.sub(swap, literal)
+
+    rewritten = _SQL_STRING.sub(in_literal, sql)
+    return rewritten if replaced else None
+
+
+def _column_by_phrase(phrase: str, columns_meta: List[Dict]) -> Optional[str]:
+    target = fold_text(phrase).replace(" ", "_")
+    for col in columns_meta or []:
+        name = str(col.get("name") or "").strip()
+        if name and not col.get("is_geometry") and fold_text(name) == target:
+            return name
+    return None
+
+
+def _substitute_column(sql: str, old_col: str, new_col: str) -> Optional[str]:
+    pattern = re.compile(rf'(?<![\w."]){re.escape(old_col)}(?![\w"])|"{re.escape(old_col)}"', re.IGNORECASE)
+    rewritten, n = pattern.subn(lambda m: f'"{new_col}"' if m.group(0).startswith('"') else new_col, sql)
+    return rewritten if n else None
+
+
+def rewrite_near_duplicate(
+    cached_question: str,
+    cached_sql: str,
+    question: str,
+    columns_meta: List[Dict],
+    min_similarity: float = 0.5,
+) -> Optional[NearDuplicateRewrite]:
+    """
+    Reaproveita o SQL de uma pergunta quase igual já respondida.
+
+    Aceita só duas diferenças (fora palavras de preenchimento):
+    - nenhuma: paráfrase, o SQL vale como está
+    - um único trecho trocado que é um slot: número, valor citado num literal
+      do SQL ('Fortaleza' -> 'Sobral') ou nome de coluna
+    Qualquer outra diferença (palavra a mais/a menos, dois trechos) => None.
+    """
+    a = _content_words(cached_question)
+    b = _content_words(question)
+    fa = [f for f, _ in a]
+    fb = [f for f, _ in b]
+
+    matcher = SequenceMatcher(None, fa, fb, autojunk=False)
+    similarity = matcher.ratio() if (fa or fb) else 1.0
+    if similarity < min_similarity:
+        return None
+
+    diffs = [op for op in matcher.get_opcodes() if op[0] != "equal"]
+    if not diffs:
+        return NearDuplicateRewrite(sql=cached_sql, kind=NEAR_KIND_PARAPHRASE, similarity=similarity)
+    if len(diffs) != 1 or diffs[0][0] != "replace":
+        return None
+
+    _, i1, i2, j1, j2 = diffs[0]
+    old = _span_text(cached_question, a[i1:i2])
+    new = _span_text(question, b[j1:j2])
+
+    if old.isdigit() and new.isdigit():
+        sql = _substitute_number(cached_sql, old, new)
+        kind = NEAR_KIND_VALUE
+    else:
+        old_col = _column_by_phrase(old, columns_meta)
+        new_col = _column_by_phrase(new, columns_meta)
+        if old_col and new_col:
+            sql = _substitute_column(cached_sql, old_col, new_col)
+            kind = NEAR_KIND_COLUMN
+        elif old_col or new_col:
+            return None  # coluna <-> valor: muda a intenção da pergunta
+        else:
+            sql = _substitute_value(cached_sql, old, new)
+            kind = NEAR_KIND_VALUE
+
+    if not sql:
+        return None
+    return NearDuplicateRewrite(sql=sql, kind=kind, similarity=similarity, old_value=old, new_value=new)
@@ -0,0 +1,42 @@
+# Application/helpers/iracema_partition_resolver_helper.py
+
+import threading
+from typing import Dict
+
+from Data.db_context import DbContext
+from Domain.interfaces.i_iracema_datasource_repository import IIracemaDataSourceRepository
+
+
+class DatasourcePartitionResolver:
+    """
+    table_identifier -> chave da partição.
+    - table: a própria tabela
+    - category: categoria_informacao da datasource (tabelas pequenas da mesma
+      categoria dividem a coleção); sem categoria, a própria tabela
+    """
+
+    def __init__(self, db_context: DbContext, datasource_repo: IIracemaDataSourceRepository, mode: str = "table"):
+        self._db_context = db_context
+        self._datasource_repo = datasource_repo
+        self._mode = mode
+        self._cache: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, table_identifier: str) -> str:
+        if self._mode != "category":
+            return table_identifier
+        with self._lock:
+            key = self._cache.get(table_identifier)
+        if key is not None:
+            return key
+
+        session = self._db_context.create_session()
+        try:
+            ds = self._datasource_repo.get_by_table_identifier(session=session, table_identifier=table_identifier)
+        finally:
+            session.close()
+        key = (ds.categoria_informacao or "").strip() if ds is not None else ""
+        key = key or table_identifier
+        with self._lock:
+            self._cache[table_identifier] = key
+        return key
@@ -0,0 +1,71 @@
+# Application/helpers/iracema_plan_cache_helper.py
+
+from typing import Dict, List, Union
+
+from Application.dto.iracema_fca_dto import FCAArgsDto
+from Application.dto.iracema_query_plan_dto import QueryPlanArgsDto
+from Application.helpers.fca_sql_compiler_helper import compile_fca_to_sql
+from Application.helpers.fca_validator_helper import validate_and_normalize_fca
+from Application.helpers.query_plan_sql_compiler_helper import compile_query_plan_to_sql
+from Application.helpers.query_plan_validator_helper import validate_and_normalize_plan
+from Application.helpers.sql_types_helper import SqlPlan
+
+PLAN_KIND_QUERY_PLAN = "query_plan"
+PLAN_KIND_FCA = "fca"
+
+# hit do cache de planos: 'rag_plan_hit|<reason do plano recompilado>' (ex.: rag_plan_hit|fc:count);
+# o reason compilado continua valendo para a explicação por template
+RAG_PLAN_HIT_PREFIX = "rag_plan_hit|"
+
+
+def attach_plan(sql_plan: SqlPlan, plan: Union[QueryPlanArgsDto, FCAArgsDto]) -> SqlPlan:
+    """
+    Guarda no SqlPlan o plano estruturado que o gerou (vai para a memória RAG).
+    A tabela do FCA não entra: é forçada de novo na recompilação.
+    """
+    if isinstance(plan, FCAArgsDto):
+        sql_plan.plan_kind = PLAN_KIND_FCA
+        sql_plan.plan_json = plan.model_dump_json(exclude={"table_fqn"})
+    else:
+        sql_plan.plan_kind = PLAN_KIND_QUERY_PLAN
+        sql_plan.plan_json = plan.model_dump_json()
+    return sql_plan
+
+
+def compile_cached_plan(
+    plan_kind: str,
+    plan_json: str,
+    columns_meta: List[Dict],
+    table_fqn: str,
+    top_k: int,
+) -> SqlPlan:
+    """
+    Plano guardado -> SQL no schema atual (mesma validação/compilação do FC).
+    O limite vem do top_k atual, como no hit de SQL (apply_topk_limit).
+    ValueError se o plano não vale mais (coluna removida/renomeada).
+    """
+    if plan_kind == PLAN_KIND_FCA:
+        fca = FCAArgsDto.model_validate_json(plan_json)
+        fca.limit = None
+        fca = validate_and_normalize_fca(fca, columns_meta=columns_meta, top_k=top_k, enforced_table_fqn=table_fqn)
+        return attach_plan(compile_fca_to_sql(fca), fca)
+    if plan_kind == PLAN_KIND_QUERY_PLAN:
+        plan = QueryPlanArgsDto.model_validate_json(plan_json)
+        plan.limit = None
+        plan = validate_and_normalize_plan(plan, columns_meta)
+        return attach_plan(compile_query_plan_to_sql(table_fqn=table_fqn, plan=plan, top_k=top_k), plan)
+    raise ValueError(f"Tipo de plano desconhecido: {plan_kind}")
+
+
+def cached_plan_is_valid(meta: Dict, columns_meta: List[Dict]) -> bool:
+    """
+    O plano guardado nos metadados ainda valida contra as colunas atuais?
+    """
+    plan_kind, plan_json = meta.get("plan_kind"), meta.get("plan_json")
+    if not plan_kind or not plan_json:
+        return False
+    try:
+        compile_cached_plan(plan_kind, plan_json, columns_meta, "schema.tabela", 1)
+    except ValueError:
+        return False
+    return True
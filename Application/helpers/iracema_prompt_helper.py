@@ -1,26 +1,90 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+QUESTION_PLACEHOLDER = "{PERGUNTA_DO_USUARIO}"
+
+_SQL_QUESTION_HEADING = "### Pergunta"
+_SQL_ANSWER_MARKER = "### SQL"
+
+_FC_JSON_REMINDER = (
+    "\n\nRETORNE APENAS JSON. Sem markdown. Sem texto extra.\n"
+    "Campos esperados: intent, target_column, value_column, group_by, filters, limit.\n"
+)
+
+
+def split_prompt_template(template: str, placeholder: str = QUESTION_PLACEHOLDER) -> Tuple[str, str]:
+    """
+    Divide o template em (prefixo, sufixo) ao redor do placeholder da pergunta.
+
+    O prefixo (instruções + esquema + colunas) é byte-idêntico entre requisições
+    da mesma datasource: é ele que o Ollama consegue reaproveitar do KV-cache.
+    Sem placeholder, o template inteiro é prefixo e o sufixo é vazio.
+    """
+    template = template or ""
+    if placeholder not in template:
+        return template, ""
+    prefix, suffix = template.split(placeholder, 1)
+    return prefix, suffix
+
 
 def build_sql_generation_prompt(
     schema_description: str,
     question: str,
     top_k: int = 20,
+    examples_block: Optional[str] = None,
 ) -> str:
     """
     Prompt para a PRIMEIRA chamada ao LLM (geração de SQL).
 
-    Agora que `schema_description` já vem no template sqlcoder (PT-BR),
-    o único trabalho desta função é substituir o placeholder
-    {PERGUNTA_DO_USUARIO} pelo texto de `question`.
+    Layout estável em prefixo (partes variáveis por último):
+      1) Tarefa + Esquema        -> invariante por datasource (reuso de KV-cache)
+      2) Exemplos (RAG)          -> variam por pergunta
+      3) ### Pergunta + ### SQL  -> pergunta do usuário
 
     Observação: `top_k` fica aqui por compatibilidade de assinatura, mas
     o LIMIT já deve estar embutido no schema_description (gerado pelo build_prompt_inicial).
     """
-    placeholder = "{PERGUNTA_DO_USUARIO}"
-    if placeholder in schema_description:
-        return schema_description.replace(placeholder, question)
-    # fallback caso o template venha com outro placeholder ou já esteja preenchido
-    return schema_description
+    examples = (examples_block or "").strip()
+    prefix, suffix = split_prompt_template(schema_description)
+
+    if QUESTION_PLACEHOLDER not in (schema_description or ""):
+        # fallback caso o template venha com outro placeholder ou já esteja preenchido
+        return _inject_before_marker(schema_description, examples, _SQL_ANSWER_MARKER)
+
+    head = prefix.rstrip()
+    if not head.endswith(_SQL_QUESTION_HEADING):
+        # template sem "### Pergunta" logo antes do placeholder: mantém o formato original
+        prompt = prefix + question + suffix
+        return _inject_before_marker(prompt, examples, _SQL_ANSWER_MARKER)
+
+    head = head[: -len(_SQL_QUESTION_HEADING)].rstrip()
+    parts = [head, ""]
+    if examples:
+        parts += [examples, ""]
+    parts.append(_SQL_QUESTION_HEADING)
+    return "\n".join(parts) + "\n" + question.strip() + suffix
+
+
+def build_fc_plan_prompt(prompt_inicial_fc: str, question: str) -> str:
+    """
+    Prompt do FC (QueryPlan JSON): prefixo invariante + pergunta + sufixo do template.
+    As instruções de formato ficam no template (antes da pergunta, ver step3);
+    templates antigos sem essas instruções recebem o lembrete no final.
+    """
+    prefix, suffix = split_prompt_template(prompt_inicial_fc)
+    prompt = prefix + question.strip() + suffix
+    if "RETORNE APENAS JSON" not in prompt:
+        prompt += _FC_JSON_REMINDER
+    return prompt
+
 
+def _inject_before_marker(prompt: str, block: str, marker: str) -> str:
+    """
+    Injeta o bloco imediatamente antes do último `marker` (se existir).
+    """
+    if not block or marker not in prompt:
+        return prompt
+    before, after = prompt.rsplit(marker, 1)
+    return before.rstrip() + "\n\n" + block + "\n\n" + marker + after
 
 
 def build_explanation_prompt(
@@ -29,10 +93,20 @@ def build_explanation_prompt(
     sql_executed: str,
     rows: List[Dict[str, Any]],
     rowcount: int,
+    summary: Optional[str] = None,
 ) -> str:
     """
     Prompt para a SEGUNDA chamada ao LLM (explicação do resultado SQL).
+
+    Com `summary` (resumo estatístico compacto), as linhas brutas não entram no prompt.
     """
+    if summary:
+        return f"""Você recebeu o resultado de uma consulta SQL executada sobre o dataset escolhido. SQL executado: {sql_executed}
+
+            Resumo estatístico do resultado: {summary}
+
+            Explique o resultado em uma frase."""
+
     max_preview = min(len(rows), 20)
     preview_rows = rows[:max_preview]
 
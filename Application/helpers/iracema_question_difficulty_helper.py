@@ -0,0 +1,109 @@
+# Application/helpers/iracema_question_difficulty_helper.py
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from Application.helpers.iracema_schema_linking_helper import fold_text, tokenize
+from Application.helpers.sql_intent_detector_helper import (
+    is_schema_question,
+    is_distinct_list_question,
+    is_count_question,
+    is_sum_question,
+    wants_groupby,
+    has_filter_hint,
+    has_advanced_intent,
+)
+
+ROUTE_SMALL = "small"
+ROUTE_LARGE = "large"
+
+# várias condições encadeadas ("... com X e Y", "... ou ...")
+_COMPOUND = re.compile(r"\b(e|ou)\b", re.IGNORECASE)
+
+
+@dataclass
+class QuestionDifficulty:
+    """
+    Complexidade estimada da pergunta (sem LLM) e rota sugerida.
+    score 0 = intent simples sem recortes; cada sinal soma pontos.
+    """
+    score: int
+    route: str
+    signals: List[str] = field(default_factory=list)
+
+
+def count_referenced_columns(question: str, columns_meta: List[Dict]) -> int:
+    """
+    Colunas citadas pelo nome (inteiro ou por token do nome, ex.: 'municipio' em 'nm_municipio').
+    """
+    question_norm = fold_text(question)
+    q_tokens = {t for t in tokenize(question) if len(t) >= 4}
+    count = 0
+    for col in columns_meta or []:
+        name = fold_text(str(col.get("name") or ""))
+        if not name:
+            continue
+        if re.search(rf"(?<![a-z0-9_]){re.escape(name)}(?![a-z0-9_])", question_norm):
+            count += 1
+        elif q_tokens & {t for t in tokenize(name) if len(t) >= 4}:
+            count += 1
+    return count
+
+
+def classify_question_difficulty(
+    question: str,
+    columns_meta: List[Dict],
+    easy_max_score: int = 1,
+) -> QuestionDifficulty:
+    """
+    Sinais baratos: intents determinísticos, colunas citadas, filtros, agrupamento,
+    pedidos avançados (média, ranking, séries). score <= easy_max_score => modelo pequeno.
+    """
+    q = question or ""
+    signals: List[str] = []
+    score = 0
+
+    simple_intent = (
+        is_schema_question(q)
+        or is_count_question(q)
+        or is_sum_question(q)
+        or is_distinct_list_question(q)
+    )
+    if not simple_intent:
+        signals.append("open_intent")
+        score += 1
+
+    filtered = has_filter_hint(q)
+    if filtered:
+        signals.append("filter")
+        score += 1
+        if _COMPOUND.search(q):
+            signals.append("compound_filter")
+            score += 1
+
+    if wants_groupby(q):
+        signals.append("groupby")
+        score += 1
+
+    if has_advanced_intent(q):
+        signals.append("advanced")
+        score += 2
+
+    referenced = count_referenced_columns(q, columns_meta)
+    if referenced > 2:
+        signals.append(f"columns:{referenced}")
+        score += referenced - 2
+
+    route = ROUTE_SMALL if score <= easy_max_score else ROUTE_LARGE
+    return QuestionDifficulty(score=score, route=route, signals=signals)
+
+
+def routes_for(difficulty: QuestionDifficulty, small_available: bool) -> List[str]:
+    """
+    Ordem de tentativa: pergunta fácil começa no modelo pequeno e escala para o grande
+    se a saída não passar na validação.
+    """
+    if difficulty.route == ROUTE_SMALL and small_available:
+        return [ROUTE_SMALL, ROUTE_LARGE]
+    return [ROUTE_LARGE]
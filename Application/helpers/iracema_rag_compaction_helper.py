@@ -0,0 +1,82 @@
+# Application/helpers/iracema_rag_compaction_helper.py
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+REASON_INACTIVE = "inactive_datasource"
+REASON_SCHEMA = "schema_changed"
+REASON_DUPLICATE = "duplicate_question"
+REASON_OVER_CAP = "over_table_cap"
+
+Entry = Tuple[str, Dict[str, Any]]
+
+
+def entry_rank(meta: Dict[str, Any]) -> Tuple:
+    """
+    Ordem de preferência entre exemplos (maior = melhor):
+    sucesso (rowcount > 0) -> tem plano estruturado -> dia mais recente -> menor duração -> mais recente.
+    """
+    created_at = str(meta.get("created_at") or "")
+    try:
+        duration = float(meta.get("duration_ms") or 0.0)
+    except (TypeError, ValueError):
+        duration = 0.0
+    try:
+        success = int(meta.get("rowcount") or 0) > 0
+    except (TypeError, ValueError):
+        success = False
+    return (success, bool(meta.get("plan_json")), created_at[:10], -duration, created_at)
+
+
+def plan_rag_compaction(
+    entries: List[Entry],
+    active_fingerprints: Dict[str, str],
+    max_per_table: int,
+    replannable_ids: Optional[Set[str]] = None,
+) -> Dict[str, List[str]]:
+    """
+    Decide o que remover da memória RAG. Retorna {motivo: [ids]}.
+
+    - active_fingerprints: table_identifier -> schema_fingerprint das datasources ativas
+    - exemplos sem schema_fp (indexados antes do fingerprint) só saem por duplicidade/limite
+    - replannable_ids: exemplos com plano (QueryPlan/FCA) que ainda valida no schema
+      atual; são recompilados no hit, então não saem por schema alterado
+    - max_per_table <= 0 desliga o limite por tabela
+    """
+    removed: Dict[str, List[str]] = {
+        REASON_INACTIVE: [],
+        REASON_SCHEMA: [],
+        REASON_DUPLICATE: [],
+        REASON_OVER_CAP: [],
+    }
+
+    # 1) datasource desativada / schema diferente do atual
+    by_question: Dict[Tuple[str, str], List[Entry]] = defaultdict(list)
+    for doc_id, meta in entries:
+        table = str(meta.get("table_identifier") or "")
+        if table not in active_fingerprints:
+            removed[REASON_INACTIVE].append(doc_id)
+            continue
+        fp = meta.get("schema_fp")
+        if fp and fp != active_fingerprints[table] and doc_id not in (replannable_ids or ()):
+            removed[REASON_SCHEMA].append(doc_id)
+            continue
+        key = (table, str(meta.get("question_norm") or meta.get("question_raw") or doc_id))
+        by_question[key].append((doc_id, meta))
+
+    # 2) uma entrada por (tabela, pergunta normalizada): fica a melhor
+    by_table: Dict[str, List[Entry]] = defaultdict(list)
+    for (table, _), group in by_question.items():
+        group.sort(key=lambda e: entry_rank(e[1]), reverse=True)
+        by_table[table].append(group[0])
+        removed[REASON_DUPLICATE].extend(doc_id for doc_id, _ in group[1:])
+
+    # 3) limite de documentos por tabela
+    if max_per_table > 0:
+        for group in by_table.values():
+            if len(group) <= max_per_table:
+                continue
+            group.sort(key=lambda e: entry_rank(e[1]), reverse=True)
+            removed[REASON_OVER_CAP].extend(doc_id for doc_id, _ in group[max_per_table:])
+
+    return removed
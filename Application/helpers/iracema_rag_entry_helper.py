@@ -0,0 +1,63 @@
+# Application/helpers/iracema_rag_entry_helper.py
+
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from Application.helpers.iracema_text_normalize_helper import question_cache_key
+
+
+def rag_entry_id(table_identifier: str, question: str, sql: str) -> str:
+    raw = f"{table_identifier}||{question.strip()}||{sql.strip()}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+def is_indexable(sql_executed: str, rowcount: int) -> bool:
+    """
+    Só entram na memória consultas com resultado (ou agregações, que podem dar zero).
+    """
+    sql_lower = (sql_executed or "").lower()
+    return rowcount > 0 or "count(" in sql_lower or "sum(" in sql_lower
+
+
+def build_rag_entry(
+    table_identifier: str,
+    question: str,
+    sql_executed: str,
+    rowcount: int,
+    reason: str,
+    duration_ms: float,
+    schema_fingerprint: Optional[str] = None,
+    question_key: Optional[str] = None,
+    plan_kind: Optional[str] = None,
+    plan_json: Optional[str] = None,
+    created_at: Optional[datetime] = None,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    (id, documento, metadados) de um exemplo Pergunta -> SQL da memória RAG.
+    Mesmo formato na indexação ao vivo e na reconstrução a partir do iracema_sql_log.
+    """
+    doc = (
+        f"[TABLE={table_identifier}]\n"
+        f"Pergunta: {question.strip()}\n"
+        f"SQL:\n{sql_executed.strip()}\n"
+    )
+
+    meta: Dict[str, Any] = {
+        "type": "qa_sql",
+        "question_norm": question_key or question_cache_key(question),
+        "question_raw": question.strip(),
+        "table_identifier": table_identifier,
+        "rowcount": int(rowcount),
+        "reason": str(reason),
+        "duration_ms": float(duration_ms or 0.0),
+        "created_at": (created_at or datetime.utcnow()).isoformat() + "Z",
+    }
+    # Chroma não aceita None em metadados
+    if schema_fingerprint:
+        meta["schema_fp"] = schema_fingerprint
+    if plan_kind and plan_json:
+        meta["plan_kind"] = plan_kind
+        meta["plan_json"] = plan_json
+
+    return rag_entry_id(table_identifier, question, sql_executed), doc, meta
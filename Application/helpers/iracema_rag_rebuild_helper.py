@@ -0,0 +1,111 @@
+# Application/helpers/iracema_rag_rebuild_helper.py
+
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from Application.helpers.iracema_rag_compaction_helper import entry_rank
+from Application.helpers.iracema_rag_entry_helper import build_rag_entry, is_indexable
+from Application.helpers.iracema_schema_fingerprint_helper import schema_fingerprint
+from Application.helpers.iracema_text_normalize_helper import question_cache_key
+
+SKIP_NOT_INDEXABLE = "not_indexable"
+SKIP_NO_QUESTION = "no_question"
+SKIP_NO_TABLE = "no_table"
+SKIP_STALE = "stale_schema"
+
+RagEntry = Tuple[str, str, Dict[str, Any]]
+
+
+def reason_from_log(error_message: Optional[str]) -> str:
+    """
+    'planner:<motivo>|fallback:...|coalesced' (sucesso no iracema_sql_log) -> '<motivo>'.
+    """
+    first = (error_message or "").split("|", 1)[0].strip()
+    if first.startswith("planner:"):
+        return first[len("planner:"):] or "sql_log"
+    return "sql_log"
+
+
+def table_of_sql(sql: str, table_identifiers: List[str]) -> Optional[str]:
+    """
+    Datasource citada no SQL (logs sem chamada ao LLM, ex.: hits do RAG);
+    havendo mais de uma, a de identificador mais longo.
+    """
+    sql_lower = (sql or "").lower()
+    found = [t for t in table_identifiers if t.lower() in sql_lower]
+    return max(found, key=len) if found else None
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class RagRebuildCollector:
+    """
+    Reconstrói, a partir das linhas do iracema_sql_log, os exemplos da memória RAG:
+    - só datasources ativas; log anterior à última alteração da datasource é
+      descartado (o SQL pode não valer no schema atual)
+    - pergunta canonicalizada com os sinônimos de coluna (mesma chave da indexação)
+    - um exemplo por (tabela, pergunta canônica): o melhor segundo entry_rank
+    - os logs não guardam o plano estruturado: os exemplos entram só com o SQL
+    """
+
+    def __init__(self, columns_by_table: Dict[str, List[Dict[str, Any]]], updated_at_by_table: Dict[str, datetime]):
+        self._columns = columns_by_table
+        self._fingerprints = {table: schema_fingerprint(cols) for table, cols in columns_by_table.items()}
+        self._updated_at = {table: _utc_naive(ts) for table, ts in updated_at_by_table.items()}
+        self._tables = list(columns_by_table)
+        self._best: Dict[Tuple[str, str], RagEntry] = {}
+        self.skipped: Counter = Counter()
+        self.rows = 0
+
+    def offer(self, row: Any) -> bool:
+        """
+        row: linha de list_success_for_rag. True se virou (ou substituiu) um exemplo.
+        """
+        self.rows += 1
+        question = (row.question or "").strip()
+        if not question:
+            self.skipped[SKIP_NO_QUESTION] += 1
+            return False
+        rowcount = int(row.rowcount or 0)
+        if not is_indexable(row.sql_text, rowcount):
+            self.skipped[SKIP_NOT_INDEXABLE] += 1
+            return False
+
+        table = row.datasource if row.datasource in self._columns else table_of_sql(row.sql_text, self._tables)
+        if table is None:
+            self.skipped[SKIP_NO_TABLE] += 1
+            return False
+        created_at = _utc_naive(row.created_at)
+        updated_at = self._updated_at.get(table)
+        if updated_at is not None and created_at is not None and created_at < updated_at:
+            self.skipped[SKIP_STALE] += 1
+            return False
+
+        key = question_cache_key(question, self._columns[table])
+        entry = build_rag_entry(
+            table_identifier=table,
+            question=question,
+            sql_executed=row.sql_text,
+            rowcount=rowcount,
+            reason=reason_from_log(row.error_message),
+            duration_ms=float(row.duration_ms or 0.0),
+            schema_fingerprint=self._fingerprints[table],
+            question_key=key,
+            created_at=created_at,
+        )
+        current = self._best.get((table, key))
+        if current is not None and entry_rank(current[2]) >= entry_rank(entry[2]):
+            return False
+        self._best[(table, key)] = entry
+        return True
+
+    def entries(self) -> List[RagEntry]:
+        """
+        Exemplos finais ordenados por id (ordem estável para o checkpoint).
+        """
+        return sorted(self._best.values(), key=lambda e: e[0])
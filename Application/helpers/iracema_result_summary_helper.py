@@ -0,0 +1,235 @@
+# Application/helpers/iracema_result_summary_helper.py
+
+from collections import Counter
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from Application.helpers.iracema_apply_topk_limit_helper import extract_limit, strip_trailing_limit
+from Application.helpers.iracema_explanation_template_helper import format_number_ptbr
+from Application.helpers.sql_security_helper import is_safe_select
+
+# Estimativa grosseira de tokens (sem tokenizer do modelo): ~4 caracteres por token
+_CHARS_PER_TOKEN = 4
+
+_TOP_CATEGORIES = 5
+_SAMPLE_ROWS = 3
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float, Decimal)) and not isinstance(v, bool)
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _fmt(v: Any) -> str:
+    if _is_number(v):
+        return format_number_ptbr(v)
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    return str(v)
+
+
+# -----------------------------------------------------------------------------
+# Estatísticas em uma passada (sobre as linhas já retornadas)
+# -----------------------------------------------------------------------------
+
+def summarize_rows(rows: List[Dict[str, Any]], top_categories: int = _TOP_CATEGORIES) -> Dict[str, Any]:
+    """
+    Estatísticas por coluna numa única passada pelas linhas:
+    - numéricas: n, nulos, min, max, soma, média
+    - demais: n, nulos, distintos, top categorias (contagem e % das linhas)
+    - agrupado (1 categoria + 1 número): participação de cada grupo no total
+    """
+    columns = list(rows[0].keys()) if rows else []
+    acc: Dict[str, Dict[str, Any]] = {
+        c: {"n": 0, "nulls": 0, "numeric": True, "min": None, "max": None, "sum": 0.0, "counter": Counter()}
+        for c in columns
+    }
+
+    for r in rows:
+        for c in columns:
+            v = r.get(c)
+            a = acc[c]
+            if v is None:
+                a["nulls"] += 1
+                continue
+            a["n"] += 1
+            if a["numeric"] and _is_number(v):
+                fv = float(v)
+                a["sum"] += fv
+                a["min"] = fv if a["min"] is None or fv < a["min"] else a["min"]
+                a["max"] = fv if a["max"] is None or fv > a["max"] else a["max"]
+            else:
+                a["numeric"] = False
+            a["counter"][v if isinstance(v, (str, int, float, bool, Decimal, date, datetime)) else str(v)] += 1
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    for c in columns:
+        a = acc[c]
+        if a["numeric"] and a["n"] > 0:
+            stats[c] = {
+                "kind": "numeric",
+                "n": a["n"],
+                "nulls": a["nulls"],
+                "min": a["min"],
+                "max": a["max"],
+                "sum": a["sum"],
+                "mean": a["sum"] / a["n"],
+            }
+        else:
+            n = a["n"] or 1
+            stats[c] = {
+                "kind": "categorical",
+                "n": a["n"],
+                "nulls": a["nulls"],
+                "distinct": len(a["counter"]),
+                "top": [(v, cnt, cnt / n) for v, cnt in a["counter"].most_common(top_categories)],
+            }
+
+    summary: Dict[str, Any] = {
+        "rowcount": len(rows),
+        "columns": stats,
+        "sample": rows[:_SAMPLE_ROWS],
+        "groups": None,
+        "full": None,
+    }
+
+    numeric = [c for c in columns if stats[c]["kind"] == "numeric"]
+    categorical = [c for c in columns if stats[c]["kind"] == "categorical"]
+    if len(numeric) == 1 and len(categorical) >= 1:
+        value_col = numeric[0]
+        total = stats[value_col]["sum"]
+        if total:
+            ranked = sorted(
+                (r for r in rows if _is_number(r.get(value_col))),
+                key=lambda r: float(r[value_col]),
+                reverse=True,
+            )[:top_categories]
+            summary["groups"] = {
+                "value_column": value_col,
+                "total": total,
+                "top": [
+                    (" / ".join(_fmt(r.get(g)) for g in categorical), float(r[value_col]), float(r[value_col]) / total)
+                    for r in ranked
+                ],
+            }
+
+    return summary
+
+
+# -----------------------------------------------------------------------------
+# Estatísticas no banco (resultado completo, quando o preview foi truncado)
+# -----------------------------------------------------------------------------
+
+def is_result_truncated(sql_executed: str, rowcount: int) -> bool:
+    limit = extract_limit(sql_executed)
+    return limit is not None and rowcount >= limit
+
+
+def build_result_stats_sql(sql_executed: str, summary: Dict[str, Any]) -> Optional[str]:
+    """
+    SQL de estatísticas sobre o resultado completo (query original sem o LIMIT final).
+    Retorna None quando não for seguro/viável (não-SELECT, sem colunas).
+    """
+    base = strip_trailing_limit(sql_executed)
+    if not base or not is_safe_select(base):
+        return None
+
+    parts = ['COUNT(*)::bigint AS "__n"']
+    for i, (col, st) in enumerate(summary["columns"].items()):
+        q = _quote_ident(col)
+        if st["kind"] == "numeric":
+            parts.append(
+                f'MIN({q})::double precision AS "__min_{i}", '
+                f'MAX({q})::double precision AS "__max_{i}", '
+                f'AVG({q})::double precision AS "__avg_{i}", '
+                f'SUM({q})::double precision AS "__sum_{i}"'
+            )
+        else:
+            parts.append(f'COUNT(DISTINCT {q})::bigint AS "__distinct_{i}"')
+
+    return f"WITH r AS (\n{base}\n)\nSELECT " + ", ".join(parts) + "\nFROM r;"
+
+
+def merge_result_stats(summary: Dict[str, Any], stats_row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Anexa as estatísticas do resultado completo (build_result_stats_sql) ao resumo.
+    """
+    full: Dict[str, Any] = {"rowcount": stats_row.get("__n"), "columns": {}}
+    for i, (col, st) in enumerate(summary["columns"].items()):
+        if st["kind"] == "numeric":
+            full["columns"][col] = {
+                "min": stats_row.get(f"__min_{i}"),
+                "max": stats_row.get(f"__max_{i}"),
+                "mean": stats_row.get(f"__avg_{i}"),
+                "sum": stats_row.get(f"__sum_{i}"),
+            }
+        else:
+            full["columns"][col] = {"distinct": stats_row.get(f"__distinct_{i}")}
+    summary["full"] = full
+    return summary
+
+
+# -----------------------------------------------------------------------------
+# Texto compacto para o prompt do explainer
+# -----------------------------------------------------------------------------
+
+def render_summary_text(summary: Dict[str, Any], max_tokens: int) -> str:
+    """
+    Linhas em ordem de prioridade até esgotar o orçamento (~tokens):
+    total de linhas -> estatísticas por coluna -> grupos -> exemplos.
+    """
+    budget = max(1, int(max_tokens)) * _CHARS_PER_TOKEN
+    full = summary.get("full") or {}
+    lines: List[str] = []
+
+    if full.get("rowcount") is not None:
+        lines.append(
+            f"Linhas: {format_number_ptbr(full['rowcount'])} no total "
+            f"(estatísticas abaixo sobre o resultado completo; categorias sobre as {summary['rowcount']} primeiras)."
+        )
+    else:
+        lines.append(f"Linhas: {format_number_ptbr(summary['rowcount'])}.")
+
+    for col, st in summary["columns"].items():
+        fc = (full.get("columns") or {}).get(col) or {}
+        if st["kind"] == "numeric":
+            mn = fc.get("min", st["min"])
+            mx = fc.get("max", st["max"])
+            mean = fc.get("mean", st["mean"])
+            total = fc.get("sum", st["sum"])
+            lines.append(
+                f"- {col}: min {_fmt(mn)}, máx {_fmt(mx)}, média {_fmt(mean)}, soma {_fmt(total)}"
+                + (f", nulos {st['nulls']}" if st["nulls"] else "")
+            )
+        else:
+            distinct = fc.get("distinct", st["distinct"])
+            top = ", ".join(f"{_fmt(v)} ({cnt}, {format_number_ptbr(share * 100, 1)}%)" for v, cnt, share in st["top"])
+            lines.append(f"- {col}: {format_number_ptbr(distinct)} valores distintos" + (f"; mais frequentes: {top}" if top else ""))
+
+    groups = summary.get("groups")
+    if groups:
+        # participação sobre o total completo, quando disponível
+        full_total = ((full.get("columns") or {}).get(groups["value_column"]) or {}).get("sum") or groups["total"]
+        top = "; ".join(
+            f"{label}: {_fmt(value)} ({format_number_ptbr(value / full_total * 100, 1)}%)"
+            for label, value, _ in groups["top"]
+        )
+        lines.append(f"Maiores grupos por {groups['value_column']} (participação no total): {top}")
+
+    for r in summary.get("sample") or []:
+        lines.append("Exemplo: " + "; ".join(f"{k}={_fmt(v)}" for k, v in r.items()))
+
+    out: List[str] = []
+    used = 0
+    for line in lines:
+        if used + len(line) + 1 > budget:
+            if not out:
+                out.append(line[: budget - 3] + "...")
+            break
+        out.append(line)
+        used += len(line) + 1
+    return "\n".join(out)
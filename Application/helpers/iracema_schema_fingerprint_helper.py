@@ -0,0 +1,20 @@
+# Application/helpers/iracema_schema_fingerprint_helper.py
+
+import hashlib
+import json
+from typing import Any, Dict, List
+
+
+def schema_fingerprint(columns_meta: List[Dict[str, Any]]) -> str:
+    """
+    Impressão digital do schema da datasource (nome + tipo das colunas, sem ordem).
+
+    Gravada nos metadados de cada exemplo RAG: se o schema mudar, o SQL memorizado
+    pode não valer mais e a compactação descarta o exemplo.
+    """
+    cols = sorted(
+        (str(c.get("name") or "").strip(), str(c.get("type") or "").strip().lower())
+        for c in columns_meta or []
+    )
+    raw = json.dumps(cols, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
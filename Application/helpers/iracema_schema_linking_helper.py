@@ -0,0 +1,191 @@
+# Application/helpers/iracema_schema_linking_helper.py
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+# Colunas-chave que sempre entram no prompt (quando existirem)
+_KEY_COLUMNS = {"id", "gid", "fid", "ogc_fid", "objectid", "cod", "codigo"}
+
+_STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas",
+    "um", "uma", "por", "para", "com", "que", "qual", "quais", "quanto", "quantos", "quantas",
+    "me", "mostre", "liste", "listar", "mostrar", "traga", "trazer", "consultar", "sobre", "cada",
+    "total", "soma", "media", "valor", "valores", "registros", "tabela", "ha", "existem", "existe",
+}
+
+# pesos dos sinais (lexical domina; embedding/valores/uso desempatam)
+_W_NAME_IN_QUESTION = 3.0
+_W_TOKEN_EXACT = 1.0
+_W_TOKEN_PREFIX = 0.6
+_W_EMBEDDING = 1.0
+_W_VALUE_HIT = 1.5
+_W_USAGE = 0.5
+
+
+def fold_text(s: str) -> str:
+    """
+    minúsculas + sem acentos (área -> area).
+    """
+    s = unicodedata.normalize("NFKD", (s or "").lower())
+    return "".join(ch for ch in s if not unicodedata.combining(ch))
+
+
+def tokenize(s: str) -> List[str]:
+    return [t for t in re.split(r"[^a-z0-9]+", fold_text(s)) if t]
+
+
+def _question_tokens(question: str) -> List[str]:
+    return [t for t in tokenize(question) if len(t) >= 3 and t not in _STOPWORDS]
+
+
+def _column_tokens(col: Dict) -> Set[str]:
+    name = str(col.get("name") or "")
+    desc = str(col.get("description") or "")
+    return {t for t in tokenize(name) + tokenize(desc) if len(t) >= 2}
+
+
+def _lexical_score(question_norm: str, q_tokens: Sequence[str], col: Dict) -> float:
+    name = fold_text(str(col.get("name") or ""))
+    score = 0.0
+    if name and re.search(rf"(?<![a-z0-9_]){re.escape(name)}(?![a-z0-9_])", question_norm):
+        score += _W_NAME_IN_QUESTION
+
+    c_tokens = _column_tokens(col)
+    for qt in q_tokens:
+        best = 0.0
+        for ct in c_tokens:
+            if qt == ct:
+                best = _W_TOKEN_EXACT
+                break
+            if min(len(qt), len(ct)) >= 4 and (qt.startswith(ct) or ct.startswith(qt)):
+                best = max(best, _W_TOKEN_PREFIX)
+        score += best
+    return score
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    if not na or not nb:
+        return 0.0
+    return dot / (na * nb)
+
+
+def column_embedding_text(col: Dict) -> str:
+    name = str(col.get("name") or "").replace("_", " ")
+    desc = str(col.get("description") or "")
+    return f"{name} {desc}".strip()
+
+
+def count_column_usage(sql_texts: Iterable[str], column_names: Iterable[str]) -> Counter:
+    """
+    Frequência de uso de cada coluna em SQLs anteriores (iracema_sql_log).
+    """
+    names = [n for n in column_names if n]
+    usage: Counter = Counter()
+    for sql in sql_texts:
+        low = (sql or "").lower()
+        for n in names:
+            if re.search(rf"(?<![a-z0-9_]){re.escape(n.lower())}(?![a-z0-9_])", low):
+                usage[n] += 1
+    return usage
+
+
+def parse_pg_array_text(s: Optional[str]) -> List[str]:
+    """
+    '{CE,"Boa Vista",x}' (pg_stats.most_common_vals::text) -> ['CE', 'Boa Vista', 'x']
+    """
+    s = (s or "").strip()
+    if not (s.startswith("{") and s.endswith("}")):
+        return []
+    out: List[str] = []
+    for m in re.finditer(r'"((?:[^"\\]|\\.)*)"|([^,{}]+)', s[1:-1]):
+        v = m.group(1) if m.group(1) is not None else m.group(2)
+        v = v.replace('\\"', '"').strip()
+        if v and v.upper() != "NULL":
+            out.append(v)
+    return out
+
+
+def build_value_index(values_by_column: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    """
+    coluna -> valores frequentes normalizados (sem acento, minúsculo).
+    """
+    return {
+        col: {fold_text(v).strip() for v in values if v and len(v.strip()) >= 2}
+        for col, values in (values_by_column or {}).items()
+    }
+
+
+def _value_hit(question_norm: str, values: Set[str]) -> bool:
+    for v in values:
+        if re.search(rf"(?<![a-z0-9]){re.escape(v)}(?![a-z0-9])", question_norm):
+            return True
+    return False
+
+
+def score_columns(
+    question: str,
+    columns_meta: List[Dict],
+    usage_counts: Optional[Counter] = None,
+    value_index: Optional[Dict[str, Set[str]]] = None,
+    embedding_scores: Optional[Dict[str, float]] = None,
+) -> Dict[str, float]:
+    """
+    Relevância de cada coluna (não-geom) para a pergunta:
+    lexical (nome/descrição) + embedding + valor citado na pergunta + uso histórico.
+    """
+    question_norm = fold_text(question)
+    q_tokens = _question_tokens(question)
+    usage_counts = usage_counts or Counter()
+    value_index = value_index or {}
+    embedding_scores = embedding_scores or {}
+    max_usage = max(usage_counts.values()) if usage_counts else 0
+
+    scores: Dict[str, float] = {}
+    for col in columns_meta or []:
+        name = str(col.get("name") or "").strip()
+        if not name or col.get("is_geometry"):
+            continue
+
+        score = _lexical_score(question_norm, q_tokens, col)
+        score += _W_EMBEDDING * max(0.0, embedding_scores.get(name, 0.0))
+        if name in value_index and _value_hit(question_norm, value_index[name]):
+            score += _W_VALUE_HIT
+        if max_usage:
+            score += _W_USAGE * math.log1p(usage_counts.get(name, 0)) / math.log1p(max_usage)
+        scores[name] = score
+    return scores
+
+
+def embedding_scores_for(
+    question_vector: Sequence[float],
+    column_vectors: Dict[str, Sequence[float]],
+) -> Dict[str, float]:
+    return {name: _cosine(question_vector, vec) for name, vec in column_vectors.items()}
+
+
+def select_columns(
+    columns_meta: List[Dict],
+    scores: Dict[str, float],
+    top_n: int,
+) -> List[Dict]:
+    """
+    Top-N colunas por relevância + colunas-chave + geométricas (para a regra "não usar geom"),
+    mantendo a ordem original da tabela.
+    """
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    keep: Set[str] = {name for name, _ in ranked[: max(1, int(top_n))]}
+
+    for col in columns_meta or []:
+        name = str(col.get("name") or "").strip()
+        if not name:
+            continue
+        if col.get("is_geometry") or name.lower() in _KEY_COLUMNS:
+            keep.add(name)
+
+    return [c for c in columns_meta or [] if str(c.get("name") or "").strip() in keep]
@@ -0,0 +1,81 @@
+# Application/helpers/iracema_single_flight_helper.py
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _InFlightCall:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas idênticas em andamento (padrão "single-flight").
+
+    - A primeira chamada para uma chave vira "líder" e executa a função.
+    - Chamadas concorrentes com a mesma chave aguardam o resultado do líder
+      (ou recebem a mesma exceção).
+    - Assim que o líder termina, a chave é liberada: não é um cache,
+      chamadas posteriores executam de novo.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Executa fn() uma única vez por chave em andamento.
+        Retorna (resultado, is_leader).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                is_leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                is_leader = True
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            call.result = fn()
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result, True
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def build_ask_coalescing_key(
+    table_identifier: str,
+    question_norm: str,
+    mode: str,
+    top_k: int,
+    explain: bool,
+    deadline_ms: Optional[int] = None,
+) -> Tuple[str, str, str, int, bool, Optional[int]]:
+    """
+    Chave de coalescência do /ask: (tabela, pergunta normalizada, modo, top_k, explain, prazo).
+    O prazo efetivo entra na chave: com prazo curto o líder pode degradar (template de
+    reserva, explicação pulada), e quem não pediu prazo não deve herdar isso.
+    """
+    return (table_identifier, question_norm, mode, int(top_k), bool(explain), int(deadline_ms) if deadline_ms else None)
@@ -0,0 +1,52 @@
+# Application/helpers/iracema_stage_timer_helper.py
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class StageTimer:
+    """
+    Cronômetro por etapa do pipeline (em ms).
+
+    Uso:
+        timer = StageTimer()
+        with timer.stage("execute"):
+            ...
+        timer.timings  # {"execute": 12.3}
+
+    Etapas repetidas são somadas.
+    """
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self._timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000.0)
+
+    def add(self, name: str, ms: float) -> None:
+        self._timings[name] = self._timings.get(name, 0.0) + float(ms)
+
+    def merge(self, timings: Dict[str, float]) -> None:
+        for name, ms in (timings or {}).items():
+            self.add(name, ms)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000.0
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        return {k: round(v, 3) for k, v in self._timings.items()}
+
+    def finish(self) -> Dict[str, float]:
+        """
+        Fecha o cronômetro: registra 'total' (desde a criação) e retorna as etapas.
+        """
+        self._timings["total"] = self.elapsed_ms()
+        return self.timings
@@ -1,6 +1,201 @@
 import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from Application.helpers.iracema_schema_linking_helper import fold_text
+
+# Versão da chave canônica (question_norm no RAG / coalescência).
+# Mudou a canonicalização => incrementar; a recompactação re-chaveia o legado.
+QUESTION_KEY_VERSION = 2
+QUESTION_KEY_PREFIX = f"v{QUESTION_KEY_VERSION}|"
+
+_MONTHS = {
+    "janeiro": 1, "jan": 1, "fevereiro": 2, "fev": 2, "marco": 3, "mar": 3, "abril": 4, "abr": 4,
+    "maio": 5, "mai": 5, "junho": 6, "jun": 6, "julho": 7, "jul": 7, "agosto": 8, "ago": 8,
+    "setembro": 9, "set": 9, "outubro": 10, "out": 10, "novembro": 11, "nov": 11, "dezembro": 12, "dez": 12,
+}
+
+# "15 de março de 2024", "março de 2024", "mar/2024" -> forma numérica (dd/mm/aaaa, mm/aaaa)
+_MONTH_DATE = re.compile(
+    r"\b(?:(\d{1,2})\s+de\s+)?(" + "|".join(sorted(_MONTHS, key=len, reverse=True)) + r")(?:\s+de\s+|\s*/\s*)(\d{4})\b"
+)
+
+_TOKEN = re.compile(
+    r"(?P<dmy>\b\d{1,2}[/.-]\d{1,2}[/.-]\d{4}\b)"
+    r"|(?P<ymd>\b\d{4}-\d{1,2}-\d{1,2}\b)"
+    r"|(?P<my>\b\d{1,2}/\d{4}\b)"
+    r"|(?P<num>\d{1,3}(?:\.\d{3})+(?:,\d+)?(?![\d.])|\d+[.,]\d+|\d+)"
+    r"|(?P<pct>%)"
+    r"|(?P<word>[^\W\d]\w*)"
+)
+
+# contrações -> preposição ("das escolas" = "de escolas")
+_CONTRACTIONS = {
+    "da": "de", "do": "de", "das": "de", "dos": "de",
+    "na": "em", "no": "em", "nas": "em", "nos": "em",
+    "pela": "por", "pelo": "por", "pelas": "por", "pelos": "por",
+    "numa": "em", "num": "em",
+}
+
+# artigos, cortesia e verbos de existência: não mudam a pergunta
+_DROP = {
+    "a", "o", "as", "os", "ao", "aos", "um", "uma", "uns", "umas",
+    "ola", "oi", "obrigado", "obrigada", "favor", "gentileza", "voce", "vc", "eu",
+    "pode", "poderia", "podes", "gostaria", "queria", "quero", "saber", "me", "diga", "dizer",
+    "informe", "informar", "fale", "tem", "ha", "existe", "existem", "existentes", "sao",
+}
+
+# cortesia com "por" (que sozinho tem sentido: "por município"): sai antes de _DROP
+_POLITE = {("por", "favor"): (), ("por", "gentileza"): ()}
+
+# expressões (sem artigos, contrações resolvidas) -> forma canônica
+_PHRASES: Dict[Tuple[str, ...], Tuple[str, ...]] = {
+    ("qual", "numero", "de"): ("quantos",),
+    ("qual", "quantidade", "de"): ("quantos",),
+    ("quantidade", "de"): ("quantos",),
+    ("numero", "de"): ("quantos",),
+    ("quantas",): ("quantos",),
+    ("conte",): ("quantos",),
+    ("contar",): ("quantos",),
+    ("mostre",): ("listar",),
+    ("mostrar",): ("listar",),
+    ("mostra",): ("listar",),
+    ("liste",): ("listar",),
+    ("lista",): ("listar",),
+    ("exiba",): ("listar",),
+    ("exibir",): ("listar",),
+    ("traga",): ("listar",),
+    ("trazer",): ("listar",),
+    ("apresente",): ("listar",),
+    ("retorne",): ("listar",),
+    ("some",): ("soma",),
+    ("somar",): ("soma",),
+    ("somatorio",): ("soma",),
+}
+
 
 def normalize_question(q: str) -> str:
+    # chave v1 (legado: só minúsculas/espaços); use question_cache_key
     s = (q or "").strip().lower()
     s = re.sub(r"\s+", " ", s)
-    return s
\ No newline at end of file
+    return s
+
+
+def _format_number(raw: str) -> str:
+    # pt-BR: 1.234,5 -> 1234.5 | 2,5 -> 2.5 | 10,00 -> 10 (zeros à esquerda ficam: códigos)
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+(?:,\d+)?", raw):
+        raw = raw.replace(".", "")
+    raw = raw.replace(",", ".")
+    if "." in raw:
+        raw = raw.rstrip("0").rstrip(".")
+    return raw
+
+
+def _format_date(year: str, month: str, day: Optional[str] = None) -> Optional[str]:
+    y, m = int(year), int(month)
+    if not 1 <= m <= 12:
+        return None
+    if day is None:
+        return f"{y:04d}-{m:02d}"
+    d = int(day)
+    if not 1 <= d <= 31:
+        return None
+    return f"{y:04d}-{m:02d}-{d:02d}"
+
+
+def _month_date(m: re.Match) -> str:
+    day, month, year = m.group(1), _MONTHS[m.group(2)], m.group(3)
+    return f"{day}/{month}/{year}" if day else f"{month}/{year}"
+
+
+def _tokens(folded: str) -> List[str]:
+    out: List[str] = []
+    for m in _TOKEN.finditer(_MONTH_DATE.sub(_month_date, folded)):
+        kind, raw = m.lastgroup, m.group(0)
+        if kind == "dmy":
+            d, mo, y = re.split(r"[/.-]", raw)
+            out.append(_format_date(y, mo, d) or raw)
+        elif kind == "ymd":
+            y, mo, d = raw.split("-")
+            out.append(_format_date(y, mo, d) or raw)
+        elif kind == "my":
+            mo, y = raw.split("/")
+            out.append(_format_date(y, mo) or raw)
+        elif kind == "num":
+            out.append(_format_number(raw))
+        elif kind == "pct":
+            out.append("pct")
+        else:
+            out.append(_CONTRACTIONS.get(raw, raw))
+    return out
+
+
+def _replace_phrases(tokens: List[str], table: Dict[Tuple[str, ...], Tuple[str, ...]]) -> List[str]:
+    if not table:
+        return tokens
+    longest = max(len(p) for p in table)
+    out: List[str] = []
+    i = 0
+    while i < len(tokens):
+        for n in range(min(longest, len(tokens) - i), 0, -1):
+            repl = table.get(tuple(tokens[i : i + n]))
+            if repl is not None:
+                out.extend(repl)
+                i += n
+                break
+        else:
+            out.append(tokens[i])
+            i += 1
+    return out
+
+
+def _base_tokens(text: str) -> List[str]:
+    tokens = _replace_phrases(_tokens(fold_text(text)), _POLITE)
+    tokens = [t for t in tokens if t not in _DROP]
+    return _replace_phrases(tokens, _PHRASES)
+
+
+def column_synonyms(columns_meta: Optional[Sequence[Dict]]) -> Dict[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Expressões que nomeiam uma coluna -> (nome da coluna,).
+
+    Fontes: o próprio nome separado ("area km2"), description/label e listas
+    opcionais synonyms/aliases de colunas_tabela. Expressão que aponta para
+    mais de uma coluna é ambígua e fica de fora.
+    """
+    found: Dict[Tuple[str, ...], set] = {}
+    for col in columns_meta or []:
+        name = str(col.get("name") or "").strip()
+        if not name or col.get("is_geometry"):
+            continue
+        phrases = [name.replace("_", " "), col.get("description"), col.get("label")]
+        for key in ("synonyms", "aliases"):
+            extra = col.get(key)
+            if isinstance(extra, str):
+                extra = [extra]
+            phrases.extend(extra or [])
+        for phrase in phrases:
+            tokens = tuple(_base_tokens(str(phrase or "")))
+            if tokens:
+                found.setdefault(tokens, set()).add(fold_text(name))
+    return {phrase: (next(iter(names)),) for phrase, names in found.items() if len(names) == 1}
+
+
+def canonical_question(q: str, columns_meta: Optional[Sequence[Dict]] = None) -> str:
+    """
+    Forma canônica da pergunta para chave de cache:
+    - minúsculas, sem acento, sem pontuação (Unicode NFKD)
+    - sem artigos/cortesia ("por favor", "me diga", "você pode")
+    - contrações (das/nos/pelo) -> preposição; verbos sinônimos -> um só (mostre/liste -> listar)
+    - números pt-BR (1.000,50 -> 1000.5) e datas (15/03/2024, março de 2024 -> 2024-03-15, 2024-03)
+    - expressões que nomeiam coluna da datasource -> nome da coluna
+    """
+    tokens = _base_tokens(q)
+    tokens = _replace_phrases(tokens, column_synonyms(columns_meta))
+    return " ".join(tokens)
+
+
+def question_cache_key(q: str, columns_meta: Optional[Sequence[Dict]] = None) -> str:
+    """
+    Chave versionada (indexação, busca exata e coalescência usam a mesma).
+    """
+    return QUESTION_KEY_PREFIX + canonical_question(q, columns_meta)
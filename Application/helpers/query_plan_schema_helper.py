@@ -0,0 +1,80 @@
+# Application/helpers/query_plan_schema_helper.py
+from typing import Any, Dict, List, Optional
+
+from Application.dto.iracema_query_plan_dto import QueryFilterDto
+
+_NUMERIC_TYPES = ("numeric", "double", "real", "float", "int", "bigint", "smallint", "decimal")
+
+_ALL_INTENTS = ["schema", "count", "distinct", "sum", "grouped_sum", "detail"]
+
+
+def _nullable(schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"anyOf": [schema, {"type": "null"}]}
+
+
+def _split_columns(columns_meta: list[dict]) -> tuple[List[str], List[str]]:
+    """
+    (colunas não-geom, colunas numéricas) na ordem da tabela.
+    """
+    cols: List[str] = []
+    numeric: List[str] = []
+    for c in columns_meta or []:
+        name = str(c.get("name") or "").strip()
+        if not name or c.get("is_geometry"):
+            continue
+        cols.append(name)
+        ctype = str(c.get("type") or "").lower()
+        if any(t in ctype for t in _NUMERIC_TYPES):
+            numeric.append(name)
+    return cols, numeric
+
+
+def build_query_plan_json_schema(columns_meta: list[dict], max_filters: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    JSON Schema do QueryPlanArgsDto restrito à datasource (saída estruturada do Ollama):
+    - intent: só as intenções viáveis (sem coluna numérica não há sum/grouped_sum)
+    - colunas: enum com as colunas não-geom reais (value_column só numéricas)
+
+    Retorna None quando não há colunas utilizáveis (o chamador segue sem 'format').
+    """
+    cols, numeric = _split_columns(columns_meta)
+    if not cols:
+        return None
+
+    intents = [i for i in _ALL_INTENTS if numeric or i not in ("sum", "grouped_sum")]
+    column = {"type": "string", "enum": cols}
+    column_list = {"type": "array", "items": column}
+    scalar = {"anyOf": [{"type": "string"}, {"type": "number"}, {"type": "boolean"}]}
+    operators = list(QueryFilterDto.model_fields["operator"].annotation.__args__)
+
+    properties: Dict[str, Any] = {
+        "intent": {"type": "string", "enum": intents},
+        "select_columns": _nullable(column_list),
+        "target_column": _nullable(column),
+        "value_column": _nullable({"type": "string", "enum": numeric}) if numeric else {"type": "null"},
+        "group_by": _nullable(column_list),
+        "filters": {
+            "type": "array",
+            "maxItems": int(max_filters),
+            "items": {
+                "type": "object",
+                "properties": {
+                    "column": column,
+                    "operator": {"type": "string", "enum": operators},
+                    "value": {"anyOf": [scalar, {"type": "array", "items": scalar}]},
+                },
+                "required": ["column", "operator", "value"],
+                "additionalProperties": False,
+            },
+        },
+        "order_by": _nullable(column),
+        "order_dir": {"type": "string", "enum": ["asc", "desc"]},
+        "limit": _nullable({"type": "integer", "minimum": 1}),
+    }
+
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": ["intent"],
+        "additionalProperties": False,
+    }
@@ -0,0 +1,15 @@
+# Application/helpers/sql_explain_validator_helper.py
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+def validate_sql_with_explain(engine: Engine, sql: str) -> None:
+    """
+    EXPLAIN (só planeja, não executa): ValueError se o Postgres rejeitar o SQL.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text(f"EXPLAIN {sql.rstrip().rstrip(';')}"))
+    except Exception as ex:
+        raise ValueError(f"SQL inválido: {ex}") from ex
@@ -22,6 +22,21 @@ _DETAIL_INTENT = re.compile(
     re.IGNORECASE,
 )
 
+# pistas de filtro/recorte (WHERE de usuário): condições, comparações, números, literais
+_FILTER_HINT = re.compile(
+    r"\b(onde|cujo|cuja|cujos|cujas|com|sem|maior|menor|acima|abaixo|entre|igual|diferente|"
+    r"exceto|apenas|somente|desde|ap[oó]s|antes|depois|superior|inferior|m[ií]nimo|m[aá]ximo)\b"
+    r"|\d|['\"]",
+    re.IGNORECASE,
+)
+
+# pedidos além de contagem/soma/listagem: média, ranking, proporções, séries temporais
+_ADVANCED_INTENT = re.compile(
+    r"\b(m[eé]dia|mediana|percentu\w*|porcentage\w*|propor[cç]\w*|ranking|top|ordenad[oa]s?|ordem|"
+    r"compar\w*|evolu[cç]\w*|varia[cç]\w*|crescimento|tend[eê]ncia|mensal|anual|por\s+ano|por\s+m[eê]s)\b",
+    re.IGNORECASE,
+)
+
 _AREA_HINT = re.compile(r"\b([aá]rea)\b", re.IGNORECASE)
 _PERIM_HINT = re.compile(r"\b(per[ií]metro)\b", re.IGNORECASE)
 
@@ -37,6 +52,12 @@ def is_count_question(question: str) -> bool:
 def is_sum_question(question: str) -> bool:
     return bool(_SUM_INTENT.search(question or ""))
 
+def has_filter_hint(question: str) -> bool:
+    return bool(_FILTER_HINT.search(question or ""))
+
+def has_advanced_intent(question: str) -> bool:
+    return bool(_ADVANCED_INTENT.search(question or ""))
+
 def has_area_hint(question: str) -> bool:
     return bool(_AREA_HINT.search(question or ""))
 
@@ -0,0 +1,57 @@
+# Application/helpers/sql_stream_stop_helper.py
+
+import re
+from typing import Optional, Tuple
+
+# SELECT/WITH no início de uma linha (evita "Segue o SELECT pedido:" em prosa)
+_STATEMENT_START = re.compile(r"(?im)^[ \t]*(select|with)\b")
+_FENCE = "```"
+_BLANK_LINE = re.compile(r"\n[ \t]*\n")
+
+
+def find_sql_end(text: str) -> Optional[Tuple[int, str]]:
+    """
+    Detecta o fim do primeiro statement completo numa saída parcial (streaming) do LLM.
+
+    Retorna (posição de corte, motivo) ou None se ainda não terminou. Motivos:
+    - 'semicolon'   -> ';' fora de literais/identificadores
+    - 'fence'       -> fechamento do bloco ``` depois do SQL
+    - 'blank_line'  -> linha em branco depois do SQL (início de explicação)
+    """
+    if not text:
+        return None
+
+    m = _STATEMENT_START.search(text)
+    if m is None:
+        return None
+
+    opened_fence = _FENCE in text[: m.start()]
+    in_single = False
+    in_double = False
+    i = m.start()
+    n = len(text)
+
+    while i < n:
+        ch = text[i]
+        if in_single:
+            if ch == "'":
+                in_single = False
+        elif in_double:
+            if ch == '"':
+                in_double = False
+        elif ch == "'":
+            in_single = True
+        elif ch == '"':
+            in_double = True
+        elif ch == ";":
+            return i + 1, "semicolon"
+        elif text.startswith(_FENCE, i):
+            # mantém a cerca fechando o bloco, para o extract_sql reconhecer o par
+            return (i + len(_FENCE) if opened_fence else i), "fence"
+        elif ch == "\n":
+            b = _BLANK_LINE.match(text, i)
+            if b is not None:
+                return i, "blank_line"
+        i += 1
+
+    return None
@@ -9,6 +9,7 @@ from Application.helpers.sql_intent_detector_helper import (
     is_count_question,
     is_sum_question,
     wants_groupby,
+    has_filter_hint,
 )
 from Application.helpers.sql_column_detector_helper import (
     detect_target_column,
@@ -67,3 +68,29 @@ def plan_sql_template(
         return SqlPlan(sql=sql, used_template=True, reason="count_template")
 
     return None
+
+
+# confiança de template que ignora filtro/agrupamento pedido na pergunta
+TEMPLATE_CONFIDENCE_HINTED = 0.5
+
+
+def template_confidence(question: str, plan: Optional[SqlPlan]) -> float:
+    """
+    Confiança (0..1) de que o template responde a pergunta inteira.
+
+    Cai para a faixa "limítrofe" quando a pergunta traz recortes que o template
+    ignora (filtros, números, comparações) ou pede agrupamento que ele não aplica.
+    """
+    if plan is None:
+        return 0.0
+
+    kind = plan.reason.split(":", 1)[0]
+    if kind == "schema_columns_template":
+        return 0.95
+
+    confidence = 0.9
+    if has_filter_hint(question):
+        confidence = TEMPLATE_CONFIDENCE_HINTED
+    if kind in ("count_template", "sum_template", "distinct_template") and wants_groupby(question):
+        confidence = min(confidence, TEMPLATE_CONFIDENCE_HINTED)
+    return confidence
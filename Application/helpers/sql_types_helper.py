@@ -1,9 +1,13 @@
 # Application/helpers/sql/sql_types.py
 
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class SqlPlan:
     sql: str
     used_template: bool
     reason: str
+    # plano estruturado de origem (query_plan | fca, JSON) - memória RAG
+    plan_kind: Optional[str] = None
+    plan_json: Optional[str] = None
@@ -1,6 +1,12 @@
 from abc import ABC, abstractmethod
 
-from Application.dto.iracema_ask_dto import IracemaAskRequestDto, IracemaAskResponseDto, IracemaAskWithFcaRequestDto
+from Application.dto.iracema_ask_dto import (
+    IracemaAskRequestDto,
+    IracemaAskResponseDto,
+    IracemaAskWithFcaRequestDto,
+    IracemaAskBatchRequestDto,
+    IracemaAskBatchResponseDto,
+)
 
 class IIracemaAskByFCService(ABC):
     """
@@ -15,4 +21,12 @@ class IIracemaAskByFCService(ABC):
 
     @abstractmethod
     def ask_fc_with_args(self, request: IracemaAskWithFcaRequestDto) -> IracemaAskResponseDto:
-        raise NotImplementedError()
\ No newline at end of file
+        raise NotImplementedError()
+
+    @abstractmethod
+    def ask_fc_batch(self, request: IracemaAskBatchRequestDto) -> IracemaAskBatchResponseDto:
+        """
+        Executa N perguntas/FCAs contra uma datasource:
+        lookup/validação uma vez por lote, consultas independentes em paralelo.
+        """
+        raise NotImplementedError()
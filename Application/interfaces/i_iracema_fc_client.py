@@ -9,8 +9,16 @@ class IIracemaFCClient(ABC):
         question: str,
         columns_meta: list[dict],
         top_k: int,
+        route: str = "large",
     ) -> QueryPlanArgsDto:
         """
         Retorna QueryPlanArgsDto (validado).
+        route: 'small' (modelo rápido) ou 'large' (modelo principal).
         """
         raise NotImplementedError()
+
+    def supports_route(self, route: str) -> bool:
+        """
+        route 'small' só vale quando há modelo pequeno configurado.
+        """
+        return route == "large"
@@ -9,9 +9,16 @@ class IIracemaLLMClient(ABC):
         question: str,
         top_k: int,
         table_identifier: Optional[str] = None,
+        route: str = "large",
     ) -> str:
         raise NotImplementedError()
 
+    def supports_route(self, route: str) -> bool:
+        """
+        route 'small' só vale quando há modelo pequeno configurado.
+        """
+        return route == "large"
+
     @abstractmethod
     def explain_result(
         self,
@@ -20,5 +27,6 @@ class IIracemaLLMClient(ABC):
         sql_executed: str,
         rows: list,
         rowcount: int,
+        summary: Optional[str] = None,
     ) -> str:
         raise NotImplementedError()
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence
+
+from Application.dto.iracema_llm_usage_dto import IracemaLLMUsageStatsResponseDto
+
+
+class IIracemaLLMUsageService(ABC):
+    @abstractmethod
+    def stats(
+        self,
+        since_hours: Optional[float] = 24.0,
+        group_by: Sequence[str] = ("model", "datasource", "mode"),
+        include_cache_hits: bool = False,
+    ) -> IracemaLLMUsageStatsResponseDto:
+        """
+        p50/p95 de latência e tokens das chamadas ao LLM (iracema_llm_call_log).
+        """
+        raise NotImplementedError
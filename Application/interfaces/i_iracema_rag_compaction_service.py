@@ -0,0 +1,18 @@
+# Application/interfaces/i_iracema_rag_compaction_service.py
+
+from abc import ABC, abstractmethod
+
+from Application.dto.iracema_rag_compaction_dto import IracemaRagCompactionReportDto, IracemaRagRekeyReportDto
+
+
+class IIracemaRagCompactionService(ABC):
+    @abstractmethod
+    def compact(self, dry_run: bool = False) -> IracemaRagCompactionReportDto:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def rekey(self, dry_run: bool = False) -> IracemaRagRekeyReportDto:
+        """
+        Recalcula question_norm (chave canônica atual) dos exemplos indexados.
+        """
+        raise NotImplementedError()
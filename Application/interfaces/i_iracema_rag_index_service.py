@@ -15,5 +15,9 @@ class IIracemaRagIndexService(ABC):
         duration_ms: float,
         conversation_id: Optional[int] = None,
         message_id: Optional[int] = None,
+        schema_fingerprint: Optional[str] = None,
+        question_key: Optional[str] = None,
+        plan_kind: Optional[str] = None,
+        plan_json: Optional[str] = None,
     ) -> None:
         raise NotImplementedError()
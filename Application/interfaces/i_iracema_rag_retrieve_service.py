@@ -3,6 +3,8 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
 from Application.dto.iracema_sql_example_dto import IracemaSqlExampleDto
+from Application.dto.iracema_near_duplicate_dto import IracemaNearDuplicateHitDto
+from Application.dto.iracema_rag_exact_hit_dto import IracemaRagExactHitDto
 
 class IIracemaRagRetrieveService(ABC):
     @abstractmethod
@@ -13,11 +15,54 @@ class IIracemaRagRetrieveService(ABC):
         k: int = 4,
     ) -> List[IracemaSqlExampleDto]:
         raise NotImplementedError()
+
+    @abstractmethod
+    def get_diverse_sql_examples(
+        self,
+        table_identifier: str,
+        question: str,
+        fetch_k: int = 16,
+        lambda_mult: float = 0.5,
+    ) -> List[IracemaSqlExampleDto]:
+        """
+        Candidatos sem SQL repetido (mesma forma), ordenados por MMR.
+        """
+        raise NotImplementedError()
     
+    @abstractmethod
+    def try_get_exact_hit(
+        self,
+        table_identifier: str,
+        question: str,
+        columns_meta: Optional[List[dict]] = None,
+    ) -> Optional[IracemaRagExactHitDto]:
+        """
+        Pergunta com a mesma chave canônica: SQL + plano estruturado (se indexado).
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def try_get_exact_sql(
         self,
         table_identifier: str,
         question: str,
+        columns_meta: Optional[List[dict]] = None,
     ) -> Optional[str]:
-        raise NotImplementedError()
\ No newline at end of file
+        """
+        SQL de uma pergunta já respondida com a mesma chave canônica (question_cache_key).
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def try_get_near_duplicate_sql(
+        self,
+        table_identifier: str,
+        question: str,
+        columns_meta: List[dict],
+        min_similarity: float = 0.5,
+        candidates: int = 3,
+    ) -> Optional[IracemaNearDuplicateHitDto]:
+        """
+        SQL de uma pergunta quase igual com o slot (valor/coluna) substituído.
+        """
+        raise NotImplementedError()
@@ -0,0 +1,21 @@
+# Application/interfaces/i_iracema_schema_linking_service.py
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from Application.dto.iracema_schema_prompt_dto import IracemaSchemaPromptDto
+from Domain.datasource_model import DataSource
+
+
+class IIracemaSchemaLinkingService(ABC):
+    @abstractmethod
+    def build_prompts(
+        self,
+        ds: DataSource,
+        question: str,
+    ) -> Optional[IracemaSchemaPromptDto]:
+        """
+        Prompts (SQL e FC) só com as colunas relevantes para a pergunta.
+        None quando a tabela é estreita o bastante para usar os prompts armazenados.
+        """
+        raise NotImplementedError()
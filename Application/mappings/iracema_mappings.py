@@ -5,11 +5,17 @@ from typing import Dict, Any, List, Optional
 from Domain.iracema_conversation_model import IracemaConversation
 from Domain.iracema_message_model import IracemaMessage
 from Domain.iracema_sql_log_model import IracemaSQLLog
+from Domain.iracema_llm_call_log_model import IracemaLLMCallLog
+from External.ai.iracema_llm_call_recorder import LLMCallRecord
 
 from Application.dto.iracema_conversation_dto import IracemaConversationDto
 from Application.dto.iracema_message_dto import IracemaMessageDto
 from Application.dto.iracema_sql_log_dto import IracemaSQLLogDto
-from Application.dto.iracema_ask_dto import IracemaAskResponseDto
+from Application.dto.iracema_ask_dto import (
+    IracemaAskResponseDto,
+    IracemaAskBatchResponseDto,
+    IracemaAskBatchItemResultDto,
+)
 
 from Domain.datasource_model import DataSource
 from Application.dto.iracema_start_dto import (
@@ -111,6 +117,7 @@ def build_ask_response_dto(
     rowcount: int,
     result_preview: List[Dict[str, Any]],
     error: str | None = None,
+    timings: Dict[str, float] | None = None,
 ) -> IracemaAskResponseDto:
     """
     Helper para montar o DTO final de resposta do /ask
@@ -126,4 +133,53 @@ def build_ask_response_dto(
         rowcount=rowcount,
         result_preview=result_preview,
         error=error,
+        timings=timings,
+    )
+
+
+def build_ask_batch_response_dto(
+    conversation: IracemaConversation,
+    user_message: IracemaMessage,
+    assistant_message: IracemaMessage,
+    items: List[IracemaAskBatchItemResultDto],
+    error: str | None = None,
+) -> IracemaAskBatchResponseDto:
+    """
+    Helper para montar o DTO final de resposta do /ask/fc/batch.
+    """
+    return IracemaAskBatchResponseDto(
+        conversation_id=conversation.id,
+        user_message_id=user_message.id,
+        assistant_message_id=assistant_message.id,
+        items=items,
+        error=error,
     )
+
+
+def build_llm_call_log_models(
+    sql_log_id,
+    calls: List[LLMCallRecord],
+    datasource: Optional[str],
+    mode: Optional[str],
+) -> List[IracemaLLMCallLog]:
+    """
+    Chamadas registradas na requisição -> linhas filhas do iracema_sql_log.
+    """
+    return [
+        IracemaLLMCallLog(
+            sql_log_id=sql_log_id,
+            model=call.model,
+            kind=call.kind,
+            datasource=datasource,
+            mode=mode,
+            cache_hit=call.cache_hit,
+            prompt_tokens=call.prompt_tokens,
+            eval_tokens=call.eval_tokens,
+            load_ms=call.load_ms,
+            prompt_eval_ms=call.prompt_eval_ms,
+            eval_ms=call.eval_ms,
+            total_ms=call.total_ms,
+            wall_ms=call.wall_ms,
+        )
+        for call in calls
+    ]
@@ -1,5 +1,10 @@
+import hashlib
+import json
+import random
 import time
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy import text
 
@@ -7,19 +12,34 @@ from Data.db_context import DbContext
 from Domain.interfaces.i_iracema_conversation_repository import IIracemaConversationRepository
 from Domain.interfaces.i_iracema_message_repository import IIracemaMessageRepository
 from Domain.interfaces.i_iracema_sql_log_repository import IIracemaSQLLogRepository
+from Domain.interfaces.i_iracema_llm_call_log_repository import IIracemaLLMCallLogRepository
 from Domain.interfaces.i_iracema_datasource_repository import IIracemaDataSourceRepository
 
 from Domain.iracema_enums import MessageRoleEnum, LLMProviderEnum, LLMModelEnum, QueryStatusEnum
 
-from Application.dto.iracema_ask_dto import IracemaAskRequestDto, IracemaAskResponseDto, IracemaAskWithFcaRequestDto
+from Application.dto.iracema_ask_dto import (
+    IracemaAskRequestDto,
+    IracemaAskResponseDto,
+    IracemaAskWithFcaRequestDto,
+    IracemaAskBatchRequestDto,
+    IracemaAskBatchResponseDto,
+    IracemaAskBatchItemResultDto,
+)
+from Application.dto.iracema_ask_outcome_dto import IracemaAskOutcomeDto
 from Application.interfaces.i_iracema_llm_client import IIracemaLLMClient
 from Application.interfaces.i_iracema_rag_index_service import IIracemaRagIndexService
 from Application.interfaces.i_iracema_rag_retrieve_service import IIracemaRagRetrieveService
 from Application.interfaces.i_iracema_fc_client import IIracemaFCClient
+from Application.interfaces.i_iracema_schema_linking_service import IIracemaSchemaLinkingService
 
-from Application.mappings.iracema_mappings import build_ask_response_dto
+from Application.mappings.iracema_mappings import (
+    build_ask_response_dto,
+    build_ask_batch_response_dto,
+    build_llm_call_log_models,
+)
 from Application.helpers.iracema_table_name_helper import build_table_fqn
 from Application.helpers.sql_types_helper import SqlPlan
+from Application.helpers.sql_template_planner_helper import plan_sql_template
 
 from Application.helpers.query_plan_validator_helper import validate_and_normalize_plan
 from Application.helpers.query_plan_sql_compiler_helper import compile_query_plan_to_sql
@@ -28,7 +48,79 @@ from Application.interfaces.i_iracema_ask_by_fc_service import IIracemaAskByFCSe
 
 from Application.dto.iracema_fca_dto import FCAArgsDto
 from Application.helpers.fca_validator_helper import validate_and_normalize_fca
-from Application.helpers.fca_sql_compiler_helper import compile_fca_to_sql
+from Application.helpers.fca_sql_compiler_helper import (
+    compile_fca_to_sql,
+    compile_fca_scalar_batch_to_sql,
+    is_scalar_aggregate_fca,
+    split_scalar_batch_row,
+)
+from Application.helpers.iracema_single_flight_helper import SingleFlight, build_ask_coalescing_key
+from Application.helpers.iracema_text_normalize_helper import question_cache_key
+from Application.helpers.iracema_stage_timer_helper import StageTimer
+from Application.helpers.iracema_schema_fingerprint_helper import schema_fingerprint
+from Application.helpers.sql_llm_sanitizer_helper import sanitize_llm_sql
+from Application.helpers.sql_explain_validator_helper import validate_sql_with_explain
+from Application.helpers.iracema_plan_cache_helper import RAG_PLAN_HIT_PREFIX, attach_plan, compile_cached_plan
+from Application.dto.iracema_rag_exact_hit_dto import IracemaRagExactHitDto
+from Application.helpers.iracema_question_difficulty_helper import (
+    ROUTE_SMALL,
+    classify_question_difficulty,
+    routes_for,
+)
+from Application.helpers.iracema_explanation_template_helper import (
+    render_degraded_explanation,
+    render_template_explanation,
+)
+from Application.helpers.iracema_result_summary_helper import (
+    build_result_stats_sql,
+    is_result_truncated,
+    merge_result_stats,
+    render_summary_text,
+    summarize_rows,
+)
+from Application.helpers.iracema_rag_entry_helper import is_indexable
+from External.ai.iracema_llm_scheduler import LLMOverloadedError
+from External.ai.iracema_ollama_endpoint_pool import llm_routing
+from External.ai.iracema_llm_call_recorder import LLMCallRecord, llm_call_recording
+from External.metrics.iracema_prometheus_metrics import (
+    observe_ask_timings,
+    observe_explanation,
+    observe_llm_degraded,
+    observe_llm_route,
+    observe_rag_exact_hit,
+    observe_rag_near_hit,
+    observe_rag_near_hit_audit,
+)
+
+# respostas vindas da memória RAG: não são reindexadas
+# (hit do cache de planos leva o reason compilado: 'rag_plan_hit|fc:count')
+_RAG_HIT_REASONS = ("rag_exact_hit", "rag_plan_hit", "rag_near_hit")
+
+
+def _is_rag_hit(reason: str) -> bool:
+    return (reason or "").split("|", 1)[0] in _RAG_HIT_REASONS
+
+
+@dataclass
+class _BatchJob:
+    """
+    Uma consulta do lote. alias_maps != None indica SELECT combinado (agregações escalares):
+    plan é o SQL combinado (execução/log); item_plans, o plano de cada item (explicação).
+    """
+    indices: List[int]
+    plan: SqlPlan
+    alias_maps: Optional[List[Dict[str, str]]] = None
+    item_plans: Optional[List[SqlPlan]] = None
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+    llm_calls: List[LLMCallRecord] = field(default_factory=list)
+
+
+def _rows_digest(rows: List[Dict[str, Any]]) -> str:
+    # independe da ordem das linhas (SQL sem ORDER BY pode devolver em outra ordem)
+    lines = sorted(json.dumps(r, sort_keys=True, default=str, ensure_ascii=False) for r in rows)
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
 
 
 def _build_rows_summary(rows: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
@@ -60,6 +152,17 @@ class IracemaAskByFCService(IIracemaAskByFCService):
         llm_client: IIracemaLLMClient,  # para explainer
         llm_provider: LLMProviderEnum = LLMProviderEnum.OLLAMA,
         llm_model: LLMModelEnum = LLMModelEnum.PHI_3,
+        single_flight: Optional[SingleFlight] = None,
+        batch_max_workers: int = 4,
+        explain_summary_max_tokens: int = 256,
+        schema_linking_service: Optional[IIracemaSchemaLinkingService] = None,
+        difficulty_routing: bool = True,
+        routing_easy_max_score: int = 1,
+        llm_call_log_repo: Optional[IIracemaLLMCallLogRepository] = None,
+        near_duplicate_enabled: bool = True,
+        near_duplicate_min_similarity: float = 0.5,
+        near_duplicate_audit_rate: float = 0.05,
+        plan_cache_enabled: bool = True,
     ):
         self._db_context = db_context
         self._conversation_repo = conversation_repo
@@ -72,7 +175,23 @@ class IracemaAskByFCService(IIracemaAskByFCService):
         self._llm_client = llm_client
         self._llm_provider = llm_provider
         self._llm_model = llm_model
-        
+        self._single_flight = single_flight or SingleFlight()
+        self._batch_max_workers = batch_max_workers
+        self._explain_summary_max_tokens = explain_summary_max_tokens
+        self._schema_linking_service = schema_linking_service
+        self._difficulty_routing = difficulty_routing
+        self._routing_easy_max_score = routing_easy_max_score
+        self._llm_call_log_repo = llm_call_log_repo
+
+        # cache de quase-duplicatas (slot de valor/coluna substituído) + auditoria por amostragem
+        self._near_duplicate_enabled = near_duplicate_enabled
+        self._near_duplicate_min_similarity = near_duplicate_min_similarity
+        self._near_duplicate_audit_rate = max(0.0, min(1.0, float(near_duplicate_audit_rate)))
+        self._audit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="iracema-near-audit")
+
+        # acerto exato reaproveita o plano (QueryPlan/FCA) recompilado no schema atual
+        self._plan_cache_enabled = plan_cache_enabled
+
     def ask_fc_with_args(self, request: IracemaAskWithFcaRequestDto) -> IracemaAskResponseDto:
         """
         Novo modo:
@@ -83,18 +202,81 @@ class IracemaAskByFCService(IIracemaAskByFCService):
         - executa, loga
         - indexa FCA no vector store (Pergunta -> FCA) para auditoria/memória
         """
+        # o FCA faz parte da chave: mesma pergunta com payload diferente não coalesce
+        mode = "fc_args:" + request.fca.model_dump_json()
+
+        def index(outcome: IracemaAskOutcomeDto, conversation, user_message, question_key: str) -> None:
+            # indexa sempre: Pergunta -> FCA (+ SQL compilado), reaproveitado pelo /ask/fc
+            self._rag_index_service.index_success(
+                table_identifier=request.table_identifier,
+                question=request.question,
+                sql_executed=outcome.sql_executed,
+                rowcount=outcome.rowcount,
+                reason="fc_args",
+                duration_ms=outcome.duration_ms,
+                conversation_id=conversation.id,
+                message_id=user_message.id,
+                schema_fingerprint=outcome.schema_fingerprint,
+                question_key=question_key,
+                plan_kind=outcome.plan_kind,
+                plan_json=outcome.plan_json,
+            )
+
+        return self._run_pipeline(
+            request=request,
+            mode=mode,
+            compute=lambda: self._compute_fc_args_outcome(request),
+            index=index,
+        )
+
+    def ask_fc(self, request: IracemaAskRequestDto) -> IracemaAskResponseDto:
+        def index(outcome: IracemaAskOutcomeDto, conversation, user_message, question_key: str) -> None:
+            # index (só se não for cache hit)
+            if _is_rag_hit(outcome.reason):
+                return
+            self._index_if_needed(
+                request=request,
+                question=request.question,
+                sql_executed=outcome.sql_executed,
+                rowcount=outcome.rowcount,
+                reason=outcome.reason,
+                duration_ms=outcome.duration_ms,
+                conversation_id=conversation.id,
+                message_id=user_message.id,
+                schema_fingerprint=outcome.schema_fingerprint,
+                question_key=question_key,
+                plan_kind=outcome.plan_kind,
+                plan_json=outcome.plan_json,
+            )
+
+        return self._run_pipeline(
+            request=request,
+            mode="fc",
+            compute=lambda: self._compute_fc_outcome(request),
+            index=index,
+        )
+
+    def ask_fc_batch(self, request: IracemaAskBatchRequestDto) -> IracemaAskBatchResponseDto:
+        """
+        Lote de perguntas/FCAs para uma única datasource:
+        - datasource, conversa e mensagem do usuário: uma vez por lote
+        - cada item é validado/compilado (FCA) ou planejado (pergunta -> FC)
+        - agregações escalares (FCA) são combinadas numa única varredura (FILTER)
+        - consultas independentes executam em paralelo no pool de conexões
+        - erros são reportados por item, sem derrubar o lote
+        """
         session = self._db_context.create_session()
-        question = request.question
         error_message: Optional[str] = None
 
-        sql_executed = ""
-        rows: List[Dict[str, Any]] = []
-        rowcount = 0
-        answer_text = ""
+        results = [
+            IracemaAskBatchItemResultDto(index=i, question=item.question)
+            for i, item in enumerate(request.items)
+        ]
 
         conversation = None
         user_message = None
         assistant_message = None
+        batch_title = f"[lote] {request.items[0].question}"
 
         try:
             ds = self._datasource_repo.get_by_table_identifier(
@@ -106,94 +288,142 @@ class IracemaAskByFCService(IIracemaAskByFCService):
 
             table_fqn = build_table_fqn(request.table_identifier)
 
-            # conversa
-            conversation = self._get_or_create_conversation(session, request, question)
-
-            # msg user
+            conversation = self._get_or_create_conversation(session, request, batch_title)
             user_message = self._message_repo.add_message(
                 session=session,
                 conversation_id=conversation.id,
                 role=MessageRoleEnum.USER,
-                content=question,
+                content="\n".join(f"[{i + 1}] {item.question}" for i, item in enumerate(request.items)),
             )
             session.flush()
-            
-            
 
-            # 1) valida e normaliza FCA (whitelist + defaults)
-            request.fca.table_fqn = table_fqn  # força a tabela do request
-            request.fca = validate_and_normalize_fca(request.fca, columns_meta=ds.colunas_tabela, top_k=request.top_k)
+            # 1) planejamento (valida/compila) por item
+            jobs: List[_BatchJob] = []
+            scalar_items: List[Tuple[int, FCAArgsDto]] = []
+            for i, item in enumerate(request.items):
+                try:
+                    if item.fca is not None:
+                        fca = validate_and_normalize_fca(
+                            item.fca.model_copy(deep=True),
+                            columns_meta=ds.colunas_tabela,
+                            top_k=request.top_k,
+                            enforced_table_fqn=table_fqn,
+                        )
+                        if is_scalar_aggregate_fca(fca):
+                            scalar_items.append((i, fca))
+                        else:
+                            jobs.append(_BatchJob(indices=[i], plan=attach_plan(compile_fca_to_sql(fca), fca)))
+                    else:
+                        with llm_call_recording() as calls:
+                            plan = self._plan_fc_question(
+                                question=item.question,
+                                ds=ds,
+                                table_fqn=table_fqn,
+                                top_k=request.top_k,
+                            )
+                        jobs.append(_BatchJob(indices=[i], plan=plan, llm_calls=list(calls)))
+                except Exception as ex:
+                    results[i].error = str(ex)
 
-            # 2) compila SQL determinístico
-            sql_plan = compile_fca_to_sql(request.fca)
-            sql_executed = sql_plan.sql
-
-            # 3) executa
-            start = time.perf_counter()
-            with self._db_context.engine.connect() as connection:
-                result = connection.execute(text(sql_executed))
-                columns = result.keys()
-                rows = [dict(zip(columns, row)) for row in result.fetchall()]
-            rowcount = len(rows)
-            duration_ms = (time.perf_counter() - start) * 1000.0
-
-            # 4) log SUCCESS
-            self._sql_log_repo.log_sql(
-                session=session,
-                conversation_id=conversation.id,
-                message_id=user_message.id,
-                provider=self._llm_provider,
-                model=self._llm_model,
-                sql_text=sql_executed,
-                rowcount=rowcount,
-                duration_ms=duration_ms,
-                status=QueryStatusEnum.SUCCESS,
-                error_message=f"planner:{sql_plan.reason}",
-            )
+            # 2) agregações escalares compatíveis -> uma varredura só
+            if len(scalar_items) >= 2:
+                merged_plan, alias_maps = compile_fca_scalar_batch_to_sql([fca for _, fca in scalar_items])
+                jobs.append(
+                    _BatchJob(
+                        indices=[i for i, _ in scalar_items],
+                        plan=merged_plan,
+                        alias_maps=alias_maps,
+                        item_plans=[attach_plan(compile_fca_to_sql(fca), fca) for _, fca in scalar_items],
+                    )
+                )
+            else:
+                for i, fca in scalar_items:
+                    jobs.append(_BatchJob(indices=[i], plan=attach_plan(compile_fca_to_sql(fca), fca)))
 
-            # 5) indexa FCA (sempre) - não precisa mais retrieve, mas mantém memória/auditoria
-            # Sugestão: criar um método novo no rag_index_service
-            # index_fca(question, fca_json, sql_executed, ...)
-            self._rag_index_service.index_success(
-                table_identifier=request.table_identifier,
-                question=question,
-                sql_executed=sql_executed,
-                rowcount=rowcount,
-                reason="fc_args",
-                duration_ms=duration_ms,
-                conversation_id=conversation.id,
-                message_id=user_message.id,
-                # opcional: incluir fca serializado se seu index aceitar metadados
-                # extra={"fca": fca.model_dump()}
-            )
+            # 3) execução concorrente (cada worker faz checkout de uma conexão do pool)
+            if jobs:
+                workers = max(1, min(self._batch_max_workers, len(jobs)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(self._execute_sql, job.plan.sql) for job in jobs]
+                    for job, fut in zip(jobs, futures):
+                        try:
+                            job.rows, job.duration_ms = fut.result()
+                        except Exception as ex:
+                            job.error = str(ex)
 
-            # 6) explain (opcional)
-            if getattr(request, "explain", True):
-                rows_summary = _build_rows_summary(rows, request.top_k)
-                answer_text = self._llm_client.explain_result(
-                    schema_description=ds.prompt_inicial or "",
-                    question=question,
-                    sql_executed=sql_executed,
-                    rows=rows_summary["preview"],
-                    rowcount=rowcount,
+            # 4) distribui resultados, loga e indexa
+            for job in jobs:
+                sql_log = self._sql_log_repo.log_sql(
+                    session=session,
+                    conversation_id=conversation.id,
+                    message_id=user_message.id,
+                    provider=self._llm_provider,
+                    model=self._llm_model,
+                    sql_text=job.plan.sql,
+                    rowcount=len(job.rows),
+                    duration_ms=job.duration_ms,
+                    status=QueryStatusEnum.ERROR if job.error else QueryStatusEnum.SUCCESS,
+                    error_message=job.error or f"planner:{job.plan.reason}",
                 )
-            else:
-                answer_text = ""
 
+                if job.alias_maps is not None:
+                    item_rows = split_scalar_batch_row(job.rows[0] if job.rows else {}, job.alias_maps)
+                else:
+                    item_rows = [job.rows]
+
+                for pos, i in enumerate(job.indices):
+                    res = results[i]
+                    item_plan = job.item_plans[pos] if job.item_plans is not None else job.plan
+                    res.sql_executed = item_plan.sql
+                    if job.error:
+                        res.error = job.error
+                        continue
+
+                    rows = item_rows[pos] if job.alias_maps is None else [item_rows[pos]]
+                    res.rowcount = len(rows)
+                    res.result_preview = rows[: min(len(rows), request.top_k)]
+
+                    if job.alias_maps is None and not _is_rag_hit(job.plan.reason):
+                        self._index_if_needed(
+                            request=request,
+                            question=res.question,
+                            sql_executed=job.plan.sql,
+                            rowcount=res.rowcount,
+                            reason="fc_args" if request.items[i].fca is not None else job.plan.reason,
+                            duration_ms=job.duration_ms,
+                            conversation_id=conversation.id,
+                            message_id=user_message.id,
+                            schema_fingerprint=schema_fingerprint(ds.colunas_tabela),
+                            question_key=question_cache_key(res.question, ds.colunas_tabela),
+                            plan_kind=job.plan.plan_kind,
+                            plan_json=job.plan.plan_json,
+                        )
+
+                    try:
+                        with llm_call_recording() as calls:
+                            res.answer_text = self._explain(request, ds, res.question, item_plan, rows)
+                        job.llm_calls.extend(calls)
+                    except Exception as ex:
+                        res.error = str(ex)
+
+                self._save_llm_calls(session, sql_log.id, job.llm_calls, request.table_identifier, "fc_batch")
+
+            failed = sum(1 for r in results if r.error)
             assistant_message = self._message_repo.add_message(
                 session=session,
                 conversation_id=conversation.id,
                 role=MessageRoleEnum.ASSISTANT,
-                content=answer_text,
+                content=f"Lote executado: {len(results) - failed} de {len(results)} itens com sucesso.",
             )
             session.flush()
 
         except Exception as ex:
             error_message = str(ex)
-            answer_text = "Ocorreu um erro ao processar sua pergunta. A equipe técnica será notificada."
+            for r in results:
+                r.error = r.error or error_message
 
             if conversation is None:
-                conversation = self._conversation_repo.create(session, title=question[:120])
+                conversation = self._conversation_repo.create(session, title=batch_title[:120])
                 session.flush()
 
             if user_message is None:
@@ -201,7 +431,7 @@ class IracemaAskByFCService(IIracemaAskByFCService):
                     session=session,
                     conversation_id=conversation.id,
                     role=MessageRoleEnum.USER,
-                    content=question,
+                    content="\n".join(f"[{i + 1}] {item.question}" for i, item in enumerate(request.items)),
                 )
                 session.flush()
 
@@ -209,7 +439,7 @@ class IracemaAskByFCService(IIracemaAskByFCService):
                 session=session,
                 conversation_id=conversation.id,
                 role=MessageRoleEnum.ASSISTANT,
-                content=answer_text,
+                content="Ocorreu um erro ao processar o lote. A equipe técnica será notificada.",
             )
             session.flush()
 
@@ -219,34 +449,40 @@ class IracemaAskByFCService(IIracemaAskByFCService):
                 message_id=user_message.id,
                 provider=self._llm_provider,
                 model=self._llm_model,
-                sql_text=sql_executed or "",
-                rowcount=rowcount,
+                sql_text="",
+                rowcount=0,
                 duration_ms=0.0,
                 status=QueryStatusEnum.ERROR,
                 error_message=error_message,
             )
 
-        result_preview = rows[: min(len(rows), request.top_k)]
-
-        response = build_ask_response_dto(
+        response = build_ask_batch_response_dto(
             conversation=conversation,
             user_message=user_message,
             assistant_message=assistant_message,
-            question=question,
-            answer_text=answer_text,
-            sql_executed=sql_executed,
-            rowcount=rowcount,
-            result_preview=result_preview,
+            items=results,
             error=error_message,
         )
 
         session.close()
         return response
 
-    def ask_fc(self, request: IracemaAskRequestDto) -> IracemaAskResponseDto:
+    # -------------------------------------------------------------------------
+    # Pipeline central (persistência por usuário + resultado coalescido)
+    # -------------------------------------------------------------------------
+
+    def _run_pipeline(
+        self,
+        request: IracemaAskRequestDto,
+        mode: str,
+        compute: Callable[[], IracemaAskOutcomeDto],
+        index: Callable[[IracemaAskOutcomeDto, Any, Any, str], None],
+    ) -> IracemaAskResponseDto:
+        timer = StageTimer()
         session = self._db_context.create_session()
         question = request.question
         error_message: Optional[str] = None
+        reason = ""
 
         sql_executed = ""
         rows: List[Dict[str, Any]] = []
@@ -256,120 +492,84 @@ class IracemaAskByFCService(IIracemaAskByFCService):
         conversation = None
         user_message = None
         assistant_message = None
+        llm_calls: List[LLMCallRecord] = []
+        log_mode = mode.split(":", 1)[0]  # fc_args:<json> -> fc_args
 
         try:
-            ds = self._datasource_repo.get_by_table_identifier(
-                session=session,
-                table_identifier=request.table_identifier,
-            )
-            if ds is None or not ds.is_ativo:
-                raise ValueError("table_identifier inválido ou datasource inativa. Execute /start.")
-
-            prompt_fc = ds.prompt_inicial_fc or ""
-            if not prompt_fc.strip():
-                raise ValueError("Datasource não possui prompt_inicial_fc configurado.")
-
-            table_fqn = build_table_fqn(request.table_identifier)
-
-            # conversa
-            conversation = self._get_or_create_conversation(session, request, question)
-
-            # msg user
-            user_message = self._message_repo.add_message(
-                session=session,
-                conversation_id=conversation.id,
-                role=MessageRoleEnum.USER,
-                content=question,
-            )
-            session.flush()
-
-            # 1) cache hit (Pergunta->SQL)
-            cached_sql = self._rag_retrieve_service.try_get_exact_sql(
-                table_identifier=request.table_identifier,
-                question=question,
-            )
-            if cached_sql:
-                sql_executed = apply_topk_limit(cached_sql, request.top_k)
-                sql_plan = SqlPlan(sql=sql_executed, used_template=False, reason="rag_exact_hit")
-            else:
-                # 2) FC plan
-                plan = self._fc_client.generate_query_plan(
-                    prompt_inicial_fc=prompt_fc,
-                    question=question,
-                    columns_meta=ds.colunas_tabela,
-                    top_k=request.top_k,
+            # conversa + msg user
+            with timer.stage("conversation"):
+                conversation = self._get_or_create_conversation(session, request, question)
+                user_message = self._message_repo.add_message(
+                    session=session,
+                    conversation_id=conversation.id,
+                    role=MessageRoleEnum.USER,
+                    content=question,
                 )
+                session.flush()
 
-                # 3) valida contra colunas reais
-                plan = validate_and_normalize_plan(plan, ds.colunas_tabela)
-
-                # 4) compila SQL determinístico
-                sql_plan = compile_query_plan_to_sql(
-                    table_fqn=table_fqn,
-                    plan=plan,
+            # perguntas idênticas em andamento: só o líder chama FC/SQL/explainer
+            question_key = self._question_key(session, request.table_identifier, question)
+            wait_start = time.perf_counter()
+            outcome, is_leader = self._single_flight.do(
+                build_ask_coalescing_key(
+                    table_identifier=request.table_identifier,
+                    question_norm=question_key,
+                    mode=mode,
                     top_k=request.top_k,
-                )
-                sql_executed = sql_plan.sql
-
-            # executa
-            start = time.perf_counter()
-            with self._db_context.engine.connect() as connection:
-                result = connection.execute(text(sql_executed))
-                columns = result.keys()
-                rows = [dict(zip(columns, row)) for row in result.fetchall()]
-            rowcount = len(rows)
-            duration_ms = (time.perf_counter() - start) * 1000.0
-
-            # log
-            self._sql_log_repo.log_sql(
-                session=session,
-                conversation_id=conversation.id,
-                message_id=user_message.id,
-                provider=self._llm_provider,
-                model=self._llm_model,
-                sql_text=sql_executed,
-                rowcount=rowcount,
-                duration_ms=duration_ms,
-                status=QueryStatusEnum.SUCCESS,
-                error_message=f"planner:{sql_plan.reason}",
+                    explain=getattr(request, "explain", True),
+                ),
+                lambda: self._compute_recording_llm_calls(compute),
             )
+            if is_leader:
+                timer.merge(outcome.timings)
+                # tokens/latência do LLM contam uma vez só (no log do líder)
+                llm_calls = outcome.llm_calls
+            else:
+                # seguidor não refez as etapas do líder: registra só a espera
+                timer.add("coalesced_wait", (time.perf_counter() - wait_start) * 1000.0)
+            sql_executed = outcome.sql_executed
+            reason = outcome.reason
+            if outcome.error is not None:
+                raise RuntimeError(outcome.error)
 
-            # index (só se não for cache hit)
-            if sql_plan.reason != "rag_exact_hit":
-                self._index_if_needed(
-                    request=request,
-                    question=question,
-                    sql_executed=sql_executed,
-                    rowcount=rowcount,
-                    reason=sql_plan.reason,
-                    duration_ms=duration_ms,
+            rows = outcome.rows
+            rowcount = outcome.rowcount
+            answer_text = outcome.answer_text
+
+            # log SUCCESS (por usuário, mesmo quando coalescido)
+            with timer.stage("log"):
+                sql_log = self._sql_log_repo.log_sql(
+                    session=session,
                     conversation_id=conversation.id,
                     message_id=user_message.id,
-                )
-
-            # explain
-            if getattr(request, "explain", True):
-                rows_summary = _build_rows_summary(rows, request.top_k)
-                answer_text = self._llm_client.explain_result(
-                    schema_description=ds.prompt_inicial or "",  # ok usar prompt SQL como contexto do explainer
-                    question=question,
-                    sql_executed=sql_executed,
-                    rows=rows_summary["preview"],
+                    provider=self._llm_provider,
+                    model=self._llm_model,
+                    sql_text=sql_executed,
                     rowcount=rowcount,
+                    duration_ms=outcome.duration_ms,
+                    status=QueryStatusEnum.SUCCESS,
+                    error_message=f"planner:{outcome.reason}" + ("" if is_leader else "|coalesced"),
                 )
-            else:
-                answer_text = ""
+                self._save_llm_calls(session, sql_log.id, llm_calls, request.table_identifier, log_mode)
 
-            assistant_message = self._message_repo.add_message(
-                session=session,
-                conversation_id=conversation.id,
-                role=MessageRoleEnum.ASSISTANT,
-                content=answer_text,
-            )
-            session.flush()
+            # index (só o líder)
+            if is_leader:
+                with timer.stage("index"):
+                    index(outcome, conversation, user_message, question_key)
+
+            with timer.stage("persist"):
+                assistant_message = self._message_repo.add_message(
+                    session=session,
+                    conversation_id=conversation.id,
+                    role=MessageRoleEnum.ASSISTANT,
+                    content=answer_text,
+                )
+                session.flush()
 
         except Exception as ex:
             error_message = str(ex)
+            rows = []
+            rowcount = 0
             answer_text = "Ocorreu um erro ao processar sua pergunta. A equipe técnica será notificada."
 
             if conversation is None:
@@ -393,7 +593,7 @@ class IracemaAskByFCService(IIracemaAskByFCService):
             )
             session.flush()
 
-            self._sql_log_repo.log_sql(
+            sql_log = self._sql_log_repo.log_sql(
                 session=session,
                 conversation_id=conversation.id,
                 message_id=user_message.id,
@@ -405,9 +605,19 @@ class IracemaAskByFCService(IIracemaAskByFCService):
                 status=QueryStatusEnum.ERROR,
                 error_message=error_message,
             )
+            self._save_llm_calls(session, sql_log.id, llm_calls, request.table_identifier, log_mode)
 
         result_preview = rows[: min(len(rows), request.top_k)]
 
+        timings = timer.finish()
+        observe_ask_timings(
+            timings_ms=timings,
+            mode=log_mode,
+            reason=reason,
+            datasource=request.table_identifier,
+            status="error" if error_message else "success",
+        )
+
         response = build_ask_response_dto(
             conversation=conversation,
             user_message=user_message,
@@ -418,11 +628,395 @@ class IracemaAskByFCService(IIracemaAskByFCService):
             rowcount=rowcount,
             result_preview=result_preview,
             error=error_message,
+            timings=timings,
         )
 
         session.close()
         return response
 
+    def _compute_recording_llm_calls(
+        self, compute: Callable[[], IracemaAskOutcomeDto]
+    ) -> IracemaAskOutcomeDto:
+        with llm_call_recording() as calls:
+            outcome = compute()
+        outcome.llm_calls = list(calls)
+        return outcome
+
+    def _save_llm_calls(
+        self,
+        session,
+        sql_log_id,
+        calls: List[LLMCallRecord],
+        datasource: str,
+        mode: str,
+    ) -> None:
+        if self._llm_call_log_repo is None or not calls:
+            return
+        try:
+            self._llm_call_log_repo.add_calls(
+                session, build_llm_call_log_models(sql_log_id, calls, datasource, mode)
+            )
+        except Exception:
+            session.rollback()  # contabilidade é opcional: não derruba a resposta
+
+    def _compute_fc_args_outcome(self, request: IracemaAskWithFcaRequestDto) -> IracemaAskOutcomeDto:
+        timer = StageTimer()
+        session = self._db_context.create_session()
+        sql_executed = ""
+        try:
+            with timer.stage("datasource"):
+                ds = self._datasource_repo.get_by_table_identifier(
+                    session=session,
+                    table_identifier=request.table_identifier,
+                )
+            if ds is None or not ds.is_ativo:
+                raise ValueError("table_identifier inválido ou datasource inativa. Execute /start.")
+
+            table_fqn = build_table_fqn(request.table_identifier)
+
+            with timer.stage("planner"):
+                # 1) valida e normaliza FCA (whitelist + defaults)
+                request.fca.table_fqn = table_fqn  # força a tabela do request
+                request.fca = validate_and_normalize_fca(request.fca, columns_meta=ds.colunas_tabela, top_k=request.top_k)
+
+                # 2) compila SQL determinístico
+                sql_plan = attach_plan(compile_fca_to_sql(request.fca), request.fca)
+            sql_executed = sql_plan.sql
+
+            # 3) executa
+            rows, duration_ms = self._execute_sql(sql_executed)
+            timer.add("execute", duration_ms)
+
+            # 4) explain (opcional)
+            with timer.stage("explain"):
+                answer_text = self._explain(request, ds, request.question, sql_plan, rows)
+
+            return IracemaAskOutcomeDto(
+                sql_executed=sql_executed,
+                rows=rows,
+                rowcount=len(rows),
+                duration_ms=duration_ms,
+                reason=sql_plan.reason,
+                answer_text=answer_text,
+                timings=timer.timings,
+                schema_fingerprint=schema_fingerprint(ds.colunas_tabela),
+                plan_kind=sql_plan.plan_kind,
+                plan_json=sql_plan.plan_json,
+            )
+        except Exception as ex:
+            return IracemaAskOutcomeDto(sql_executed=sql_executed, error=str(ex), timings=timer.timings)
+        finally:
+            session.close()
+
+    def _compute_fc_outcome(self, request: IracemaAskRequestDto) -> IracemaAskOutcomeDto:
+        timer = StageTimer()
+        session = self._db_context.create_session()
+        question = request.question
+        sql_executed = ""
+        try:
+            with timer.stage("datasource"):
+                ds = self._datasource_repo.get_by_table_identifier(
+                    session=session,
+                    table_identifier=request.table_identifier,
+                )
+            if ds is None or not ds.is_ativo:
+                raise ValueError("table_identifier inválido ou datasource inativa. Execute /start.")
+
+            table_fqn = build_table_fqn(request.table_identifier)
+
+            sql_plan = self._plan_fc_question(
+                question=question,
+                ds=ds,
+                table_fqn=table_fqn,
+                top_k=request.top_k,
+                timer=timer,
+            )
+            sql_executed = sql_plan.sql
+
+            # executa
+            rows, duration_ms = self._execute_sql(sql_executed)
+            timer.add("execute", duration_ms)
+
+            if sql_plan.reason == "rag_near_hit":
+                self._maybe_audit_near_hit(question, ds, table_fqn, request.top_k, rows)
+
+            # explain
+            with timer.stage("explain"):
+                answer_text = self._explain(request, ds, request.question, sql_plan, rows)
+
+            return IracemaAskOutcomeDto(
+                sql_executed=sql_executed,
+                rows=rows,
+                rowcount=len(rows),
+                duration_ms=duration_ms,
+                reason=sql_plan.reason,
+                answer_text=answer_text,
+                timings=timer.timings,
+                schema_fingerprint=schema_fingerprint(ds.colunas_tabela),
+                plan_kind=sql_plan.plan_kind,
+                plan_json=sql_plan.plan_json,
+            )
+        except Exception as ex:
+            return IracemaAskOutcomeDto(sql_executed=sql_executed, error=str(ex), timings=timer.timings)
+        finally:
+            session.close()
+
+    def _execute_sql(self, sql_executed: str) -> Tuple[List[Dict[str, Any]], float]:
+        start = time.perf_counter()
+        with self._db_context.engine.connect() as connection:
+            result = connection.execute(text(sql_executed))
+            columns = result.keys()
+            rows = [dict(zip(columns, row)) for row in result.fetchall()]
+        duration_ms = (time.perf_counter() - start) * 1000.0
+        return rows, duration_ms
+
+    def _explain(
+        self,
+        request,
+        ds,
+        question: str,
+        sql_plan: SqlPlan,
+        rows: List[Dict[str, Any]],
+    ) -> str:
+        if not getattr(request, "explain", True):
+            return ""
+
+        # intents simples (fc:count, fc:sum, ...): frase pronta, sem round-trip no Ollama
+        answer_text = render_template_explanation(
+            reason=sql_plan.reason,
+            sql_executed=sql_plan.sql,
+            rows=rows,
+            rowcount=len(rows),
+            table_title=ds.titulo_tabela or ds.identificador_tabela,
+            columns_meta=ds.colunas_tabela,
+        )
+        if answer_text is not None:
+            observe_explanation("template")
+            return answer_text
+
+        rows_summary = _build_rows_summary(rows, request.top_k)
+        try:
+            with llm_routing(ds.identificador_tabela):
+                answer_text = self._llm_client.explain_result(
+                    schema_description=ds.prompt_inicial or "",  # ok usar prompt SQL como contexto do explainer
+                    question=question,
+                    sql_executed=sql_plan.sql,
+                    rows=rows_summary["preview"],
+                    rowcount=len(rows),
+                    summary=self._summarize_for_explain(sql_plan.sql, rows),
+                )
+        except LLMOverloadedError:
+            # fila do explainer cheia: entrega o resultado sem a explicação do LLM
+            observe_llm_degraded("explain_skipped")
+            return render_degraded_explanation(len(rows))
+        observe_explanation("llm")
+        return answer_text
+
+    def _summarize_for_explain(self, sql_executed: str, rows: List[Dict[str, Any]]) -> str:
+        """
+        Resumo estatístico compacto (orçamento de tokens) no lugar das linhas brutas.
+        Se o resultado foi truncado pelo LIMIT, complementa com estatísticas em SQL
+        sobre o resultado completo (quando viável).
+        """
+        summary = summarize_rows(rows)
+        if rows and is_result_truncated(sql_executed, len(rows)):
+            stats_sql = build_result_stats_sql(sql_executed, summary)
+            if stats_sql:
+                try:
+                    stats_rows, _ = self._execute_sql(stats_sql)
+                    if stats_rows:
+                        merge_result_stats(summary, stats_rows[0])
+                except Exception:
+                    pass  # estatísticas completas são opcionais: segue só com o preview
+        return render_summary_text(summary, self._explain_summary_max_tokens)
+
+    def _plan_fc_question(
+        self,
+        question: str,
+        ds,
+        table_fqn: str,
+        top_k: int,
+        timer: Optional[StageTimer] = None,
+    ) -> SqlPlan:
+        """
+        Pergunta -> SqlPlan: cache-hit (plano recompilado ou SQL) ou FC (QueryPlan) + validação + compilação.
+        """
+        timer = timer or StageTimer()
+        prompt_fc = ds.prompt_inicial_fc or ""
+        if not prompt_fc.strip():
+            raise ValueError("Datasource não possui prompt_inicial_fc configurado.")
+
+        # 1) cache hit (Pergunta -> QueryPlan/FCA recompilado, ou Pergunta -> SQL)
+        with timer.stage("cache_lookup"):
+            hit = self._rag_retrieve_service.try_get_exact_hit(
+                table_identifier=ds.identificador_tabela,
+                question=question,
+                columns_meta=ds.colunas_tabela,
+            )
+            cached_plan = self._reuse_exact_hit(hit, ds, table_fqn, top_k) if hit is not None else None
+        if cached_plan is not None:
+            return cached_plan
+
+        # 1b) quase-duplicata (paráfrase / um valor ou coluna trocado), revalidada
+        if self._near_duplicate_enabled:
+            with timer.stage("cache_lookup"):
+                near_plan = self._try_near_duplicate_plan(question, ds, table_fqn, top_k)
+            if near_plan is not None:
+                return near_plan
+
+        # tabelas largas: prompt só com as colunas relevantes para a pergunta
+        if self._schema_linking_service is not None:
+            with timer.stage("schema_linking"):
+                linked = self._schema_linking_service.build_prompts(ds, question)
+            if linked is not None:
+                prompt_fc = linked.prompt_fc
+
+        # 2) FC plan (sob sobrecarga, cai para o planner heurístico)
+        try:
+            return self._generate_routed_fc_plan(prompt_fc, question, ds, table_fqn, top_k, timer)
+        except LLMOverloadedError:
+            with timer.stage("planner"):
+                template_plan = plan_sql_template(
+                    table_fqn=table_fqn,
+                    columns_meta=ds.colunas_tabela,
+                    question=question,
+                    top_k=top_k,
+                )
+            if template_plan is None:
+                raise ValueError("Serviço de IA sobrecarregado no momento. Tente novamente em instantes.")
+            observe_llm_degraded("heuristic_fallback")
+            return template_plan
+
+    def _reuse_exact_hit(self, hit: IracemaRagExactHitDto, ds, table_fqn: str, top_k: int) -> Optional[SqlPlan]:
+        """
+        Plano guardado: revalida e recompila contra as colunas/tabela atuais
+        (sobrevive a mudanças de schema que invalidam o SQL cru).
+        Só SQL: reaproveita se o schema não mudou desde a indexação.
+        """
+        if self._plan_cache_enabled and hit.plan_kind and hit.plan_json:
+            try:
+                plan = compile_cached_plan(hit.plan_kind, hit.plan_json, ds.colunas_tabela, table_fqn, top_k)
+            except ValueError:
+                observe_rag_exact_hit(hit.plan_kind, "stale")
+                return None
+            observe_rag_exact_hit(hit.plan_kind, "hit")
+            plan.reason = f"{RAG_PLAN_HIT_PREFIX}{plan.reason}"
+            return plan
+
+        if hit.schema_fp and hit.schema_fp != schema_fingerprint(ds.colunas_tabela):
+            observe_rag_exact_hit("sql", "stale")
+            return None
+        observe_rag_exact_hit("sql", "hit")
+        return SqlPlan(sql=apply_topk_limit(hit.sql, top_k), used_template=False, reason="rag_exact_hit")
+
+    def _try_near_duplicate_plan(self, question: str, ds, table_fqn: str, top_k: int) -> Optional[SqlPlan]:
+        hit = self._rag_retrieve_service.try_get_near_duplicate_sql(
+            table_identifier=ds.identificador_tabela,
+            question=question,
+            columns_meta=ds.colunas_tabela,
+            min_similarity=self._near_duplicate_min_similarity,
+        )
+        if hit is None:
+            observe_rag_near_hit("none", "miss")
+            return None
+
+        # SQL reescrito passa pelos mesmos validadores do SQL do LLM (segurança + FROM + EXPLAIN)
+        try:
+            plan = sanitize_llm_sql(table_fqn=table_fqn, raw_sql_from_llm=hit.sql, top_k=top_k)
+            sql = apply_topk_limit(plan.sql, top_k)
+            validate_sql_with_explain(self._db_context.engine, sql)
+        except ValueError:
+            observe_rag_near_hit(hit.kind, "rejected")
+            return None
+
+        observe_rag_near_hit(hit.kind, "hit")
+        return SqlPlan(sql=sql, used_template=False, reason="rag_near_hit")
+
+    def _maybe_audit_near_hit(self, question: str, ds, table_fqn: str, top_k: int, rows: List[Dict[str, Any]]) -> None:
+        """
+        Amostra de near-hits: gera o plano pelo caminho normal (FC) em segundo plano
+        e compara o resultado. Divergência = falso acerto do cache.
+        """
+        if self._near_duplicate_audit_rate <= 0.0 or random.random() >= self._near_duplicate_audit_rate:
+            return
+        digest = _rows_digest(rows)
+        prompt_fc = ds.prompt_inicial_fc or ""
+
+        def audit() -> None:
+            try:
+                plan = self._generate_routed_fc_plan(prompt_fc, question, ds, table_fqn, top_k, StageTimer())
+                shadow_rows, _ = self._execute_sql(plan.sql)
+            except LLMOverloadedError:
+                observe_rag_near_hit_audit("skipped")
+                return
+            except Exception as ex:
+                observe_rag_near_hit_audit("error")
+                print(f"[NearHitAudit] Erro auditando '{question}': {ex}")
+                return
+
+            if _rows_digest(shadow_rows) == digest:
+                observe_rag_near_hit_audit("agree")
+            else:
+                observe_rag_near_hit_audit("disagree")
+                print(f"[NearHitAudit] Divergência em '{question}' ({ds.identificador_tabela}): FC gerou {plan.sql}")
+
+        self._audit_executor.submit(audit)
+
+    def _generate_routed_fc_plan(
+        self,
+        prompt_fc: str,
+        question: str,
+        ds,
+        table_fqn: str,
+        top_k: int,
+        timer: StageTimer,
+    ) -> SqlPlan:
+        """
+        Pergunta fácil -> modelo FC pequeno; plano reprovado (JSON/validação/compilação)
+        escala para o modelo grande.
+        """
+        routes = ["large"]
+        if self._difficulty_routing:
+            difficulty = classify_question_difficulty(
+                question, ds.colunas_tabela, easy_max_score=self._routing_easy_max_score
+            )
+            routes = routes_for(difficulty, self._fc_client.supports_route(ROUTE_SMALL))
+
+        for attempt, route in enumerate(routes):
+            start = time.perf_counter()
+            try:
+                with timer.stage("llm_generate"), llm_routing(ds.identificador_tabela):
+                    plan = self._fc_client.generate_query_plan(
+                        prompt_inicial_fc=prompt_fc,
+                        question=question,
+                        columns_meta=ds.colunas_tabela,
+                        top_k=top_k,
+                        route=route,
+                    )
+
+                with timer.stage("planner"):
+                    # 3) valida contra colunas reais
+                    plan = validate_and_normalize_plan(plan, ds.colunas_tabela)
+
+                    # 4) compila SQL determinístico (o plano vai junto para a memória RAG)
+                    sql_plan = attach_plan(
+                        compile_query_plan_to_sql(table_fqn=table_fqn, plan=plan, top_k=top_k),
+                        plan,
+                    )
+            except ValueError:
+                escalate = attempt + 1 < len(routes)
+                observe_llm_route(
+                    "fc", route, "escalated" if escalate else "validation_error", time.perf_counter() - start
+                )
+                if not escalate:
+                    raise
+                continue
+
+            observe_llm_route("fc", route, "ok", time.perf_counter() - start)
+            return sql_plan
+
+        raise ValueError("Nenhuma rota de modelo disponível para gerar o plano FC.")
+
     def _get_or_create_conversation(self, session, request: IracemaAskRequestDto, question: str):
         if request.conversation_id:
             conv = self._conversation_repo.get_by_id(session, request.conversation_id)
@@ -432,6 +1026,11 @@ class IracemaAskByFCService(IIracemaAskByFCService):
         session.flush()
         return conv
 
+    def _question_key(self, session, table_identifier: str, question: str) -> str:
+        # mesma chave da busca exata e da indexação (sinônimos vêm das colunas da datasource)
+        ds = self._datasource_repo.get_by_table_identifier(session=session, table_identifier=table_identifier)
+        return question_cache_key(question, ds.colunas_tabela if ds is not None else None)
+
     def _index_if_needed(
         self,
         request: IracemaAskRequestDto,
@@ -442,13 +1041,12 @@ class IracemaAskByFCService(IIracemaAskByFCService):
         duration_ms: float,
         conversation_id,
         message_id,
+        schema_fingerprint: Optional[str] = None,
+        question_key: Optional[str] = None,
+        plan_kind: Optional[str] = None,
+        plan_json: Optional[str] = None,
     ):
-        should_index = (
-            (rowcount > 0)
-            or ("count(" in (sql_executed or "").lower())
-            or ("sum(" in (sql_executed or "").lower())
-        )
-        if not should_index:
+        if not is_indexable(sql_executed, rowcount):
             return
 
         self._rag_index_service.index_success(
@@ -460,4 +1058,8 @@ class IracemaAskByFCService(IIracemaAskByFCService):
             duration_ms=duration_ms,
             conversation_id=conversation_id,
             message_id=message_id,
+            schema_fingerprint=schema_fingerprint,
+            question_key=question_key,
+            plan_kind=plan_kind,
+            plan_json=plan_json,
         )
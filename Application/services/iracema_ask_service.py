@@ -1,7 +1,10 @@
 # Application/services/iracema_ask_service.py
 
+import contextvars
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy import text
 
@@ -9,6 +12,7 @@ from Data.db_context import DbContext
 from Domain.interfaces.i_iracema_conversation_repository import IIracemaConversationRepository
 from Domain.interfaces.i_iracema_message_repository import IIracemaMessageRepository
 from Domain.interfaces.i_iracema_sql_log_repository import IIracemaSQLLogRepository
+from Domain.interfaces.i_iracema_llm_call_log_repository import IIracemaLLMCallLogRepository
 
 from Domain.iracema_enums import (
     MessageRoleEnum,
@@ -21,9 +25,11 @@ from Application.dto.iracema_ask_dto import (
     IracemaAskRequestDto,
     IracemaAskResponseDto,
 )
+from Application.dto.iracema_ask_outcome_dto import IracemaAskOutcomeDto
 from Application.interfaces.i_iracema_ask_service import IIracemaAskService
 from Application.interfaces.i_iracema_llm_client import IIracemaLLMClient
-from Application.mappings.iracema_mappings import build_ask_response_dto
+from Application.interfaces.i_iracema_schema_linking_service import IIracemaSchemaLinkingService
+from Application.mappings.iracema_mappings import build_ask_response_dto, build_llm_call_log_models
 from Domain.interfaces.i_iracema_datasource_repository import IIracemaDataSourceRepository
 from Application.helpers.iracema_table_name_helper import build_table_fqn
 
@@ -31,10 +37,47 @@ from Application.interfaces.i_iracema_rag_index_service import IIracemaRagIndexS
 from Application.interfaces.i_iracema_rag_retrieve_service import IIracemaRagRetrieveService
 
 from Application.helpers.sql_types_helper import SqlPlan
-from Application.helpers.sql_template_planner_helper import plan_sql_template
+from Application.helpers.sql_template_planner_helper import (
+    TEMPLATE_CONFIDENCE_HINTED,
+    plan_sql_template,
+    template_confidence,
+)
 from Application.helpers.sql_llm_sanitizer_helper import sanitize_llm_sql
+from Application.helpers.sql_explain_validator_helper import validate_sql_with_explain
 
 from Application.helpers.iracema_apply_topk_limit_helper import apply_topk_limit
+from Application.helpers.iracema_single_flight_helper import SingleFlight, build_ask_coalescing_key
+from Application.helpers.iracema_text_normalize_helper import question_cache_key
+from Application.helpers.iracema_stage_timer_helper import StageTimer
+from Application.helpers.iracema_schema_fingerprint_helper import schema_fingerprint
+from Application.helpers.iracema_deadline_helper import Deadline
+from Application.helpers.iracema_question_difficulty_helper import (
+    ROUTE_SMALL,
+    classify_question_difficulty,
+    routes_for,
+)
+from Application.helpers.iracema_explanation_template_helper import (
+    render_degraded_explanation,
+    render_template_explanation,
+    render_template_fallback_notice,
+)
+from Application.helpers.iracema_result_summary_helper import (
+    build_result_stats_sql,
+    is_result_truncated,
+    merge_result_stats,
+    render_summary_text,
+    summarize_rows,
+)
+from Application.helpers.iracema_rag_entry_helper import is_indexable
+from External.ai.iracema_llm_scheduler import LLMOverloadedError, LLMPriority
+from External.ai.iracema_ollama_endpoint_pool import llm_routing
+from External.ai.iracema_llm_call_recorder import LLMCallRecord, llm_call_recording
+from External.metrics.iracema_prometheus_metrics import (
+    observe_ask_timings,
+    observe_explanation,
+    observe_llm_degraded,
+    observe_llm_route,
+)
 
 
 def _build_rows_summary(rows: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
@@ -73,6 +116,16 @@ class IracemaAskService(IIracemaAskService):
         llm_client: IIracemaLLMClient,
         llm_provider: LLMProviderEnum = LLMProviderEnum.OLLAMA,
         llm_model: LLMModelEnum = LLMModelEnum.PHI_3,
+        single_flight: Optional[SingleFlight] = None,
+        explain_summary_max_tokens: int = 256,
+        schema_linking_service: Optional[IIracemaSchemaLinkingService] = None,
+        deadline_ms: Optional[int] = None,
+        template_confidence_high: float = 0.8,
+        explain_min_budget_ms: int = 1500,
+        speculative_max_workers: int = 4,
+        difficulty_routing: bool = True,
+        routing_easy_max_score: int = 1,
+        llm_call_log_repo: Optional[IIracemaLLMCallLogRepository] = None,
     ) -> None:
         self._db_context = db_context
         self._conversation_repo = conversation_repo
@@ -84,6 +137,24 @@ class IracemaAskService(IIracemaAskService):
         self._llm_client = llm_client
         self._llm_provider = llm_provider
         self._llm_model = llm_model
+        self._single_flight = single_flight or SingleFlight()
+        self._explain_summary_max_tokens = explain_summary_max_tokens
+        self._schema_linking_service = schema_linking_service
+        self._deadline_ms = deadline_ms
+        self._template_confidence_high = template_confidence_high
+        self._explain_min_budget_ms = explain_min_budget_ms
+        self._difficulty_routing = difficulty_routing
+        self._routing_easy_max_score = routing_easy_max_score
+        self._llm_call_log_repo = llm_call_log_repo
+        # LLM (SQL/explicação) roda aqui quando há prazo; o pipeline espera só até o deadline
+        self._speculative_executor = ThreadPoolExecutor(
+            max_workers=max(1, int(speculative_max_workers)),
+            thread_name_prefix="iracema-llm",
+        )
+        # chamadas em execução + na fila do executor; acima do limite, recusa na hora
+        self._speculative_limit = 2 * max(1, int(speculative_max_workers))
+        self._speculative_inflight = 0
+        self._speculative_lock = threading.Lock()
 
     # -------------------------------------------------------------------------
     # API pública
@@ -113,10 +184,12 @@ class IracemaAskService(IIracemaAskService):
     # -------------------------------------------------------------------------
 
     def _run_pipeline(self, request: IracemaAskRequestDto, sql_mode: str) -> IracemaAskResponseDto:
+        timer = StageTimer()
         session = self._db_context.create_session()
 
         question = request.question
         error_message: Optional[str] = None
+        reason = ""
 
         sql_executed = ""
         rows: List[Dict[str, Any]] = []
@@ -126,113 +199,108 @@ class IracemaAskService(IIracemaAskService):
         conversation = None
         user_message = None
         assistant_message = None
+        llm_calls: List[LLMCallRecord] = []
 
         try:
-            # 0) Datasource + schema
-            ds = self._datasource_repo.get_by_table_identifier(
-                session=session,
-                table_identifier=request.table_identifier,
-            )
-            if ds is None or not ds.is_ativo:
-                raise ValueError(
-                    "table_identifier inválido ou datasource inativa. Execute /start para obter um identificador válido."
+            # 1) Obter/criar conversa + 2) Registrar msg do usuário
+            with timer.stage("conversation"):
+                conversation = self._get_or_create_conversation(session, request, question)
+                user_message = self._message_repo.add_message(
+                    session=session,
+                    conversation_id=conversation.id,
+                    role=MessageRoleEnum.USER,
+                    content=question,
                 )
+                session.flush()
 
-            schema_description = ds.prompt_inicial or ""
-            if not schema_description.strip():
-                raise ValueError("Datasource não possui prompt_inicial configurado.")
-
-            table_fqn = build_table_fqn(request.table_identifier)
-
-            # 1) Obter/criar conversa
-            conversation = self._get_or_create_conversation(session, request, question)
-            print("1 executado")
-
-            # 2) Registrar msg do usuário
-            user_message = self._message_repo.add_message(
-                session=session,
-                conversation_id=conversation.id,
-                role=MessageRoleEnum.USER,
-                content=question,
-            )
-            session.flush()
-            print("2 executado")
-
-            # 3) Resolver SQL (cache/template/LLM conforme modo)
-            sql_plan = self._resolve_sql_plan(
-                request=request,
-                schema_description=schema_description,
-                table_fqn=table_fqn,
-                columns_meta=ds.colunas_tabela,
-                sql_mode=sql_mode,
-            )
-            sql_executed = sql_plan.sql
-            print("3 executado")
-            
-            # 4) Executar SQL
-            start = time.perf_counter()
-            with self._db_context.engine.connect() as connection:
-                result = connection.execute(text(sql_executed))
-                columns = result.keys()
-                rows = [dict(zip(columns, row)) for row in result.fetchall()]
-            rowcount = len(rows)
-            duration_ms = (time.perf_counter() - start) * 1000.0
-            print("4 executado")
-            
-            # 5) Log SQL SUCCESS
-            self._sql_log_repo.log_sql(
-                session=session,
-                conversation_id=conversation.id,
-                message_id=user_message.id,
-                provider=self._llm_provider,
-                model=self._llm_model,
-                sql_text=sql_executed,
-                rowcount=rowcount,
-                duration_ms=duration_ms,
-                status=QueryStatusEnum.SUCCESS,
-                error_message=f"planner:{sql_plan.reason}",
-            )
-            print("5 executado")
-            
-            # 6) Indexar (memória Pergunta->SQL) se aplicável
-            self._index_if_needed(
-                request=request,
-                question=question,
-                sql_executed=sql_executed,
-                rowcount=rowcount,
-                reason=sql_plan.reason,
-                duration_ms=duration_ms,
-                conversation_id=conversation.id,
-                message_id=user_message.id,
+            # 3) Datasource -> SQL -> execução -> explicação
+            # Perguntas idênticas em andamento são coalescidas: só o líder executa
+            # RAG/LLM/SQL/explainer; os demais aguardam e reaproveitam o resultado.
+            # datasource uma vez: chave canônica (sinônimos das colunas) e pipeline do líder
+            with timer.stage("datasource"):
+                ds = self._datasource_repo.get_by_table_identifier(
+                    session=session,
+                    table_identifier=request.table_identifier,
+                )
+            question_key = question_cache_key(question, ds.colunas_tabela if ds is not None else None)
+            wait_start = time.perf_counter()
+            outcome, is_leader = self._single_flight.do(
+                build_ask_coalescing_key(
+                    table_identifier=request.table_identifier,
+                    question_norm=question_key,
+                    mode=sql_mode,
+                    top_k=request.top_k,
+                    explain=getattr(request, "explain", True),
+                    deadline_ms=request.deadline_ms or self._deadline_ms,
+                ),
+                lambda: self._compute_recording_llm_calls(lambda: self._compute_outcome(request, sql_mode, ds)),
             )
-            print("6 executado")
-            
-            # 7) Explicar (opcional)
-            if getattr(request, "explain", True):
-                rows_summary = _build_rows_summary(rows, request.top_k)
-                answer_text = self._llm_client.explain_result(
-                    schema_description=schema_description,
-                    question=question,
-                    sql_executed=sql_executed,
-                    rows=rows_summary["preview"],
+            if is_leader:
+                timer.merge(outcome.timings)
+                # tokens/latência do LLM contam uma vez só (no log do líder)
+                llm_calls = outcome.llm_calls
+            else:
+                # seguidor não refez as etapas do líder: registra só a espera
+                timer.add("coalesced_wait", (time.perf_counter() - wait_start) * 1000.0)
+            sql_executed = outcome.sql_executed
+            reason = outcome.reason
+            if outcome.error is not None:
+                raise RuntimeError(outcome.error)
+
+            rows = outcome.rows
+            rowcount = outcome.rowcount
+            answer_text = outcome.answer_text
+
+            # 5) Log SQL SUCCESS (por usuário, mesmo quando coalescido)
+            with timer.stage("log"):
+                sql_log = self._sql_log_repo.log_sql(
+                    session=session,
+                    conversation_id=conversation.id,
+                    message_id=user_message.id,
+                    provider=self._llm_provider,
+                    model=self._llm_model,
+                    sql_text=sql_executed,
                     rowcount=rowcount,
+                    duration_ms=outcome.duration_ms,
+                    status=QueryStatusEnum.SUCCESS,
+                    error_message=(
+                        f"planner:{outcome.reason}"
+                        + (f"|fallback:{outcome.fallback}" if outcome.fallback else "")
+                        + ("" if is_leader else "|coalesced")
+                    ),
                 )
-            else:
-                answer_text = ""
-            print("7 executado")
-            
+                self._save_llm_calls(session, sql_log.id, llm_calls, request.table_identifier, sql_mode)
+
+            # 6) Indexar (memória Pergunta->SQL) se aplicável — só o líder indexa
+            if is_leader:
+                with timer.stage("index"):
+                    self._index_if_needed(
+                        request=request,
+                        question=question,
+                        sql_executed=sql_executed,
+                        rowcount=rowcount,
+                        reason=outcome.reason,
+                        duration_ms=outcome.duration_ms,
+                        conversation_id=conversation.id,
+                        message_id=user_message.id,
+                        schema_fingerprint=outcome.schema_fingerprint,
+                        question_key=question_key,
+                    )
+
             # 8) Registrar msg do assistente
-            assistant_message = self._message_repo.add_message(
-                session=session,
-                conversation_id=conversation.id,
-                role=MessageRoleEnum.ASSISTANT,
-                content=answer_text,
-            )
-            session.flush()
-            #print("7 executado")
-            
+            with timer.stage("persist"):
+                assistant_message = self._message_repo.add_message(
+                    session=session,
+                    conversation_id=conversation.id,
+                    role=MessageRoleEnum.ASSISTANT,
+                    content=answer_text,
+                )
+                session.flush()
+
         except Exception as ex:
             error_message = str(ex)
+            rows = []
+            rowcount = 0
             answer_text = (
                 "Ocorreu um erro ao processar sua pergunta. "
                 "A equipe técnica será notificada."
@@ -260,7 +328,7 @@ class IracemaAskService(IIracemaAskService):
             )
             session.flush()
 
-            self._sql_log_repo.log_sql(
+            sql_log = self._sql_log_repo.log_sql(
                 session=session,
                 conversation_id=conversation.id,
                 message_id=user_message.id,
@@ -272,10 +340,20 @@ class IracemaAskService(IIracemaAskService):
                 status=QueryStatusEnum.ERROR,
                 error_message=error_message,
             )
+            self._save_llm_calls(session, sql_log.id, llm_calls, request.table_identifier, sql_mode)
 
         # Preview limitado
         result_preview: List[Dict[str, Any]] = rows[: min(len(rows), request.top_k)]
 
+        timings = timer.finish()
+        observe_ask_timings(
+            timings_ms=timings,
+            mode=sql_mode,
+            reason=reason,
+            datasource=request.table_identifier,
+            status="error" if error_message else "success",
+        )
+
         response = build_ask_response_dto(
             conversation=conversation,
             user_message=user_message,
@@ -286,15 +364,243 @@ class IracemaAskService(IIracemaAskService):
             rowcount=rowcount,
             result_preview=result_preview,
             error=error_message,
+            timings=timings,
         )
 
         session.close()
         return response
 
+    def _compute_outcome(self, request: IracemaAskRequestDto, sql_mode: str, ds) -> IracemaAskOutcomeDto:
+        """
+        Parte compartilhável do pipeline (sem persistência por usuário):
+        datasource -> plano SQL -> execução -> explicação.
+        Erros viram outcome.error para que líder e seguidores recebam o mesmo resultado.
+        """
+        timer = StageTimer()
+        deadline = Deadline(request.deadline_ms or self._deadline_ms)
+        fallbacks: List[str] = []
+        sql_executed = ""
+        try:
+            # 0) Datasource (já carregada em _run_pipeline) + schema
+            if ds is None or not ds.is_ativo:
+                raise ValueError(
+                    "table_identifier inválido ou datasource inativa. Execute /start para obter um identificador válido."
+                )
+
+            schema_description = ds.prompt_inicial or ""
+            if not schema_description.strip():
+                raise ValueError("Datasource não possui prompt_inicial configurado.")
+
+            table_fqn = build_table_fqn(request.table_identifier)
+
+            # 3) Resolver SQL (cache/template/LLM conforme modo)
+            sql_plan = self._resolve_sql_plan(
+                request=request,
+                ds=ds,
+                schema_description=schema_description,
+                table_fqn=table_fqn,
+                columns_meta=ds.colunas_tabela,
+                sql_mode=sql_mode,
+                timer=timer,
+                deadline=deadline,
+                fallbacks=fallbacks,
+            )
+            sql_executed = sql_plan.sql
+
+            # 4) Executar SQL
+            rows, duration_ms = self._execute_sql(sql_executed)
+            rowcount = len(rows)
+            timer.add("execute", duration_ms)
+
+            # 7) Explicar (opcional): template determinístico -> LLM
+            if getattr(request, "explain", True):
+                with timer.stage("explain"):
+                    answer_text = self._explain(
+                        request=request,
+                        ds=ds,
+                        schema_description=schema_description,
+                        sql_plan=sql_plan,
+                        rows=rows,
+                        deadline=deadline,
+                        fallbacks=fallbacks,
+                    )
+            else:
+                answer_text = ""
+
+            # SQL do template de reserva: o usuário sabe que a resposta é degradada
+            if any(f.endswith("_template") for f in fallbacks):
+                notice = render_template_fallback_notice()
+                answer_text = f"{notice}\n\n{answer_text}" if answer_text else notice
+
+            return IracemaAskOutcomeDto(
+                sql_executed=sql_executed,
+                rows=rows,
+                rowcount=rowcount,
+                duration_ms=duration_ms,
+                reason=sql_plan.reason,
+                answer_text=answer_text,
+                timings=timer.timings,
+                fallback=",".join(fallbacks) or None,
+                schema_fingerprint=schema_fingerprint(ds.colunas_tabela),
+            )
+        except Exception as ex:
+            return IracemaAskOutcomeDto(
+                sql_executed=sql_executed,
+                error=str(ex),
+                timings=timer.timings,
+                fallback=",".join(fallbacks) or None,
+            )
+
     # -------------------------------------------------------------------------
     # Helpers internos
     # -------------------------------------------------------------------------
 
+    def _explain(
+        self,
+        request: IracemaAskRequestDto,
+        ds,
+        schema_description: str,
+        sql_plan: SqlPlan,
+        rows: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
+        fallbacks: Optional[List[str]] = None,
+    ) -> str:
+        deadline = deadline or Deadline(None)
+        fallbacks = fallbacks if fallbacks is not None else []
+
+        # intents simples (count/sum/distinct/schema): frase pronta, sem round-trip no Ollama
+        answer_text = render_template_explanation(
+            reason=sql_plan.reason,
+            sql_executed=sql_plan.sql,
+            rows=rows,
+            rowcount=len(rows),
+            table_title=ds.titulo_tabela or request.table_identifier,
+            columns_meta=ds.colunas_tabela,
+        )
+        if answer_text is not None:
+            observe_explanation("template")
+            return answer_text
+
+        # sem orçamento para o explainer: entrega o resultado sem a explicação do LLM
+        if not deadline.has_at_least(self._explain_min_budget_ms):
+            fallbacks.append("explain_skipped_deadline")
+            observe_llm_degraded("explain_skipped")
+            return render_degraded_explanation(len(rows))
+
+        rows_summary = _build_rows_summary(rows, request.top_k)
+
+        def explain() -> str:
+            with llm_routing(ds.identificador_tabela):
+                return self._llm_client.explain_result(
+                    schema_description=schema_description,
+                    question=request.question,
+                    sql_executed=sql_plan.sql,
+                    rows=rows_summary["preview"],
+                    rowcount=len(rows),
+                    summary=self._summarize_for_explain(sql_plan.sql, rows),
+                )
+
+        try:
+            answer_text = self._call_within_deadline(explain, deadline, LLMPriority.EXPLAIN)
+        except (LLMOverloadedError, FuturesTimeoutError) as ex:
+            # fila do explainer cheia ou prazo esgotado: entrega o resultado sem a explicação do LLM
+            cause = "deadline" if isinstance(ex, FuturesTimeoutError) else "overloaded"
+            fallbacks.append(f"explain_skipped_{cause}")
+            observe_llm_degraded("explain_skipped")
+            return render_degraded_explanation(len(rows))
+        observe_explanation("llm")
+        return answer_text
+
+    def _call_within_deadline(self, fn: Callable[[], Any], deadline: Deadline, priority: LLMPriority) -> Any:
+        """
+        Executa fn respeitando o prazo da requisição (TimeoutError do futures se estourar).
+        - prazo estourado: a chamada ainda na fila é cancelada; a que já começou segue
+          em background e ainda alimenta o cache de completions
+        - executor com fila cheia (chamadas órfãs de requisições anteriores):
+          LLMOverloadedError na hora, sem enfileirar
+        """
+        remaining = deadline.remaining_secs()
+        if remaining is None:
+            return fn()
+        if remaining <= 0:
+            raise FuturesTimeoutError()
+
+        with self._speculative_lock:
+            if self._speculative_inflight >= self._speculative_limit:
+                model = str(getattr(self._llm_model, "value", self._llm_model))
+                raise LLMOverloadedError(model, priority, "executor_backlog")
+            self._speculative_inflight += 1
+        try:
+            # copia o contexto: afinidade de host e registro de chamadas seguem para a thread
+            future = self._speculative_executor.submit(contextvars.copy_context().run, fn)
+        except Exception:
+            self._release_speculative_slot()
+            raise
+        # concluída ou cancelada: libera a vaga
+        future.add_done_callback(lambda _: self._release_speculative_slot())
+
+        try:
+            return future.result(timeout=remaining)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise
+
+    def _release_speculative_slot(self) -> None:
+        with self._speculative_lock:
+            self._speculative_inflight -= 1
+
+    def _compute_recording_llm_calls(
+        self, compute: Callable[[], IracemaAskOutcomeDto]
+    ) -> IracemaAskOutcomeDto:
+        with llm_call_recording() as calls:
+            outcome = compute()
+        outcome.llm_calls = list(calls)
+        return outcome
+
+    def _save_llm_calls(
+        self,
+        session,
+        sql_log_id,
+        calls: List[LLMCallRecord],
+        datasource: str,
+        mode: str,
+    ) -> None:
+        if self._llm_call_log_repo is None or not calls:
+            return
+        try:
+            self._llm_call_log_repo.add_calls(
+                session, build_llm_call_log_models(sql_log_id, calls, datasource, mode)
+            )
+        except Exception:
+            session.rollback()  # contabilidade é opcional: não derruba a resposta
+
+    def _summarize_for_explain(self, sql_executed: str, rows: List[Dict[str, Any]]) -> str:
+        """
+        Resumo estatístico compacto (orçamento de tokens) no lugar das linhas brutas.
+        Se o resultado foi truncado pelo LIMIT, complementa com estatísticas em SQL
+        sobre o resultado completo (quando viável).
+        """
+        summary = summarize_rows(rows)
+        if rows and is_result_truncated(sql_executed, len(rows)):
+            stats_sql = build_result_stats_sql(sql_executed, summary)
+            if stats_sql:
+                try:
+                    stats_rows, _ = self._execute_sql(stats_sql)
+                    if stats_rows:
+                        merge_result_stats(summary, stats_rows[0])
+                except Exception:
+                    pass  # estatísticas completas são opcionais: segue só com o preview
+        return render_summary_text(summary, self._explain_summary_max_tokens)
+
+    def _execute_sql(self, sql_executed: str) -> Tuple[List[Dict[str, Any]], float]:
+        start = time.perf_counter()
+        with self._db_context.engine.connect() as connection:
+            result = connection.execute(text(sql_executed))
+            columns = result.keys()
+            rows = [dict(zip(columns, row)) for row in result.fetchall()]
+        duration_ms = (time.perf_counter() - start) * 1000.0
+        return rows, duration_ms
+
     def _get_or_create_conversation(self, session, request: IracemaAskRequestDto, question: str):
         if request.conversation_id:
             conv = self._conversation_repo.get_by_id(session, request.conversation_id)
@@ -307,11 +613,19 @@ class IracemaAskService(IIracemaAskService):
     def _resolve_sql_plan(
         self,
         request: IracemaAskRequestDto,
+        ds,
         schema_description: str,
         table_fqn: str,
         columns_meta: list[dict],
         sql_mode: str,
+        timer: Optional[StageTimer] = None,
+        deadline: Optional[Deadline] = None,
+        fallbacks: Optional[List[str]] = None,
     ) -> SqlPlan:
+        timer = timer or StageTimer()
+        deadline = deadline or Deadline(None)
+        fallbacks = fallbacks if fallbacks is not None else []
+
         # 1) cache hit (sempre)
         #cached_sql = self._rag_retrieve_service.try_get_exact_sql(
        #     table_identifier=request.table_identifier,
@@ -322,61 +636,128 @@ class IracemaAskService(IIracemaAskService):
        #     sql = apply_topk_limit(cached_sql, request.top_k)
        #     return SqlPlan(sql=sql, used_template=False, reason="rag_exact_hit")
 
-        # 2) modo heuristic: apenas template
-        if sql_mode == "heuristic":
+        if sql_mode not in ("heuristic", "default", "ai"):
+            raise ValueError(f"sql_mode inválido: {sql_mode}")
+
+        with timer.stage("planner"):
             template_plan = plan_sql_template(
                 table_fqn=table_fqn,
                 columns_meta=columns_meta,
                 question=request.question,
                 top_k=request.top_k,
             )
+
+        # 2) modo heuristic: apenas template
+        if sql_mode == "heuristic":
             if template_plan is None:
                 raise ValueError("Planner heurístico não conseguiu gerar SQL para esta pergunta.")
             return template_plan
 
-        # 3) modo default: template -> LLM
-        if sql_mode == "default":
-            template_plan = plan_sql_template(
-                table_fqn=table_fqn,
-                columns_meta=columns_meta,
-                question=request.question,
-                top_k=request.top_k,
-            )
-            #print(template_plan)
-            if template_plan is not None:
+        # 3) modo default: template confiante responde direto; limítrofe disputa com o LLM
+        if sql_mode == "default" and template_plan is not None:
+            if template_confidence(request.question, template_plan) >= self._template_confidence_high:
                 return template_plan
 
-            raw_sql = self._llm_client.generate_sql(
-                schema_description=schema_description,
-                question=request.question,
-                top_k=request.top_k,
-                table_identifier=request.table_identifier,
+        # 4) LLM dentro do prazo; no modo default, o template (quando houver) é a reserva
+        llm_timer = StageTimer()
+        try:
+            plan = self._call_within_deadline(
+                lambda: self._generate_llm_sql_plan(request, ds, schema_description, table_fqn, llm_timer),
+                deadline,
+                LLMPriority.GENERATE,
             )
-            #print(raw_sql)
-            return sanitize_llm_sql(
-                table_fqn=table_fqn,
-                raw_sql_from_llm=raw_sql,
-                top_k=request.top_k,
+            timer.merge(llm_timer.timings)
+            return plan
+        except Exception as ex:
+            timer.merge(llm_timer.timings)
+            if isinstance(ex, FuturesTimeoutError):
+                cause = "deadline"
+            elif isinstance(ex, LLMOverloadedError):
+                cause = "overloaded"
+            else:
+                cause = "llm_error"
+
+            # reserva só no modo default, só por prazo/sobrecarga e só com template que não
+            # ignora filtro/agrupamento da pergunta (senão a resposta sairia sem o recorte)
+            use_template = (
+                sql_mode == "default"
+                and cause != "llm_error"
+                and template_plan is not None
+                and template_confidence(request.question, template_plan) > TEMPLATE_CONFIDENCE_HINTED
             )
+            if not use_template:
+                if cause == "deadline":
+                    raise ValueError("Tempo limite da consulta esgotado antes de o LLM gerar o SQL.")
+                if cause == "overloaded":
+                    raise ValueError("Serviço de IA sobrecarregado no momento. Tente novamente em instantes.")
+                raise
+
+            fallbacks.append(f"{cause}_template")
+            observe_llm_degraded("heuristic_fallback")
+            return template_plan
 
-        # 4) modo ai: LLM direto
-        if sql_mode == "ai":
-            print("Vai executar llm")
-            raw_sql = self._llm_client.generate_sql(
-                schema_description=schema_description,
-                question=request.question,
-                top_k=request.top_k,
-                table_identifier=request.table_identifier,
-            )
-            print("Vai sanitizar sql")
-            print(raw_sql)
-            return sanitize_llm_sql(
-                table_fqn=table_fqn,
-                raw_sql_from_llm=raw_sql,
-                top_k=request.top_k,
+    def _generate_llm_sql_plan(
+        self,
+        request: IracemaAskRequestDto,
+        ds,
+        schema_description: str,
+        table_fqn: str,
+        timer: StageTimer,
+    ) -> SqlPlan:
+        # tabelas largas: prompt só com as colunas relevantes para a pergunta
+        if self._schema_linking_service is not None:
+            with timer.stage("schema_linking"):
+                linked = self._schema_linking_service.build_prompts(ds, request.question)
+            if linked is not None:
+                schema_description = linked.prompt_sql
+
+        # pergunta fácil -> modelo pequeno; SQL reprovado na validação escala para o grande
+        routes = ["large"]
+        if self._difficulty_routing:
+            difficulty = classify_question_difficulty(
+                request.question, ds.colunas_tabela, easy_max_score=self._routing_easy_max_score
             )
+            routes = routes_for(difficulty, self._llm_client.supports_route(ROUTE_SMALL))
+
+        for attempt, route in enumerate(routes):
+            start = time.perf_counter()
+            try:
+                with timer.stage("llm_generate"), llm_routing(ds.identificador_tabela):
+                    raw_sql = self._llm_client.generate_sql(
+                        schema_description=schema_description,
+                        question=request.question,
+                        top_k=request.top_k,
+                        table_identifier=request.table_identifier,
+                        route=route,
+                    )
+                with timer.stage("sanitize"):
+                    plan = sanitize_llm_sql(
+                        table_fqn=table_fqn,
+                        raw_sql_from_llm=raw_sql,
+                        top_k=request.top_k,
+                    )
+                    # modelo pequeno: EXPLAIN pega coluna/sintaxe inválida antes de executar
+                    if route == ROUTE_SMALL:
+                        self._validate_sql(plan.sql)
+            except ValueError:
+                escalate = attempt + 1 < len(routes)
+                observe_llm_route(
+                    "sql", route, "escalated" if escalate else "validation_error", time.perf_counter() - start
+                )
+                if not escalate:
+                    raise
+                continue
 
-        raise ValueError(f"sql_mode inválido: {sql_mode}")
+            observe_llm_route("sql", route, "ok", time.perf_counter() - start)
+            return plan
+
+        raise ValueError("Nenhuma rota de modelo disponível para gerar o SQL.")
+
+    def _validate_sql(self, sql: str) -> None:
+        """
+        EXPLAIN (só planeja, não executa): ValueError se o Postgres rejeitar o SQL.
+        """
+        validate_sql_with_explain(self._db_context.engine, sql)
 
     def _index_if_needed(
         self,
@@ -388,16 +769,10 @@ class IracemaAskService(IIracemaAskService):
         duration_ms: float,
         conversation_id: int,
         message_id: int,
+        schema_fingerprint: Optional[str] = None,
+        question_key: Optional[str] = None,
     ) -> None:
-        should_index = (
-            (rowcount > 0)
-            or ("count(" in (sql_executed or "").lower())
-            or ("sum(" in (sql_executed or "").lower())
-        )
-        #print("ShouldIndex")
-        #print(should_index)
-
-        if not should_index:
+        if not is_indexable(sql_executed, rowcount):
             return
 
         self._rag_index_service.index_success(
@@ -409,4 +784,6 @@ class IracemaAskService(IIracemaAskService):
             duration_ms=duration_ms,
             conversation_id=conversation_id,
             message_id=message_id,
+            schema_fingerprint=schema_fingerprint,
+            question_key=question_key,
         )
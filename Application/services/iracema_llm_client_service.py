@@ -7,7 +7,13 @@ from Application.helpers.iracema_prompt_helper import (
     build_explanation_prompt,
 )
 from External.ai.langchain_ollama_provider import LangChainOllamaProvider
+from External.ai.iracema_llm_completion_cache import LLMCompletionCache
+from External.ai.iracema_llm_scheduler import LLMPriority, LLMScheduler
+from External.ai.iracema_ollama_endpoint_pool import OllamaEndpointPool
+from External.ai.iracema_token_counter import TokenCounter
 from Application.dto.iracema_sql_example_dto import IracemaSqlExampleDto
+from Application.helpers.sql_stream_stop_helper import find_sql_end
+from Application.helpers.iracema_example_selection_helper import pack_examples
 
 def build_examples_block(examples: List[IracemaSqlExampleDto]) -> str:
     if not examples:
@@ -25,45 +31,48 @@ def build_examples_block(examples: List[IracemaSqlExampleDto]) -> str:
     return "\n".join(lines)
 
 
-def inject_examples_before_sql(
-    prompt_base: str,
-    examples_block: str | None,
-) -> str:
-    """
-    Injeta o bloco de exemplos imediatamente antes do '### SQL' final.
-    Assume que o prompt_base já contém '### SQL'.
-    """
-    if not examples_block:
-        return prompt_base
-
-    marker = "### SQL"
-    if marker not in prompt_base:
-        raise ValueError("Prompt base não contém marcador '### SQL'")
-
-    before, after = prompt_base.rsplit(marker, 1)
-
-    return (
-        before.rstrip()
-        + "\n\n"
-        + examples_block.strip()
-        + "\n\n"
-        + marker
-        + after
-    )
-    
 class IracemaLLMClient(IIracemaLLMClient):
     def __init__(
         self,
         settings,
         rag_retriever: Optional[IIracemaRagRetrieveService] = None,
+        completion_cache: Optional[LLMCompletionCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        pool: Optional[OllamaEndpointPool] = None,
     ):
         self._rag_retriever = rag_retriever
+        # streaming com corte no fim do primeiro statement (sem gerar explicações descartadas)
+        self._sql_stream_stop = bool(getattr(settings, "LLM_SQL_STREAM_STOP", True))
+
+        # few-shot: candidatos diversos (MMR, sem SQL repetido) dentro de um orçamento de tokens
+        self._examples_max = int(getattr(settings, "RAG_EXAMPLES_MAX", 4))
+        self._examples_fetch_k = int(getattr(settings, "RAG_EXAMPLES_FETCH_K", 16))
+        self._examples_mmr_lambda = float(getattr(settings, "RAG_EXAMPLES_MMR_LAMBDA", 0.5))
+        self._examples_token_budget = int(getattr(settings, "RAG_EXAMPLES_TOKEN_BUDGET", 600))
+        self._examples_token_budget_by_ds = dict(getattr(settings, "RAG_EXAMPLES_TOKEN_BUDGET_BY_DATASOURCE", {}) or {})
+        self._token_counter = TokenCounter(getattr(settings, "RAG_EXAMPLES_TOKENIZER", "") or "")
+
+        def sql_provider(model: str) -> LangChainOllamaProvider:
+            return LangChainOllamaProvider(
+                model=model,
+                base_url=settings.LLM_BASE_URL,
+                temperature=0.0,
+                num_predict=256,
+                cache=completion_cache,
+                keep_alive=getattr(settings, "LLM_KEEP_ALIVE", None),
+                scheduler=scheduler,
+                priority=LLMPriority.GENERATE,
+                pool=pool,
+            )
 
-        self.sql_llm = LangChainOllamaProvider(
-            model=settings.LLM_MODEL_SQL,
-            base_url=settings.LLM_BASE_URL,
-            temperature=0.0,
-            num_predict=256,
+        self.sql_llm = sql_provider(settings.LLM_MODEL_SQL)
+
+        # modelo pequeno para perguntas fáceis (vazio = só o modelo principal)
+        small_model = getattr(settings, "LLM_MODEL_SQL_SMALL", "") or ""
+        self.sql_llm_small = (
+            sql_provider(small_model)
+            if small_model and small_model != settings.LLM_MODEL_SQL
+            else None
         )
 
         self.explainer_llm = LangChainOllamaProvider(
@@ -71,6 +80,11 @@ class IracemaLLMClient(IIracemaLLMClient):
             base_url=settings.LLM_BASE_URL,
             temperature=0.0,
             num_predict=256,
+            cache=completion_cache,
+            keep_alive=getattr(settings, "LLM_KEEP_ALIVE", None),
+            scheduler=scheduler,
+            priority=LLMPriority.EXPLAIN,
+            pool=pool,
         )
 
     def generate_sql(
@@ -79,34 +93,45 @@ class IracemaLLMClient(IIracemaLLMClient):
         question: str,
         top_k: int,
         table_identifier: Optional[str] = None,
+        route: str = "large",
     ) -> str:
-        # 1) prompt base (como você já tinha)
-        print("Vai executar build_sql_generation_prompt")
-        prompt = build_sql_generation_prompt(schema_description, question, top_k)
-
-        # 2) injeta exemplos recuperados (RAG) se disponível
-        print("Vai executar get_similar_sql_examples")
+        # 1) exemplos recuperados (RAG) se disponível
+        examples_block = ""
         if self._rag_retriever and table_identifier:
-            examples = self._rag_retriever.get_similar_sql_examples(
-                table_identifier=table_identifier,
-                question=question,
-                k=4,
-            )
-            
-            print("Vai executar build_examples_block")
+            examples = self._select_examples(table_identifier, question)
             examples_block = build_examples_block(examples)
 
-            print("Vai executar inject_examples_before_sql")
-            prompt = inject_examples_before_sql(
-                prompt_base=prompt,
-                examples_block=examples_block,
-            )
+        # 2) prompt: esquema (prefixo estável) -> exemplos -> pergunta
+        prompt = build_sql_generation_prompt(
+            schema_description,
+            question,
+            top_k,
+            examples_block=examples_block,
+        )
 
-        print("Vai executar mandar prompt para llm")
-        
-        print(prompt)
+        llm = self.sql_llm_small if route == "small" and self.sql_llm_small is not None else self.sql_llm
+        if self._sql_stream_stop:
+            return llm.stream_until(prompt, find_sql_end)
+        return llm.invoke(prompt)
+
+    def _select_examples(self, table_identifier: str, question: str) -> List[IracemaSqlExampleDto]:
+        candidates = self._rag_retriever.get_diverse_sql_examples(
+            table_identifier=table_identifier,
+            question=question,
+            fetch_k=max(self._examples_fetch_k, self._examples_max),
+            lambda_mult=self._examples_mmr_lambda,
+        )
+        budget = int(self._examples_token_budget_by_ds.get(table_identifier, self._examples_token_budget))
+        return pack_examples(
+            candidates,
+            render=build_examples_block,
+            count_tokens=self._token_counter.count,
+            token_budget=budget,
+            max_examples=self._examples_max,
+        )
 
-        return self.sql_llm.invoke(prompt)
+    def supports_route(self, route: str) -> bool:
+        return route == "large" or (route == "small" and self.sql_llm_small is not None)
 
     def explain_result(
         self,
@@ -115,8 +140,9 @@ class IracemaLLMClient(IIracemaLLMClient):
         sql_executed: str,
         rows: list,
         rowcount: int,
+        summary: Optional[str] = None,
     ) -> str:
         prompt = build_explanation_prompt(
-            schema_description, question, sql_executed, rows, rowcount
+            schema_description, question, sql_executed, rows, rowcount, summary=summary
         )
         return self.explainer_llm.invoke(prompt)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+from Data.db_context import DbContext
+from Domain.interfaces.i_iracema_llm_call_log_repository import IIracemaLLMCallLogRepository
+
+from Application.dto.iracema_llm_usage_dto import (
+    IracemaLLMUsageStatsItemDto,
+    IracemaLLMUsageStatsResponseDto,
+)
+from Application.interfaces.i_iracema_llm_usage_service import IIracemaLLMUsageService
+
+
+class IracemaLLMUsageService(IIracemaLLMUsageService):
+    def __init__(
+        self,
+        db_context: DbContext,
+        llm_call_log_repo: IIracemaLLMCallLogRepository,
+    ) -> None:
+        self._db_context = db_context
+        self._llm_call_log_repo = llm_call_log_repo
+
+    def stats(
+        self,
+        since_hours: Optional[float] = 24.0,
+        group_by: Sequence[str] = ("model", "datasource", "mode"),
+        include_cache_hits: bool = False,
+    ) -> IracemaLLMUsageStatsResponseDto:
+        # created_at é gravado em UTC (datetime.utcnow)
+        since = datetime.utcnow() - timedelta(hours=since_hours) if since_hours else None
+        session = self._db_context.create_session()
+        try:
+            rows = self._llm_call_log_repo.aggregate_stats(
+                session=session,
+                since=since,
+                group_by=list(group_by),
+                include_cache_hits=include_cache_hits,
+            )
+        finally:
+            session.close()
+
+        return IracemaLLMUsageStatsResponseDto(
+            since=since,
+            group_by=list(group_by),
+            include_cache_hits=include_cache_hits,
+            items=[IracemaLLMUsageStatsItemDto(**row) for row in rows],
+        )
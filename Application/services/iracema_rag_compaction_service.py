@@ -0,0 +1,134 @@
+# Application/services/iracema_rag_compaction_service.py
+
+import time
+from collections import Counter
+
+from Data.db_context import DbContext
+from Domain.interfaces.i_iracema_datasource_repository import IIracemaDataSourceRepository
+from External.metrics.iracema_prometheus_metrics import observe_rag_compaction
+from External.vector.vector_store_base import VectorStoreBase
+
+from Application.dto.iracema_rag_compaction_dto import IracemaRagCompactionReportDto, IracemaRagRekeyReportDto
+from Application.helpers.iracema_plan_cache_helper import cached_plan_is_valid
+from Application.helpers.iracema_rag_compaction_helper import plan_rag_compaction
+from Application.helpers.iracema_schema_fingerprint_helper import schema_fingerprint
+from Application.helpers.iracema_text_normalize_helper import QUESTION_KEY_PREFIX, question_cache_key
+from Application.interfaces.i_iracema_rag_compaction_service import IIracemaRagCompactionService
+
+_REKEY_BATCH = 500
+
+
+class IracemaRagCompactionService(IIracemaRagCompactionService):
+    """
+    Compactação da memória RAG (exemplos Pergunta -> SQL):
+    - remove exemplos de datasources desativadas ou com schema alterado
+      (exceto os com plano estruturado que ainda valida no schema novo)
+    - mantém o melhor exemplo por (tabela, pergunta normalizada)
+    - limita a quantidade de exemplos por tabela
+    - re-chaveia question_norm quando a canonicalização (versão) ou os
+      sinônimos de coluna mudam
+    """
+
+    def __init__(
+        self,
+        db_context: DbContext,
+        datasource_repo: IIracemaDataSourceRepository,
+        vector_store: VectorStoreBase,
+        max_per_table: int = 200,
+    ) -> None:
+        self._db_context = db_context
+        self._datasource_repo = datasource_repo
+        self._vs = vector_store
+        self._max_per_table = int(max_per_table)
+
+    def compact(self, dry_run: bool = False) -> IracemaRagCompactionReportDto:
+        start = time.perf_counter()
+
+        session = self._db_context.create_session()
+        try:
+            active_columns = {
+                ds.identificador_tabela: ds.colunas_tabela
+                for ds in self._datasource_repo.list_all(session=session)
+                if ds.is_ativo
+            }
+        finally:
+            session.close()
+        active = {table: schema_fingerprint(cols) for table, cols in active_columns.items()}
+
+        size_before = self._vs.count()
+        entries = self._vs.list_entries(where={"type": "qa_sql"})
+
+        # schema mudou, mas o plano guardado ainda valida: é recompilado no hit
+        replannable = {
+            doc_id
+            for doc_id, meta in entries
+            if meta.get("plan_json")
+            and meta.get("schema_fp")
+            and meta.get("table_identifier") in active
+            and meta["schema_fp"] != active[meta["table_identifier"]]
+            and cached_plan_is_valid(meta, active_columns[meta["table_identifier"]])
+        }
+        removed = plan_rag_compaction(entries, active, self._max_per_table, replannable_ids=replannable)
+
+        ids = [doc_id for group in removed.values() for doc_id in group]
+        if ids and not dry_run:
+            self._vs.delete(ids)
+
+        size_after = size_before - len(ids) if dry_run else self._vs.count()
+        counts = {reason: len(group) for reason, group in removed.items()}
+        if not dry_run:
+            observe_rag_compaction(getattr(self._vs, "collection_name", ""), size_after, counts)
+
+        return IracemaRagCompactionReportDto(
+            collection=getattr(self._vs, "collection_name", ""),
+            dry_run=dry_run,
+            size_before=size_before,
+            size_after=size_after,
+            removed=counts,
+            removed_total=len(ids),
+            duration_ms=(time.perf_counter() - start) * 1000.0,
+        )
+
+    def rekey(self, dry_run: bool = False) -> IracemaRagRekeyReportDto:
+        start = time.perf_counter()
+
+        session = self._db_context.create_session()
+        try:
+            columns_by_table = {
+                ds.identificador_tabela: ds.colunas_tabela
+                for ds in self._datasource_repo.list_all(session=session)
+            }
+        finally:
+            session.close()
+
+        entries = self._vs.list_entries(where={"type": "qa_sql"})
+        ids, metadatas = [], []
+        rekeyed: Counter = Counter()
+        skipped = 0
+        for doc_id, meta in entries:
+            question = str(meta.get("question_raw") or "").strip()
+            if not question:
+                skipped += 1
+                continue
+            old_key = str(meta.get("question_norm") or "")
+            new_key = question_cache_key(question, columns_by_table.get(meta.get("table_identifier")))
+            if new_key == old_key:
+                continue
+            rekeyed["columns" if old_key.startswith(QUESTION_KEY_PREFIX) else "key_version"] += 1
+            ids.append(doc_id)
+            metadatas.append({**meta, "question_norm": new_key})
+
+        if not dry_run:
+            # só metadados: os embeddings (do documento) não mudam
+            for i in range(0, len(ids), _REKEY_BATCH):
+                self._vs.update_metadatas(ids[i : i + _REKEY_BATCH], metadatas[i : i + _REKEY_BATCH])
+
+        return IracemaRagRekeyReportDto(
+            collection=getattr(self._vs, "collection_name", ""),
+            dry_run=dry_run,
+            scanned=len(entries),
+            rekeyed=dict(rekeyed),
+            rekeyed_total=len(ids),
+            skipped=skipped,
+            duration_ms=(time.perf_counter() - start) * 1000.0,
+        )
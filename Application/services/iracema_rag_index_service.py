@@ -1,22 +1,14 @@
 # Application/services/iracema_rag_index_service.py
 
-import hashlib
-from datetime import datetime
 from typing import Optional
 
 from Application.interfaces.i_iracema_rag_index_service import IIracemaRagIndexService
-from External.vector.chromadb_vector_store import ChromaDBVectorStore
-from Application.helpers.iracema_text_normalize_helper import normalize_question
-
-
-
-def _stable_id(table_identifier: str, question: str, sql: str) -> str:
-    raw = f"{table_identifier}||{question.strip()}||{sql.strip()}".encode("utf-8")
-    return hashlib.sha1(raw).hexdigest()
+from External.vector.vector_store_base import VectorStoreBase
+from Application.helpers.iracema_rag_entry_helper import build_rag_entry
 
 
 class IracemaRagIndexService(IIracemaRagIndexService):
-    def __init__(self, vector_store: ChromaDBVectorStore):
+    def __init__(self, vector_store: VectorStoreBase):
         self._vs = vector_store
 
     def index_success(
@@ -29,25 +21,27 @@ class IracemaRagIndexService(IIracemaRagIndexService):
         duration_ms: float,
         conversation_id: Optional[int] = None,
         message_id: Optional[int] = None,
+        schema_fingerprint: Optional[str] = None,
+        question_key: Optional[str] = None,
+        plan_kind: Optional[str] = None,
+        plan_json: Optional[str] = None,
     ) -> None:
-        doc = (
-            f"[TABLE={table_identifier}]\n"
-            f"Pergunta: {question.strip()}\n"
-            f"SQL:\n{sql_executed.strip()}\n"
+        """
+        question_key: chave canônica já calculada com as colunas da datasource
+        (a mesma da busca exata); sem ela, canonicaliza sem sinônimos de coluna.
+        plan_kind/plan_json: plano estruturado (query_plan | fca) que gerou o SQL;
+        no cache-hit ele é recompilado no schema atual.
+        """
+        doc_id, doc, meta = build_rag_entry(
+            table_identifier=table_identifier,
+            question=question,
+            sql_executed=sql_executed,
+            rowcount=rowcount,
+            reason=reason,
+            duration_ms=duration_ms,
+            schema_fingerprint=schema_fingerprint,
+            question_key=question_key,
+            plan_kind=plan_kind,
+            plan_json=plan_json,
         )
-
-        meta = {
-            "type": "qa_sql",
-            "question_norm": normalize_question(question),
-            "question_raw": question.strip(),
-            "table_identifier": table_identifier,
-            "rowcount": int(rowcount),
-            "reason": str(reason),
-            "duration_ms": float(duration_ms),
-            #"conversation_id": int(conversation_id) if conversation_id is not None else None,
-            #"message_id": int(message_id) if message_id is not None else None,
-            "created_at": datetime.utcnow().isoformat() + "Z",
-        }
-
-        doc_id = _stable_id(table_identifier, question, sql_executed)
         self._vs.add_texts(texts=[doc], metadatas=[meta], ids=[doc_id])
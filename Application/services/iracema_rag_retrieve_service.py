@@ -5,9 +5,17 @@ import re
 from typing import List, Optional
 from Application.dto.iracema_sql_example_dto import IracemaSqlExampleDto
 from Application.interfaces.i_iracema_rag_retrieve_service import IIracemaRagRetrieveService
-from External.vector.chromadb_vector_store import ChromaDBVectorStore
-from Application.helpers.iracema_text_normalize_helper import normalize_question
+from External.vector.vector_store_base import VectorStoreBase
+from Application.helpers.iracema_text_normalize_helper import question_cache_key
+from Application.helpers.iracema_example_selection_helper import mmr_order, sql_shape
+from Application.helpers.iracema_lexical_search_helper import BM25Index, reciprocal_rank_fusion
+from Application.helpers.iracema_near_duplicate_helper import rewrite_near_duplicate
+from Application.dto.iracema_near_duplicate_dto import IracemaNearDuplicateHitDto
+from Application.dto.iracema_rag_exact_hit_dto import IracemaRagExactHitDto
 from typing import List, Optional
+import threading
+
+from cachetools import TTLCache
 
 _QUESTION_RE = re.compile(r"Pergunta:\s*(.*)", re.IGNORECASE)
 _SQL_MARKER = "\nSQL:\n"
@@ -31,22 +39,77 @@ def _parse_example(doc: str) -> Optional[IracemaSqlExampleDto]:
 
     return IracemaSqlExampleDto(question=question, sql=sql)
 class IracemaRagRetrieveService(IIracemaRagRetrieveService):
-    def __init__(self, vector_store: ChromaDBVectorStore):
+    """
+    Recuperação de exemplos Pergunta -> SQL por tabela.
+
+    Híbrida (padrão): BM25 sobre as perguntas sem acento (palavras + trigramas)
+    e similaridade de embedding, combinados por reciprocal rank fusion. O
+    lexical pega perguntas que só diferem num valor ("em Caucaia" x "em Sobral"),
+    onde o MiniLM (inglês) quase não distingue.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStoreBase,
+        hybrid: bool = True,
+        rrf_k: int = 60,
+        lexical_cache_ttl_secs: int = 300,
+        lexical_cache_max_tables: int = 256,
+    ):
         self._vs = vector_store
+        self._hybrid = bool(hybrid)
+        self._rrf_k = int(rrf_k)
+        # índice BM25 por tabela (reconstruído após o TTL: absorve novos exemplos/compactação)
+        self._lexical_cache: TTLCache = TTLCache(maxsize=lexical_cache_max_tables, ttl=lexical_cache_ttl_secs)
+        self._lock = threading.Lock()
+
+    def _lexical_index(self, table_identifier: str) -> BM25Index:
+        with self._lock:
+            if table_identifier in self._lexical_cache:
+                return self._lexical_cache[table_identifier]
+
+        entries = self._vs.list_entries(
+            where={"$and": [{"type": "qa_sql"}, {"table_identifier": table_identifier}]}
+        )
+        index = BM25Index(
+            (doc_id, str(meta.get("question_raw") or meta.get("question_norm") or ""))
+            for doc_id, meta in entries
+        )
+        with self._lock:
+            self._lexical_cache[table_identifier] = index
+        return index
 
-    def get_similar_sql_examples(self, table_identifier: str, question: str, k: int = 4) -> List[IracemaSqlExampleDto]:
+    def _search_docs(self, table_identifier: str, question: str, k: int):
+        # filtro por tabela antes de qualquer distância (where no vector store, índice lexical por tabela)
         where = {
             "$and": [
                 {"type": "qa_sql"},
                 {"table_identifier": table_identifier},
             ]
         }
+        window = max(2 * int(k), 10) if self._hybrid else int(k)
 
-        docs = self._vs.similarity_search(
+        vector_docs = self._vs.similarity_search(
             query=f"[TABLE={table_identifier}] {question}",
-            k=int(k),
+            k=window,
             where=where,
+        ) or []
+        if not self._hybrid:
+            return vector_docs
+
+        lexical_hits = self._lexical_index(table_identifier).search(question, k=window)
+        lexical_docs = self._vs.get_by_ids([doc_id for doc_id, _ in lexical_hits]) if lexical_hits else []
+
+        # mesmo id => mesmo conteúdo: funde pelo texto do documento
+        by_content = {d.page_content: d for d in list(vector_docs) + list(lexical_docs)}
+        fused = reciprocal_rank_fusion(
+            [[d.page_content for d in vector_docs], [d.page_content for d in lexical_docs]],
+            k0=self._rrf_k,
         )
+        return [by_content[content] for content, _ in fused[: int(k)]]
+
+    def get_similar_sql_examples(self, table_identifier: str, question: str, k: int = 4) -> List[IracemaSqlExampleDto]:
+        docs = self._search_docs(table_identifier, question, k)
 
         examples: List[IracemaSqlExampleDto] = []
         for d in (docs or []):
@@ -56,32 +119,116 @@ class IracemaRagRetrieveService(IIracemaRagRetrieveService):
 
         return examples
 
-    def try_get_exact_sql(self, table_identifier: str, question: str) -> Optional[str]:
-        qn = normalize_question(question)
+    def get_diverse_sql_examples(
+        self,
+        table_identifier: str,
+        question: str,
+        fetch_k: int = 16,
+        lambda_mult: float = 0.5,
+    ) -> List[IracemaSqlExampleDto]:
+        """
+        Busca fetch_k candidatos, remove os que repetem a mesma forma de SQL
+        (fica o mais similar) e reordena por MMR (relevância x diversidade).
+        """
+        candidates = self.get_similar_sql_examples(table_identifier, question, k=fetch_k)
+
+        unique: List[IracemaSqlExampleDto] = []
+        seen_shapes = set()
+        for ex in candidates:
+            shape = sql_shape(ex.sql)
+            if shape in seen_shapes:
+                continue
+            seen_shapes.add(shape)
+            unique.append(ex)
+
+        if len(unique) <= 1:
+            return unique
+
+        vectors = self._vs.embed_texts(
+            [f"[TABLE={table_identifier}] {question}"]
+            + [f"{ex.question}\n{ex.sql}" for ex in unique]
+        )
+        order = mmr_order(vectors[0], vectors[1:], lambda_mult=lambda_mult)
+        return [unique[i] for i in order]
+
+    def try_get_near_duplicate_sql(
+        self,
+        table_identifier: str,
+        question: str,
+        columns_meta: List[dict],
+        min_similarity: float = 0.5,
+        candidates: int = 3,
+    ) -> Optional[IracemaNearDuplicateHitDto]:
+        """
+        Pergunta quase igual já respondida (paráfrase ou um slot de valor/coluna
+        trocado): devolve o SQL dela com o slot substituído. Sem validação aqui:
+        quem chama revalida o SQL reescrito.
+        """
+        for doc in self._search_docs(table_identifier, question, candidates):
+            ex = _parse_example(doc.page_content or "")
+            if ex is None:
+                continue
+            rewrite = rewrite_near_duplicate(
+                cached_question=ex.question,
+                cached_sql=ex.sql,
+                question=question,
+                columns_meta=columns_meta,
+                min_similarity=min_similarity,
+            )
+            if rewrite is not None:
+                return IracemaNearDuplicateHitDto(
+                    sql=rewrite.sql,
+                    source_question=ex.question,
+                    kind=rewrite.kind,
+                    similarity=rewrite.similarity,
+                    old_value=rewrite.old_value,
+                    new_value=rewrite.new_value,
+                )
+        return None
 
-        where = {
-            "type": "qa_sql",
-            "table_identifier": table_identifier,
-            "question_norm": qn,
-        }
+    def try_get_exact_hit(
+        self,
+        table_identifier: str,
+        question: str,
+        columns_meta: Optional[List[dict]] = None,
+    ) -> Optional[IracemaRagExactHitDto]:
+        qn = question_cache_key(question, columns_meta)
 
         docs = self._vs.similarity_search(
             query=f"[TABLE={table_identifier}] {question}",
-                k=1,
-                where={
-                    "$and": [
-                        {"type": "qa_sql"},
-                        {"table_identifier": table_identifier},
-                        {"question_norm": qn},
-                    ]
-                },
+            k=3,
+            where={
+                "$and": [
+                    {"type": "qa_sql"},
+                    {"table_identifier": table_identifier},
+                    {"question_norm": qn},
+                ]
+            },
         )
 
-        if not docs:
-            return None
+        # mesma chave com e sem plano (indexado antes do plano): prefere o com plano
+        for doc in sorted(docs, key=lambda d: not (d.metadata or {}).get("plan_json")):
+            sql = self._extract_sql_from_doc(doc.page_content or "")
+            if not sql:
+                continue
+            meta = doc.metadata or {}
+            return IracemaRagExactHitDto(
+                sql=sql,
+                source_question=str(meta.get("question_raw") or ""),
+                plan_kind=meta.get("plan_kind"),
+                plan_json=meta.get("plan_json"),
+                schema_fp=meta.get("schema_fp"),
+            )
+        return None
 
-        content = docs[0].page_content or ""
-        return self._extract_sql_from_doc(content)
+    def try_get_exact_sql(
+        self,
+        table_identifier: str,
+        question: str,
+        columns_meta: Optional[List[dict]] = None,
+    ) -> Optional[str]:
+        hit = self.try_get_exact_hit(table_identifier, question, columns_meta)
+        return hit.sql if hit is not None else None
 
     def _extract_sql_from_doc(self, content: str) -> Optional[str]:
         # extrai trecho depois de "SQL:"
@@ -0,0 +1,156 @@
+# Application/services/iracema_schema_linking_service.py
+
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+from cachetools import TTLCache
+from sqlalchemy import text
+
+from Data.db_context import DbContext
+from Domain.datasource_model import DataSource
+from Domain.interfaces.i_iracema_sql_log_repository import IIracemaSQLLogRepository
+
+from Application.dto.iracema_schema_prompt_dto import IracemaSchemaPromptDto
+from Application.interfaces.i_iracema_schema_linking_service import IIracemaSchemaLinkingService
+from Application.helpers.iracema_table_name_helper import build_table_fqn
+from Application.helpers.iracema_schema_prompt_builder_helper import (
+    build_prompt_inicial,
+    build_prompt_inicial_fc,
+)
+from Application.helpers.iracema_schema_linking_helper import (
+    build_value_index,
+    column_embedding_text,
+    count_column_usage,
+    embedding_scores_for,
+    parse_pg_array_text,
+    score_columns,
+    select_columns,
+)
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+# Histórico de SQL considerado no sinal de uso
+_USAGE_SQL_LIMIT = 500
+
+
+class IracemaSchemaLinkingService(IIracemaSchemaLinkingService):
+    """
+    Schema linking: poda o prompt às colunas relevantes para a pergunta.
+
+    Sinais: nome/descrição da coluna (lexical), similaridade de embedding,
+    valores frequentes (pg_stats) citados na pergunta e frequência de uso no iracema_sql_log.
+    Só atua em tabelas com pelo menos `min_columns` colunas; abaixo disso o prompt
+    armazenado (prefixo estável por datasource) é mais barato que a poda.
+    """
+
+    def __init__(
+        self,
+        db_context: DbContext,
+        sql_log_repo: IIracemaSQLLogRepository,
+        embed_fn: Optional[EmbedFn] = None,
+        top_n: int = 25,
+        min_columns: int = 30,
+        cache_ttl_secs: int = 900,
+        cache_max_tables: int = 256,
+    ) -> None:
+        self._db_context = db_context
+        self._sql_log_repo = sql_log_repo
+        self._embed_fn = embed_fn
+        self._top_n = int(top_n)
+        self._min_columns = int(min_columns)
+
+        # por tabela: uso histórico, valores frequentes e vetores das colunas
+        self._usage_cache: TTLCache = TTLCache(maxsize=cache_max_tables, ttl=cache_ttl_secs)
+        self._values_cache: TTLCache = TTLCache(maxsize=cache_max_tables, ttl=cache_ttl_secs)
+        self._vectors_cache: TTLCache = TTLCache(maxsize=cache_max_tables, ttl=cache_ttl_secs)
+        self._lock = threading.Lock()
+
+    def build_prompts(self, ds: DataSource, question: str) -> Optional[IracemaSchemaPromptDto]:
+        columns_meta: List[Dict] = list(ds.colunas_tabela or [])
+        non_geom = [c for c in columns_meta if c.get("name") and not c.get("is_geometry")]
+        if len(non_geom) < self._min_columns or len(non_geom) <= self._top_n:
+            return None
+
+        ident = (ds.identificador_tabela or "").strip()
+        names = [str(c.get("name")).strip() for c in non_geom]
+
+        scores = score_columns(
+            question=question,
+            columns_meta=columns_meta,
+            usage_counts=self._get_usage(ident, names),
+            value_index=self._get_value_index(ident),
+            embedding_scores=self._get_embedding_scores(ident, non_geom, question),
+        )
+        selected = select_columns(columns_meta, scores, self._top_n)
+
+        table_fqn = build_table_fqn(ident)
+        return IracemaSchemaPromptDto(
+            prompt_sql=build_prompt_inicial(table_fqn, selected),
+            prompt_fc=build_prompt_inicial_fc(table_fqn, selected),
+            columns=[str(c.get("name")) for c in selected],
+        )
+
+    # -------------------------------------------------------------------------
+    # Sinais (cacheados por tabela)
+    # -------------------------------------------------------------------------
+
+    def _cached(self, cache: TTLCache, key: str, loader: Callable[[], object]):
+        with self._lock:
+            if key in cache:
+                return cache[key]
+        value = loader()
+        with self._lock:
+            cache[key] = value
+        return value
+
+    def _get_usage(self, ident: str, names: List[str]):
+        def load():
+            session = self._db_context.create_session()
+            try:
+                sqls = self._sql_log_repo.list_recent_success_sql(session, ident, limit=_USAGE_SQL_LIMIT)
+            finally:
+                session.close()
+            return count_column_usage(sqls, names)
+
+        return self._cached(self._usage_cache, ident, load)
+
+    def _get_value_index(self, ident: str):
+        def load():
+            table_fqn = build_table_fqn(ident)
+            schema = table_fqn.split(".", 1)[0].strip('"')
+            table = table_fqn.split(".", 1)[1].strip('"')
+            with self._db_context.engine.connect() as connection:
+                result = connection.execute(
+                    text(
+                        """
+                        SELECT attname, most_common_vals::text
+                        FROM pg_stats
+                        WHERE schemaname = :schema AND tablename = :table
+                          AND most_common_vals IS NOT NULL
+                        """
+                    ),
+                    {"schema": schema, "table": table},
+                )
+                values = {row[0]: parse_pg_array_text(row[1]) for row in result.fetchall()}
+            return build_value_index(values)
+
+        try:
+            return self._cached(self._values_cache, ident, load)
+        except Exception:
+            # pg_stats indisponível (sem ANALYZE/permissão): segue sem o sinal de valores
+            return {}
+
+    def _get_embedding_scores(self, ident: str, cols: List[Dict], question: str) -> Dict[str, float]:
+        if self._embed_fn is None:
+            return {}
+
+        def load():
+            vectors = self._embed_fn([column_embedding_text(c) for c in cols])
+            return {str(c.get("name")).strip(): v for c, v in zip(cols, vectors)}
+
+        try:
+            column_vectors: Dict[str, Sequence[float]] = self._cached(self._vectors_cache, ident, load)
+            question_vector = self._embed_fn([question])[0]
+        except Exception:
+            return {}
+        return embedding_scores_for(question_vector, column_vectors)
@@ -0,0 +1,80 @@
+# Data/repositories/iracema_llm_call_log_repository.py
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.orm import Session
+
+from Data.db_context import DbContext
+from Domain.iracema_llm_call_log_model import IracemaLLMCallLog
+from Domain.interfaces.i_iracema_llm_call_log_repository import IIracemaLLMCallLogRepository
+
+_GROUP_COLUMNS = {
+    "model": IracemaLLMCallLog.model,
+    "kind": IracemaLLMCallLog.kind,
+    "datasource": IracemaLLMCallLog.datasource,
+    "mode": IracemaLLMCallLog.mode,
+}
+
+# métricas com p50/p95
+_PERCENTILE_COLUMNS = {
+    "wall_ms": IracemaLLMCallLog.wall_ms,
+    "load_ms": IracemaLLMCallLog.load_ms,
+    "prompt_eval_ms": IracemaLLMCallLog.prompt_eval_ms,
+    "eval_ms": IracemaLLMCallLog.eval_ms,
+    "prompt_tokens": IracemaLLMCallLog.prompt_tokens,
+    "eval_tokens": IracemaLLMCallLog.eval_tokens,
+}
+
+
+class IracemaLLMCallLogRepository(IIracemaLLMCallLogRepository):
+    def __init__(self, db_context: DbContext):
+        self._db_context = db_context
+
+    def ensure_table(self) -> None:
+        IracemaLLMCallLog.__table__.create(bind=self._db_context.engine, checkfirst=True)
+
+    def add_calls(
+        self,
+        session: Session,
+        calls: List[IracemaLLMCallLog],
+    ) -> None:
+        if not calls:
+            return
+        session.add_all(calls)
+        session.commit()
+
+    def aggregate_stats(
+        self,
+        session: Session,
+        since: Optional[datetime] = None,
+        group_by: Sequence[str] = ("model", "datasource", "mode"),
+        include_cache_hits: bool = False,
+    ) -> List[Dict[str, Any]]:
+        unknown = [g for g in group_by if g not in _GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"group_by inválido: {', '.join(unknown)}")
+
+        group_cols = [_GROUP_COLUMNS[g].label(g) for g in group_by]
+        metric_cols = [
+            func.count(IracemaLLMCallLog.id).label("calls"),
+            func.sum(cast(IracemaLLMCallLog.cache_hit, Integer)).label("cache_hits"),
+            func.sum(IracemaLLMCallLog.prompt_tokens).label("prompt_tokens_total"),
+            func.sum(IracemaLLMCallLog.eval_tokens).label("eval_tokens_total"),
+        ]
+        for name, col in _PERCENTILE_COLUMNS.items():
+            metric_cols.append(func.percentile_cont(0.5).within_group(col.asc()).label(f"{name}_p50"))
+            metric_cols.append(func.percentile_cont(0.95).within_group(col.asc()).label(f"{name}_p95"))
+
+        query = session.query(*group_cols, *metric_cols)
+        if since is not None:
+            query = query.filter(IracemaLLMCallLog.created_at >= since)
+        if not include_cache_hits:
+            # cache-hit não chega ao Ollama: distorceria p50/p95 de latência
+            query = query.filter(IracemaLLMCallLog.cache_hit.is_(False))
+        if group_by:
+            query = query.group_by(*[_GROUP_COLUMNS[g] for g in group_by])
+        query = query.order_by(func.count(IracemaLLMCallLog.id).desc())
+
+        return [dict(row._mapping) for row in query.all()]
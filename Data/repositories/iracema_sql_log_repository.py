@@ -1,13 +1,16 @@
 # Data/repositories/iracema_sql_log_repository.py
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import asc
+from sqlalchemy import and_, asc, desc, func, or_
 from sqlalchemy.orm import Session
 
 from Data.db_context import DbContext
 from Domain.iracema_sql_log_model import IracemaSQLLog
+from Domain.iracema_llm_call_log_model import IracemaLLMCallLog
+from Domain.iracema_message_model import IracemaMessage
 from Domain.iracema_enums import (
     LLMProviderEnum,
     LLMModelEnum,
@@ -60,3 +63,56 @@ class IracemaSQLLogRepository(IIracemaSQLLogRepository):
             .order_by(asc(IracemaSQLLog.created_at))
         )
         return query.all()
+
+    def list_recent_success_sql(
+        self,
+        session: Session,
+        table_fragment: str,
+        limit: int = 500,
+    ) -> List[str]:
+        query = (
+            session.query(IracemaSQLLog.sql_text)
+            .filter(IracemaSQLLog.status == QueryStatusEnum.SUCCESS)
+            .filter(IracemaSQLLog.sql_text.ilike(f"%{table_fragment}%"))
+            .order_by(desc(IracemaSQLLog.created_at))
+            .limit(int(limit))
+        )
+        return [row[0] for row in query.all()]
+
+    def list_success_for_rag(
+        self,
+        session: Session,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        until: Optional[datetime] = None,
+        limit: int = 1000,
+    ) -> List[Any]:
+        datasource = (
+            session.query(func.max(IracemaLLMCallLog.datasource))
+            .filter(IracemaLLMCallLog.sql_log_id == IracemaSQLLog.id)
+            .correlate(IracemaSQLLog)
+            .scalar_subquery()
+        )
+        query = (
+            session.query(
+                IracemaSQLLog.id,
+                IracemaSQLLog.created_at,
+                IracemaSQLLog.sql_text,
+                IracemaSQLLog.rowcount,
+                IracemaSQLLog.duration_ms,
+                IracemaSQLLog.error_message,
+                IracemaMessage.content.label("question"),
+                datasource.label("datasource"),
+            )
+            .join(IracemaMessage, IracemaMessage.id == IracemaSQLLog.message_id)
+            .filter(IracemaSQLLog.status == QueryStatusEnum.SUCCESS)
+        )
+        if after is not None:
+            created_at, log_id = after
+            query = query.filter(or_(
+                IracemaSQLLog.created_at > created_at,
+                and_(IracemaSQLLog.created_at == created_at, IracemaSQLLog.id > log_id),
+            ))
+        if until is not None:
+            query = query.filter(IracemaSQLLog.created_at <= until)
+        query = query.order_by(asc(IracemaSQLLog.created_at), asc(IracemaSQLLog.id)).limit(int(limit))
+        return query.all()
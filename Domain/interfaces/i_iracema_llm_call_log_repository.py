@@ -0,0 +1,33 @@
+# Domain/interfaces/i_iracema_llm_call_log_repository.py
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from Domain.iracema_llm_call_log_model import IracemaLLMCallLog
+
+
+class IIracemaLLMCallLogRepository(ABC):
+    @abstractmethod
+    def ensure_table(self) -> None:
+        """Cria a tabela iracema_llm_call_log (e índices) se ainda não existir."""
+
+    @abstractmethod
+    def add_calls(
+        self,
+        session: Session,
+        calls: List[IracemaLLMCallLog],
+    ) -> None:
+        """Registra as chamadas ao LLM de uma entrada do iracema_sql_log."""
+
+    @abstractmethod
+    def aggregate_stats(
+        self,
+        session: Session,
+        since: Optional[datetime] = None,
+        group_by: Sequence[str] = ("model", "datasource", "mode"),
+        include_cache_hits: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """p50/p95 de latência e tokens por grupo (model/kind/datasource/mode)."""
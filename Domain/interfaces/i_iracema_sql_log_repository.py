@@ -1,7 +1,8 @@
 # Data/interfaces/i_iracema_sql_log_repository.py
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
 from uuid import UUID
 
 from sqlalchemy.orm import Session
@@ -38,3 +39,27 @@ class IIracemaSQLLogRepository(ABC):
         conversation_id: UUID,
     ) -> List[IracemaSQLLog]:
         """Lista todos os logs de SQL associados a uma conversa."""
+
+    @abstractmethod
+    def list_recent_success_sql(
+        self,
+        session: Session,
+        table_fragment: str,
+        limit: int = 500,
+    ) -> List[str]:
+        """Lista os SQLs executados com sucesso mais recentes que citam a tabela."""
+
+    @abstractmethod
+    def list_success_for_rag(
+        self,
+        session: Session,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        until: Optional[datetime] = None,
+        limit: int = 1000,
+    ) -> List[Any]:
+        """
+        Logs de sucesso com a pergunta do usuário, em ordem (created_at, id) a partir
+        de `after` (paginação por chave), até `until`. Cada linha: id, created_at,
+        sql_text, rowcount, duration_ms, error_message, question, datasource
+        (identificador_tabela do iracema_llm_call_log; None se não houve chamada ao LLM).
+        """
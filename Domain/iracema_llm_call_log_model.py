@@ -0,0 +1,91 @@
+# Domain/iracema_llm_call_log_model.py
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from Data.db_context import Base
+
+
+class IracemaLLMCallLog(Base):
+    """
+    Uma chamada ao LLM feita para atender uma entrada do iracema_sql_log.
+    """
+
+    __tablename__ = "iracema_llm_call_log"
+    __table_args__ = (
+        Index("ix_iracema_llm_call_log_sql_log_id", "sql_log_id"),
+        Index("ix_iracema_llm_call_log_created_at", "created_at"),
+    )
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        nullable=False,
+    )
+
+    sql_log_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("iracema_sql_log.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    model = Column(
+        String(128),
+        nullable=False,
+        doc="Nome do modelo no Ollama (ex.: sqlcoder:7b).",
+    )
+
+    kind = Column(
+        String(32),
+        nullable=False,
+        doc="Finalidade da chamada: generate (SQL/plano FC) ou explain.",
+    )
+
+    datasource = Column(
+        String(255),
+        nullable=True,
+        doc="identificador_tabela da requisição.",
+    )
+
+    mode = Column(
+        String(32),
+        nullable=True,
+        doc="Modo do pipeline: default, ai, heuristic, fc, fc_args, fc_batch.",
+    )
+
+    cache_hit = Column(Boolean, nullable=False, default=False)
+
+    prompt_tokens = Column(Integer, nullable=True)
+    eval_tokens = Column(Integer, nullable=True)
+
+    load_ms = Column(Float, nullable=True, doc="Carga do modelo no Ollama.")
+    prompt_eval_ms = Column(Float, nullable=True, doc="Avaliação do prompt no Ollama.")
+    eval_ms = Column(Float, nullable=True, doc="Geração dos tokens no Ollama.")
+    total_ms = Column(Float, nullable=True, doc="Duração total reportada pelo Ollama.")
+    wall_ms = Column(
+        Float,
+        nullable=False,
+        doc="Tempo de parede no cliente (inclui fila do scheduler e rede).",
+    )
+
+    created_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False,
+    )
+
+    sql_log = relationship("IracemaSQLLog", backref="llm_calls")
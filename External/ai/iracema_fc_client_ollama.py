@@ -1,10 +1,28 @@
+import hashlib
 import json
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from pydantic import ValidationError
 
 from Application.interfaces.i_iracema_fc_client import IIracemaFCClient
 from Application.dto.iracema_query_plan_dto import QueryPlanArgsDto
+from Application.helpers.iracema_prompt_helper import build_fc_plan_prompt
+from Application.helpers.query_plan_schema_helper import build_query_plan_json_schema
 
 from External.ai.langchain_ollama_provider import LangChainOllamaProvider
+from External.ai.ollama_structured_chat_provider import (
+    OllamaStructuredChatProvider,
+    OllamaStructuredOutputUnsupported,
+)
+from External.ai.iracema_llm_completion_cache import LLMCompletionCache
+from External.ai.iracema_llm_scheduler import LLMPriority, LLMScheduler
+from External.ai.iracema_ollama_endpoint_pool import OllamaEndpointPool
+from External.metrics.iracema_prometheus_metrics import observe_fc_plan
+
+# schema recusado pelo Ollama (400): só esse schema vai para o modo livre, por este tempo
+_STRUCTURED_RETRY_SECS = 600.0
 
 def _extract_json(raw: str) -> Dict[str, Any]:
     s = (raw or "").strip()
@@ -17,32 +35,133 @@ def _extract_json(raw: str) -> Dict[str, Any]:
     payload = s[start : end + 1]
     return json.loads(payload)
 
-class IracemaFCOllamaClient(IIracemaFCClient):
-    def __init__(self, settings):
+class _FCRoute:
+    """
+    Providers de um modelo FC (modo livre + saída estruturada).
+    """
+
+    def __init__(
+        self,
+        model: str,
+        settings,
+        completion_cache: Optional[LLMCompletionCache],
+        scheduler: Optional[LLMScheduler],
+        pool: Optional[OllamaEndpointPool],
+    ):
+        keep_alive = getattr(settings, "LLM_KEEP_ALIVE", None)
+
+        self.model = model
         self.llm = LangChainOllamaProvider(
-            model=getattr(settings, "LLM_MODEL_FC", settings.LLM_MODEL_FC),
+            model=model,
             base_url=settings.LLM_BASE_URL,
             temperature=0.0,
             num_predict=256,
+            cache=completion_cache,
+            keep_alive=keep_alive,
+            scheduler=scheduler,
+            priority=LLMPriority.GENERATE,
+            pool=pool,
         )
 
+        # saída estruturada (JSON Schema no 'format' do Ollama); desliga sozinho se o servidor não suportar
+        self.structured = (
+            OllamaStructuredChatProvider(
+                model=model,
+                base_url=settings.LLM_BASE_URL,
+                num_predict=256,
+                cache=completion_cache,
+                keep_alive=keep_alive,
+                scheduler=scheduler,
+                priority=LLMPriority.GENERATE,
+                pool=pool,
+            )
+            if getattr(settings, "LLM_FC_STRUCTURED_OUTPUT", True)
+            else None
+        )
+        # hash do schema -> até quando fica no modo livre (400 de uma datasource não desliga as demais)
+        self._rejected_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def structured_allowed(self, schema_hash: str) -> bool:
+        with self._lock:
+            until = self._rejected_until.get(schema_hash)
+            if until is None:
+                return True
+            if time.monotonic() >= until:
+                del self._rejected_until[schema_hash]
+                return True
+            return False
+
+    def reject_structured(self, schema_hash: str) -> None:
+        with self._lock:
+            self._rejected_until[schema_hash] = time.monotonic() + _STRUCTURED_RETRY_SECS
+
+
+class IracemaFCOllamaClient(IIracemaFCClient):
+    def __init__(
+        self,
+        settings,
+        completion_cache: Optional[LLMCompletionCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        pool: Optional[OllamaEndpointPool] = None,
+    ):
+        model = getattr(settings, "LLM_MODEL_FC", settings.LLM_MODEL_FC)
+        self._routes: Dict[str, _FCRoute] = {
+            "large": _FCRoute(model, settings, completion_cache, scheduler, pool),
+        }
+
+        # modelo pequeno para perguntas fáceis (vazio = só o modelo principal)
+        small_model = getattr(settings, "LLM_MODEL_FC_SMALL", "") or ""
+        if small_model and small_model != model:
+            self._routes["small"] = _FCRoute(small_model, settings, completion_cache, scheduler, pool)
+
+        self.model = model
+
+    def supports_route(self, route: str) -> bool:
+        return route in self._routes
+
     def generate_query_plan(
         self,
         prompt_inicial_fc: str,
         question: str,
         columns_meta: list[dict],
         top_k: int,
+        route: str = "large",
     ) -> QueryPlanArgsDto:
-        # prompt_inicial_fc já inclui {PERGUNTA_DO_USUARIO}
-        prompt = (prompt_inicial_fc or "").replace("{PERGUNTA_DO_USUARIO}", question.strip())
+        fc_route = self._routes.get(route) or self._routes["large"]
 
-        prompt += (
-            "\n\nRETORNE APENAS JSON. Sem markdown. Sem texto extra.\n"
-            "Campos esperados: intent, target_column, value_column, group_by, filters, limit.\n"
-        )
-        
-        print(prompt)
+        # prompt_inicial_fc já inclui {PERGUNTA_DO_USUARIO}; nada é anexado após a pergunta
+        # além do sufixo do próprio template (prefixo estável -> reuso de KV-cache no Ollama)
+        prompt = build_fc_plan_prompt(prompt_inicial_fc, question)
+
+        schema = build_query_plan_json_schema(columns_meta) if fc_route.structured is not None else None
+        if schema is not None:
+            schema_hash = hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+            if fc_route.structured_allowed(schema_hash):
+                try:
+                    raw, metadata = fc_route.structured.invoke(prompt, schema)
+                    return self._parse_plan(fc_route.model, raw, metadata, mode="structured")
+                except OllamaStructuredOutputUnsupported:
+                    # Ollama antigo ou schema recusado: esta chamada (e este schema, por um tempo) no modo livre
+                    observe_fc_plan(fc_route.model, "structured", "rejected")
+                    fc_route.reject_structured(schema_hash)
+
+        raw, metadata = fc_route.llm.invoke_with_metadata(prompt)
+        return self._parse_plan(fc_route.model, raw, metadata, mode="freeform")
+
+    def _parse_plan(self, model: str, raw: str, metadata: Dict[str, Any], mode: str) -> QueryPlanArgsDto:
+        eval_tokens = metadata.get("eval_count")
+        try:
+            data = json.loads(raw) if mode == "structured" else _extract_json(raw)
+        except ValueError:
+            observe_fc_plan(model, mode, "parse_error", eval_tokens)
+            raise ValueError("LLM não retornou JSON válido.")
+
+        try:
+            plan = QueryPlanArgsDto.model_validate(data)
+        except ValidationError:
+            observe_fc_plan(model, mode, "validation_error", eval_tokens)
+            raise
 
-        raw = self.llm.invoke(prompt)
-        data = _extract_json(raw)
-        return QueryPlanArgsDto.model_validate(data)
+        observe_fc_plan(model, mode, "ok", eval_tokens)
+        return plan
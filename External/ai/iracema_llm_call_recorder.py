@@ -0,0 +1,75 @@
+# External/ai/iracema_llm_call_recorder.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+# chamadas ao LLM da requisição corrente (None = ninguém registrando)
+_current_calls: ContextVar[Optional[List["LLMCallRecord"]]] = ContextVar("iracema_llm_calls", default=None)
+
+
+@dataclass
+class LLMCallRecord:
+    """
+    Uma chamada ao LLM: tokens e durações (ms) devolvidos pelo Ollama + tempo de parede.
+    Em cache-hit só model/kind/wall_ms vêm preenchidos.
+    """
+    model: str
+    kind: str
+    cache_hit: bool
+    wall_ms: float
+    prompt_tokens: Optional[int] = None
+    eval_tokens: Optional[int] = None
+    load_ms: Optional[float] = None
+    prompt_eval_ms: Optional[float] = None
+    eval_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+
+
+def _ns_to_ms(value: Any) -> Optional[float]:
+    return None if value is None else float(value) / 1e6
+
+
+@contextmanager
+def llm_call_recording() -> Iterator[List[LLMCallRecord]]:
+    """
+    Registra as chamadas ao LLM feitas dentro do bloco (inclusive em threads que
+    rodem com contextvars.copy_context()).
+    """
+    calls: List[LLMCallRecord] = []
+    token = _current_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _current_calls.reset(token)
+
+
+def record_llm_call(
+    model: str,
+    kind: str,
+    wall_ms: float,
+    metadata: Optional[Dict[str, Any]] = None,
+    cache_hit: bool = False,
+) -> None:
+    """
+    metadata: response_metadata do Ollama (durações em nanossegundos).
+    """
+    calls = _current_calls.get()
+    if calls is None:
+        return
+    metadata = metadata or {}
+    calls.append(
+        LLMCallRecord(
+            model=model,
+            kind=kind,
+            cache_hit=cache_hit,
+            wall_ms=round(float(wall_ms), 3),
+            prompt_tokens=metadata.get("prompt_eval_count"),
+            eval_tokens=metadata.get("eval_count"),
+            load_ms=_ns_to_ms(metadata.get("load_duration")),
+            prompt_eval_ms=_ns_to_ms(metadata.get("prompt_eval_duration")),
+            eval_ms=_ns_to_ms(metadata.get("eval_duration")),
+            total_ms=_ns_to_ms(metadata.get("total_duration")),
+        )
+    )
@@ -0,0 +1,120 @@
+# External/ai/iracema_llm_completion_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import LRUCache
+
+from External.metrics.iracema_prometheus_metrics import observe_llm_cache
+
+
+def build_completion_key(model: str, num_predict: int, prompt: str) -> str:
+    """
+    Chave determinística: (modelo, num_predict, sha256 do prompt).
+    """
+    digest = hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()
+    return f"{model}|{int(num_predict)}|{digest}"
+
+
+class LLMCompletionCache:
+    """
+    Cache de completions do LLM (prompt idêntico + modelo fixo + temperature 0 => mesma resposta).
+
+    - Camada 1: LRU em memória (cachetools), por processo
+    - Camada 2: SQLite em disco (sobrevive a restart; compartilhado entre workers no mesmo host)
+    """
+
+    def __init__(self, path: str, memory_max_entries: int = 1024):
+        self._path = path
+        self._memory: LRUCache = LRUCache(maxsize=max(1, int(memory_max_entries)))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_completion (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                num_predict INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_completion_model ON llm_completion (model)")
+        self._conn.commit()
+
+    def get(self, model: str, num_predict: int, prompt: str) -> Optional[str]:
+        key = build_completion_key(model, num_predict, prompt)
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                observe_llm_cache(model, "hit_memory")
+                return cached
+
+            row = self._conn.execute(
+                "SELECT response FROM llm_completion WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                observe_llm_cache(model, "miss")
+                return None
+
+            self._conn.execute("UPDATE llm_completion SET hits = hits + 1 WHERE key = ?", (key,))
+            self._conn.commit()
+            self._memory[key] = row[0]
+
+        observe_llm_cache(model, "hit_disk")
+        return row[0]
+
+    def put(self, model: str, num_predict: int, prompt: str, response: str) -> None:
+        key = build_completion_key(model, num_predict, prompt)
+        with self._lock:
+            self._memory[key] = response
+            self._conn.execute(
+                """
+                INSERT INTO llm_completion (key, model, num_predict, response, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET response = excluded.response, created_at = excluded.created_at
+                """,
+                (key, model, int(num_predict), response, time.time()),
+            )
+            self._conn.commit()
+
+    def purge(self, model: Optional[str] = None) -> int:
+        """
+        Remove entradas (todas ou só de um modelo). Retorna quantas saíram do disco.
+        """
+        with self._lock:
+            if model:
+                cur = self._conn.execute("DELETE FROM llm_completion WHERE model = ?", (model,))
+                for key in [k for k in self._memory.keys() if k.startswith(f"{model}|")]:
+                    self._memory.pop(key, None)
+            else:
+                cur = self._conn.execute("DELETE FROM llm_completion")
+                self._memory.clear()
+            self._conn.commit()
+            return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model, COUNT(*), COALESCE(SUM(hits), 0) FROM llm_completion GROUP BY model ORDER BY model"
+            ).fetchall()
+            memory_entries = len(self._memory)
+        return {
+            "path": self._path,
+            "memory_entries": memory_entries,
+            "models": [{"model": m, "entries": n, "disk_hits": h} for m, n, h in rows],
+        }
@@ -0,0 +1,132 @@
+# External/ai/iracema_llm_scheduler.py
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from External.metrics.iracema_prometheus_metrics import (
+    observe_llm_queue_state,
+    observe_llm_queue_wait,
+    observe_llm_shed,
+)
+
+
+class LLMPriority(IntEnum):
+    """
+    Menor valor = atendido primeiro.
+    """
+    GENERATE = 0  # SQL / plano FC (bloqueia a resposta)
+    EXPLAIN = 1   # explicação (pode ser degradada)
+
+
+class LLMOverloadedError(RuntimeError):
+    """
+    Chamada ao LLM recusada pelo scheduler (fila cheia ou prazo de espera esgotado).
+    """
+
+    def __init__(self, model: str, priority: LLMPriority, reason: str):
+        super().__init__(f"LLM sobrecarregado ({model}, {priority.name.lower()}): {reason}")
+        self.model = model
+        self.priority = priority
+        self.reason = reason
+
+
+class _ModelQueue:
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self.active = 0
+        self.waiting: List[Tuple[int, int]] = []  # heap (prioridade, seq)
+        self.cond = threading.Condition()
+
+
+class LLMScheduler:
+    """
+    Controle de concorrência na frente do Ollama (por modelo), com:
+    - limite de chamadas simultâneas por modelo
+    - fila por prioridade (geração antes de explicação; FIFO dentro da classe)
+    - backpressure: recusa quando a fila passa do limite da classe ou o prazo de espera expira
+    """
+
+    def __init__(
+        self,
+        default_concurrency: int = 1,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        max_queue_depth: Optional[Dict[LLMPriority, int]] = None,
+        queue_timeout_secs: Optional[Dict[LLMPriority, float]] = None,
+    ):
+        self._default_concurrency = max(1, int(default_concurrency))
+        self._model_concurrency = dict(model_concurrency or {})
+        self._max_queue_depth = {
+            LLMPriority.GENERATE: 16,
+            LLMPriority.EXPLAIN: 4,
+            **(max_queue_depth or {}),
+        }
+        self._queue_timeout_secs = {
+            LLMPriority.GENERATE: 60.0,
+            LLMPriority.EXPLAIN: 15.0,
+            **(queue_timeout_secs or {}),
+        }
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def _queue(self, model: str) -> _ModelQueue:
+        with self._lock:
+            q = self._queues.get(model)
+            if q is None:
+                q = _ModelQueue(self._model_concurrency.get(model, self._default_concurrency))
+                self._queues[model] = q
+            return q
+
+    def queue_depth(self, model: str) -> int:
+        q = self._queue(model)
+        with q.cond:
+            return len(q.waiting)
+
+    @contextmanager
+    def slot(self, model: str, priority: LLMPriority = LLMPriority.GENERATE) -> Iterator[None]:
+        """
+        Bloqueia até haver vaga para o modelo; levanta LLMOverloadedError se não houver a tempo.
+        """
+        q = self._queue(model)
+        start = time.perf_counter()
+        deadline = start + float(self._queue_timeout_secs[priority])
+
+        with q.cond:
+            if len(q.waiting) >= self._max_queue_depth[priority]:
+                observe_llm_shed(model, priority.name.lower(), "queue_full")
+                raise LLMOverloadedError(model, priority, "fila cheia")
+
+            entry = (int(priority), next(self._seq))
+            heapq.heappush(q.waiting, entry)
+            observe_llm_queue_state(model, len(q.waiting), q.active)
+
+            while not (q.active < q.limit and q.waiting[0] == entry):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    q.waiting.remove(entry)
+                    heapq.heapify(q.waiting)
+                    observe_llm_queue_state(model, len(q.waiting), q.active)
+                    q.cond.notify_all()
+                    observe_llm_shed(model, priority.name.lower(), "deadline")
+                    raise LLMOverloadedError(model, priority, "prazo de espera esgotado")
+                q.cond.wait(remaining)
+
+            heapq.heappop(q.waiting)
+            q.active += 1
+            observe_llm_queue_state(model, len(q.waiting), q.active)
+            # o próximo da fila pode ter vaga também (limit > 1)
+            q.cond.notify_all()
+
+        observe_llm_queue_wait(model, priority.name.lower(), time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            with q.cond:
+                q.active -= 1
+                observe_llm_queue_state(model, len(q.waiting), q.active)
+                q.cond.notify_all()
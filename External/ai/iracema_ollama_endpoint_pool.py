@@ -0,0 +1,257 @@
+# External/ai/iracema_ollama_endpoint_pool.py
+
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+import requests
+
+from External.metrics.iracema_prometheus_metrics import (
+    observe_llm_endpoint_request,
+    observe_llm_endpoint_state,
+)
+
+T = TypeVar("T")
+
+# chave de afinidade (datasource) da requisição corrente
+_routing_key: ContextVar[Optional[str]] = ContextVar("iracema_llm_routing_key", default=None)
+
+
+@contextmanager
+def llm_routing(key: Optional[str]) -> Iterator[None]:
+    """
+    Chamadas ao LLM dentro do bloco preferem o mesmo host para a mesma chave (datasource),
+    mantendo o prefixo do prompt quente no KV-cache daquele Ollama.
+    """
+    token = _routing_key.set(key)
+    try:
+        yield
+    finally:
+        _routing_key.reset(token)
+
+
+class LLMNoHealthyEndpointError(RuntimeError):
+    """
+    Nenhum host do pool disponível para o modelo (todos com circuito aberto ou fora do ar).
+    """
+
+
+def _is_transport_error(ex: BaseException) -> bool:
+    """
+    Falhas atribuíveis ao host (conexão, timeout, 5xx). Erros de conteúdo não abrem circuito.
+    """
+    if isinstance(ex, (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout)):
+        return True
+    name = type(ex).__name__
+    if "Connect" in name or "Timeout" in name or "RemoteProtocol" in name:
+        return True
+    status = getattr(ex, "status_code", None)
+    if status is None:
+        status = getattr(getattr(ex, "response", None), "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+class OllamaEndpoint:
+    """
+    Host Ollama com contagem de requisições em andamento e circuit breaker.
+
+    closed -> (N falhas seguidas) -> open -> (após open_secs) -> half_open -> 1 sucesso -> closed
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.outstanding = 0
+        self.healthy = True
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_probe = False
+
+    def available(self, now: float, open_secs: float) -> bool:
+        if not self.healthy:
+            return False
+        if self.state == "open":
+            if now - self.opened_at < open_secs:
+                return False
+            self.state = "half_open"
+            self.half_open_probe = False
+        if self.state == "half_open":
+            # só uma requisição de prova por vez
+            return not self.half_open_probe
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class OllamaEndpointPool:
+    """
+    Pool de hosts Ollama por modelo:
+    - balanceamento por menor número de requisições em andamento
+    - afinidade por datasource (rendezvous hashing) enquanto o host preferido não estiver sobrecarregado
+    - health check ativo (GET /api/tags) e circuit breaker por host
+    - failover: erro de transporte tenta o próximo host disponível
+    """
+
+    def __init__(
+        self,
+        default_base_urls: List[str],
+        model_base_urls: Optional[Dict[str, List[str]]] = None,
+        failure_threshold: int = 3,
+        open_secs: float = 30.0,
+        health_timeout_secs: float = 2.0,
+        sticky_max_extra_outstanding: int = 2,
+        max_attempts: int = 2,
+    ):
+        self._endpoints: Dict[str, OllamaEndpoint] = {}
+        self._default_urls = [self._register(u) for u in default_base_urls or []]
+        self._model_urls = {
+            model: [self._register(u) for u in urls]
+            for model, urls in (model_base_urls or {}).items()
+            if urls
+        }
+        if not self._default_urls and not self._model_urls:
+            raise ValueError("Pool de LLM sem nenhum host configurado.")
+
+        self._failure_threshold = max(1, int(failure_threshold))
+        self._open_secs = float(open_secs)
+        self._health_timeout_secs = float(health_timeout_secs)
+        self._sticky_max_extra = max(0, int(sticky_max_extra_outstanding))
+        self._max_attempts = max(1, int(max_attempts))
+        self._lock = threading.Lock()
+
+    def _register(self, url: str) -> str:
+        key = url.rstrip("/")
+        if key not in self._endpoints:
+            self._endpoints[key] = OllamaEndpoint(key)
+        return key
+
+    def _urls_for(self, model: str) -> List[str]:
+        return self._model_urls.get(model) or self._default_urls
+
+    # -------------------------------------------------------------------------
+    # Seleção
+    # -------------------------------------------------------------------------
+
+    def _acquire(self, model: str, sticky_key: Optional[str], exclude: List[str]) -> OllamaEndpoint:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                self._endpoints[u]
+                for u in self._urls_for(model)
+                if u not in exclude and self._endpoints[u].available(now, self._open_secs)
+            ]
+            if not candidates:
+                raise LLMNoHealthyEndpointError(f"Nenhum host Ollama disponível para o modelo '{model}'.")
+
+            least = min(candidates, key=lambda e: e.outstanding)
+            chosen = least
+            if sticky_key:
+                preferred = max(
+                    candidates,
+                    key=lambda e: hashlib.sha1(f"{sticky_key}|{e.base_url}".encode("utf-8")).hexdigest(),
+                )
+                if preferred.outstanding <= least.outstanding + self._sticky_max_extra:
+                    chosen = preferred
+
+            chosen.outstanding += 1
+            if chosen.state == "half_open":
+                chosen.half_open_probe = True
+            self._publish(chosen)
+            return chosen
+
+    def _release(self, endpoint: OllamaEndpoint, failed: bool) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.half_open_probe = False
+            if failed:
+                endpoint.consecutive_failures += 1
+                if endpoint.state == "half_open" or endpoint.consecutive_failures >= self._failure_threshold:
+                    endpoint.state = "open"
+                    endpoint.opened_at = time.monotonic()
+            else:
+                endpoint.consecutive_failures = 0
+                endpoint.state = "closed"
+            self._publish(endpoint)
+        observe_llm_endpoint_request(endpoint.base_url, "error" if failed else "ok")
+
+    def _publish(self, endpoint: OllamaEndpoint) -> None:
+        observe_llm_endpoint_state(
+            endpoint.base_url,
+            outstanding=endpoint.outstanding,
+            up=endpoint.healthy and endpoint.state != "open",
+        )
+
+    def run(self, model: str, fn: Callable[[str], T]) -> T:
+        """
+        Executa fn(base_url) em um host do pool, com failover em erro de transporte.
+        """
+        sticky_key = _routing_key.get()
+        tried: List[str] = []
+        last_error: Optional[BaseException] = None
+
+        for _ in range(self._max_attempts):
+            try:
+                endpoint = self._acquire(model, sticky_key, exclude=tried)
+            except LLMNoHealthyEndpointError:
+                if last_error is not None:
+                    raise last_error
+                raise
+
+            tried.append(endpoint.base_url)
+            try:
+                result = fn(endpoint.base_url)
+            except Exception as ex:
+                transport = _is_transport_error(ex)
+                self._release(endpoint, failed=transport)
+                if not transport:
+                    raise
+                last_error = ex
+                continue
+
+            self._release(endpoint, failed=False)
+            return result
+
+        raise last_error  # type: ignore[misc]
+
+    # -------------------------------------------------------------------------
+    # Health check
+    # -------------------------------------------------------------------------
+
+    def check_health(self) -> Dict[str, bool]:
+        """
+        GET /api/tags em cada host. Host que volta a responder sai do estado open.
+        """
+        results: Dict[str, bool] = {}
+        for url, endpoint in list(self._endpoints.items()):
+            try:
+                resp = requests.get(f"{url}/api/tags", timeout=self._health_timeout_secs)
+                ok = resp.status_code == 200
+            except requests.RequestException:
+                ok = False
+
+            with self._lock:
+                endpoint.healthy = ok
+                if ok and endpoint.state == "open":
+                    endpoint.state = "half_open"
+                    endpoint.half_open_probe = False
+                self._publish(endpoint)
+            results[url] = ok
+        return results
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "endpoints": [e.snapshot() for e in self._endpoints.values()],
+                "models": {m: list(urls) for m, urls in self._model_urls.items()},
+                "default": list(self._default_urls),
+            }
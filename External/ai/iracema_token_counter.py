@@ -0,0 +1,50 @@
+# External/ai/iracema_token_counter.py
+
+import threading
+from functools import lru_cache
+from typing import Optional
+
+# Fallback sem tokenizer: ~4 caracteres por token (mesma estimativa do resumo de resultados)
+_CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    """
+    Conta tokens com o tokenizer HuggingFace do modelo (tokenizer_name, ex.:
+    'Qwen/Qwen2.5-7B-Instruct'). Sem nome configurado ou se o tokenizer não
+    carregar (offline, sem transformers), cai para a estimativa por caracteres.
+    """
+
+    def __init__(self, tokenizer_name: str = ""):
+        self._tokenizer_name = (tokenizer_name or "").strip()
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.count = lru_cache(maxsize=4096)(self._count)
+
+    def _ensure_tokenizer(self) -> Optional[object]:
+        if self._loaded:
+            return self._tokenizer
+        with self._lock:
+            if not self._loaded:
+                if self._tokenizer_name:
+                    try:
+                        from transformers import AutoTokenizer
+
+                        self._tokenizer = AutoTokenizer.from_pretrained(self._tokenizer_name)
+                    except Exception as ex:
+                        print(f"[TokenCounter] Tokenizer '{self._tokenizer_name}' indisponível ({ex}); usando estimativa.")
+                self._loaded = True
+        return self._tokenizer
+
+    @property
+    def exact(self) -> bool:
+        return self._ensure_tokenizer() is not None
+
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        tokenizer = self._ensure_tokenizer()
+        if tokenizer is None:
+            return max(1, (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN)
+        return len(tokenizer.encode(text, add_special_tokens=False))
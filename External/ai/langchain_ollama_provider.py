@@ -1,7 +1,16 @@
+import time
+from contextlib import nullcontext
+
 from langchain_ollama import ChatOllama
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from langchain.schema import BaseRetriever
 
+from External.ai.iracema_llm_call_recorder import record_llm_call
+from External.ai.iracema_llm_completion_cache import LLMCompletionCache
+from External.ai.iracema_llm_scheduler import LLMPriority, LLMScheduler
+from External.ai.iracema_ollama_endpoint_pool import OllamaEndpointPool
+from External.metrics.iracema_prometheus_metrics import observe_llm_generation, observe_llm_stream
+
 class LangChainOllamaProvider:
     def __init__(
         self,
@@ -10,19 +19,110 @@ class LangChainOllamaProvider:
         retriever: Optional[BaseRetriever] = None,
         temperature: float = 0.0,
         num_predict:int = 256,
+        cache: Optional[LLMCompletionCache] = None,
+        keep_alive: Optional[str] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        priority: LLMPriority = LLMPriority.GENERATE,
+        pool: Optional[OllamaEndpointPool] = None,
     ):
         self.model = model
+        self.scheduler = scheduler
+        self.pool = pool
+        self.priority = priority
+        self._kind = priority.name.lower()
         self.retriever = retriever
+        self.num_predict = num_predict
 
-        self.llm = ChatOllama(
+        # só faz sentido cachear saída determinística
+        self.cache = cache if temperature == 0.0 else None
+
+        self._llm_kwargs = dict(
             model=model,
-            base_url=base_url,
             temperature=temperature,
-            num_predict=num_predict
+            num_predict=num_predict,
+            # mantém o modelo (e o KV-cache do último prompt) residente entre requisições
+            keep_alive=keep_alive,
+        )
+        self.llm = ChatOllama(base_url=base_url, **self._llm_kwargs)
+        # com pool: um cliente por host (criado sob demanda)
+        self._clients: Dict[str, ChatOllama] = {base_url.rstrip("/"): self.llm}
+
+    def _client_for(self, base_url: str) -> ChatOllama:
+        client = self._clients.get(base_url)
+        if client is None:
+            client = self._clients.setdefault(base_url, ChatOllama(base_url=base_url, **self._llm_kwargs))
+        return client
+
+    def _run(self, fn: Callable[[ChatOllama], Any]) -> Any:
+        if self.pool is None:
+            return fn(self.llm)
+        return self.pool.run(self.model, lambda url: fn(self._client_for(url)))
+
+    def _slot(self):
+        # cache-hit não passa pelo scheduler; só a chamada real ao Ollama ocupa vaga
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(self.model, self.priority)
+
+    def stream_until(self, prompt: str, stop_detector: Callable[[str], Optional[Tuple[int, str]]]) -> str:
+        """
+        Geração em streaming que encerra o stream (e a geração no Ollama) assim que
+        stop_detector(texto_parcial) devolver (posição de corte, motivo).
+        """
+        start = time.perf_counter()
+        if self.cache is not None:
+            cached = self.cache.get(self.model, self.num_predict, prompt)
+            if cached is not None:
+                record_llm_call(self.model, self._kind, (time.perf_counter() - start) * 1000.0, cache_hit=True)
+                return cached
 
+        def consume(llm: ChatOllama) -> Tuple[str, str, int, Dict[str, Any]]:
+            parts: List[str] = []
+            generated = 0
+            metadata: Dict[str, Any] = {}
+            stream = llm.stream(prompt)
+            try:
+                for chunk in stream:
+                    # no streaming do Ollama cada chunk corresponde a ~1 token
+                    if chunk.content:
+                        generated += 1
+                        parts.append(chunk.content)
+                    metadata = getattr(chunk, "response_metadata", None) or metadata
+
+                    found = stop_detector("".join(parts))
+                    if found is not None:
+                        cut, reason = found
+                        return "".join(parts)[:cut], reason, generated, metadata
+            finally:
+                # fechar o gerador encerra a conexão HTTP -> Ollama aborta a geração
+                stream.close()
+            return "".join(parts), "eos", generated, metadata
+
+        with self._slot():
+            content, reason, generated, metadata = self._run(consume)
+
+        if reason == "eos":
+            observe_llm_generation(self.model, metadata)
+        observe_llm_stream(self.model, reason, generated, self.num_predict)
+        # corte antecipado não recebe o chunk final com as estatísticas: conta os tokens vistos
+        record_llm_call(
+            self.model,
+            self._kind,
+            (time.perf_counter() - start) * 1000.0,
+            metadata=metadata if reason == "eos" else {"eval_count": generated},
         )
 
+        if self.cache is not None:
+            self.cache.put(self.model, self.num_predict, prompt, content)
+        return content
+
     def invoke(self, prompt: str) -> str:
+        return self.invoke_with_metadata(prompt)[0]
+
+    def invoke_with_metadata(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        (conteúdo, response_metadata do Ollama). Em cache-hit os metadados vêm vazios.
+        """
         if self.retriever:
             docs = self.retriever.get_relevant_documents(prompt)
             context = "\n".join(d.page_content for d in docs)
@@ -32,5 +132,20 @@ class LangChainOllamaProvider:
                         Pergunta:
                         {prompt}
                         """
-        response = self.llm.invoke(prompt)
-        return response.content
+
+        start = time.perf_counter()
+        if self.cache is not None:
+            cached = self.cache.get(self.model, self.num_predict, prompt)
+            if cached is not None:
+                record_llm_call(self.model, self._kind, (time.perf_counter() - start) * 1000.0, cache_hit=True)
+                return cached, {}
+
+        with self._slot():
+            response = self._run(lambda llm: llm.invoke(prompt))
+        metadata = getattr(response, "response_metadata", None) or {}
+        observe_llm_generation(self.model, metadata)
+        record_llm_call(self.model, self._kind, (time.perf_counter() - start) * 1000.0, metadata=metadata)
+
+        if self.cache is not None:
+            self.cache.put(self.model, self.num_predict, prompt, response.content)
+        return response.content, metadata
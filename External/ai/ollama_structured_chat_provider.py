@@ -0,0 +1,107 @@
+# External/ai/ollama_structured_chat_provider.py
+
+import hashlib
+import json
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from External.ai.iracema_llm_call_recorder import record_llm_call
+from External.ai.iracema_llm_completion_cache import LLMCompletionCache
+from External.ai.iracema_llm_scheduler import LLMPriority, LLMScheduler
+from External.ai.iracema_ollama_endpoint_pool import OllamaEndpointPool
+from External.metrics.iracema_prometheus_metrics import observe_llm_generation
+
+
+class OllamaStructuredOutputUnsupported(RuntimeError):
+    """
+    O servidor Ollama recusou a requisição com 'format' = JSON Schema (HTTP 400):
+    versão < 0.5 ou schema/prompt que ele não aceita.
+    """
+
+
+class OllamaStructuredChatProvider:
+    """
+    Chamada direta ao /api/chat do Ollama com saída estruturada ('format' = JSON Schema).
+
+    O langchain-ollama fixado no projeto só aceita format="json"; com o schema o
+    decoding fica restrito à gramática, então a resposta é sempre JSON parseável.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str,
+        num_predict: int = 256,
+        timeout_secs: float = 120.0,
+        cache: Optional[LLMCompletionCache] = None,
+        keep_alive: Optional[str] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        priority: LLMPriority = LLMPriority.GENERATE,
+        pool: Optional[OllamaEndpointPool] = None,
+    ):
+        self.model = model
+        self.num_predict = num_predict
+        self._base_url = base_url.rstrip("/")
+        self._pool = pool
+        self._timeout = timeout_secs
+        self._keep_alive = keep_alive
+        # temperature fixa em 0 -> saída determinística, pode cachear
+        self.cache = cache
+        self._session = requests.Session()
+        self._scheduler = scheduler
+        self._priority = priority
+
+    def invoke(self, prompt: str, schema: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Retorna (conteúdo JSON, metadados do Ollama). Em cache-hit os metadados vêm vazios.
+        """
+        # o schema entra na chave: mesmo prompt com enums diferentes => outra resposta
+        schema_json = json.dumps(schema, sort_keys=True, ensure_ascii=False)
+        cache_prompt = f"{prompt}\n#format:{hashlib.sha256(schema_json.encode('utf-8')).hexdigest()}"
+
+        start = time.perf_counter()
+        if self.cache is not None:
+            cached = self.cache.get(self.model, self.num_predict, cache_prompt)
+            if cached is not None:
+                record_llm_call(
+                    self.model, self._priority.name.lower(), (time.perf_counter() - start) * 1000.0, cache_hit=True
+                )
+                return cached, {}
+
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": False,
+            "format": schema,
+            "options": {"temperature": 0.0, "num_predict": self.num_predict},
+        }
+        if self._keep_alive:
+            payload["keep_alive"] = self._keep_alive
+
+        slot = self._scheduler.slot(self.model, self._priority) if self._scheduler is not None else nullcontext()
+        with slot:
+            if self._pool is None:
+                resp = self._post(self._base_url, payload)
+            else:
+                resp = self._pool.run(self.model, lambda url: self._post(url, payload))
+        if resp.status_code == 400:
+            raise OllamaStructuredOutputUnsupported(resp.text[:300])
+
+        data = resp.json()
+        content = ((data.get("message") or {}).get("content") or "").strip()
+        observe_llm_generation(self.model, data)
+        record_llm_call(self.model, self._priority.name.lower(), (time.perf_counter() - start) * 1000.0, metadata=data)
+
+        if self.cache is not None and content:
+            self.cache.put(self.model, self.num_predict, cache_prompt, content)
+        return content, data
+
+    def _post(self, base_url: str, payload: Dict[str, Any]) -> requests.Response:
+        resp = self._session.post(f"{base_url}/api/chat", json=payload, timeout=self._timeout)
+        # 5xx vira exceção aqui para o pool contar a falha do host; 400 fica com o chamador
+        if resp.status_code != 400:
+            resp.raise_for_status()
+        return resp
@@ -0,0 +1,335 @@
+# External/metrics/iracema_prometheus_metrics.py
+
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Buckets em segundos: cobre de SQL rápido (ms) até geração LLM em CPU (dezenas de s)
+_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0,
+)
+
+STAGE_LATENCY_SECONDS = Histogram(
+    "iracema_ask_stage_duration_seconds",
+    "Duração de cada etapa do pipeline /ask.",
+    labelnames=("stage", "mode", "reason", "datasource"),
+    buckets=_LATENCY_BUCKETS,
+)
+
+ASK_LATENCY_SECONDS = Histogram(
+    "iracema_ask_duration_seconds",
+    "Duração total de uma requisição /ask.",
+    labelnames=("mode", "reason", "datasource", "status"),
+    buckets=_LATENCY_BUCKETS,
+)
+
+EXPLANATION_TOTAL = Counter(
+    "iracema_explanation_total",
+    "Explicações geradas, por origem (template determinístico ou LLM).",
+    labelnames=("source",),
+)
+
+LLM_CACHE_REQUESTS_TOTAL = Counter(
+    "iracema_llm_cache_requests_total",
+    "Consultas ao cache de completions do LLM.",
+    labelnames=("model", "result"),
+)
+
+LLM_PROMPT_EVAL_SECONDS = Histogram(
+    "iracema_llm_prompt_eval_seconds",
+    "Carga do modelo + avaliação do prompt no Ollama (aprox. time-to-first-token).",
+    labelnames=("model",),
+    buckets=_LATENCY_BUCKETS,
+)
+
+LLM_PROMPT_EVAL_TOKENS = Histogram(
+    "iracema_llm_prompt_eval_tokens",
+    "Tokens de prompt avaliados pelo Ollama (prefixo reaproveitado do KV-cache não entra).",
+    labelnames=("model",),
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+
+LLM_EVAL_TOKENS = Histogram(
+    "iracema_llm_eval_tokens",
+    "Tokens gerados pelo Ollama.",
+    labelnames=("model",),
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024),
+)
+
+FC_PLAN_TOTAL = Counter(
+    "iracema_fc_plan_total",
+    "Planos gerados pelo cliente FC, por modo (structured/freeform) e resultado do parse.",
+    labelnames=("model", "mode", "result"),
+)
+
+FC_PLAN_TOKENS = Histogram(
+    "iracema_fc_plan_tokens",
+    "Tokens gerados por plano FC.",
+    labelnames=("model", "mode"),
+    buckets=(8, 16, 32, 64, 96, 128, 192, 256, 512),
+)
+
+LLM_STREAM_STOP_TOTAL = Counter(
+    "iracema_llm_stream_stop_total",
+    "Gerações SQL em streaming, por motivo de término (semicolon/fence/blank_line ou eos).",
+    labelnames=("model", "reason"),
+)
+
+LLM_STREAM_TOKENS_SAVED = Histogram(
+    "iracema_llm_stream_tokens_saved",
+    "Tokens não gerados por corte antecipado (limite superior: num_predict - tokens gerados).",
+    labelnames=("model",),
+    buckets=(0, 8, 16, 32, 64, 128, 192, 256, 512),
+)
+
+LLM_QUEUE_DEPTH = Gauge(
+    "iracema_llm_queue_depth",
+    "Chamadas aguardando vaga no scheduler do LLM.",
+    labelnames=("model",),
+)
+
+LLM_IN_FLIGHT = Gauge(
+    "iracema_llm_in_flight",
+    "Chamadas em execução no LLM (vagas ocupadas no scheduler).",
+    labelnames=("model",),
+)
+
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "iracema_llm_queue_wait_seconds",
+    "Espera na fila do scheduler até obter vaga no LLM.",
+    labelnames=("model", "priority"),
+    buckets=_LATENCY_BUCKETS,
+)
+
+LLM_SHED_TOTAL = Counter(
+    "iracema_llm_shed_total",
+    "Chamadas recusadas pelo scheduler (queue_full/deadline).",
+    labelnames=("model", "priority", "reason"),
+)
+
+LLM_DEGRADED_TOTAL = Counter(
+    "iracema_llm_degraded_total",
+    "Respostas degradadas por sobrecarga (explain_skipped/heuristic_fallback).",
+    labelnames=("action",),
+)
+
+LLM_ENDPOINT_UP = Gauge(
+    "iracema_llm_endpoint_up",
+    "Host Ollama disponível no pool (health check ok e circuito não aberto).",
+    labelnames=("endpoint",),
+)
+
+LLM_ENDPOINT_OUTSTANDING = Gauge(
+    "iracema_llm_endpoint_outstanding",
+    "Requisições em andamento por host Ollama.",
+    labelnames=("endpoint",),
+)
+
+LLM_ENDPOINT_REQUESTS_TOTAL = Counter(
+    "iracema_llm_endpoint_requests_total",
+    "Requisições por host Ollama e resultado (ok/error).",
+    labelnames=("endpoint", "result"),
+)
+
+LLM_ROUTE_TOTAL = Counter(
+    "iracema_llm_route_total",
+    "Gerações por rota de dificuldade (small/large) e resultado (ok/escalated/validation_error).",
+    labelnames=("kind", "route", "result"),
+)
+
+LLM_ROUTE_SECONDS = Histogram(
+    "iracema_llm_route_duration_seconds",
+    "Geração + validação por rota de dificuldade.",
+    labelnames=("kind", "route"),
+    buckets=_LATENCY_BUCKETS,
+)
+
+EMBEDDING_BATCH_TEXTS = Histogram(
+    "iracema_embedding_batch_texts",
+    "Textos por chamada ao modelo de embeddings no sidecar (após agrupamento).",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+EMBEDDING_BATCH_REQUESTS = Histogram(
+    "iracema_embedding_batch_requests",
+    "Pedidos de embedding agrupados por chamada ao modelo no sidecar.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+RAG_COLLECTION_DOCUMENTS = Gauge(
+    "iracema_rag_collection_documents",
+    "Documentos na coleção RAG após a última compactação.",
+    labelnames=("collection",),
+)
+
+RAG_COMPACTION_REMOVED_TOTAL = Counter(
+    "iracema_rag_compaction_removed_total",
+    "Exemplos removidos pela compactação da memória RAG, por motivo.",
+    labelnames=("reason",),
+)
+
+RAG_NEAR_HIT_TOTAL = Counter(
+    "iracema_rag_near_hit_total",
+    "Consultas ao cache de quase-duplicatas: hit, miss ou rejected (SQL reescrito reprovado).",
+    labelnames=("kind", "result"),
+)
+
+RAG_NEAR_HIT_AUDIT_TOTAL = Counter(
+    "iracema_rag_near_hit_audit_total",
+    "Auditoria amostral de near-hits contra o FC: agree, disagree (falso acerto), error, skipped.",
+    labelnames=("result",),
+)
+
+RAG_EXACT_HIT_TOTAL = Counter(
+    "iracema_rag_exact_hit_total",
+    "Acertos exatos da memória RAG por tipo (query_plan, fca: recompilado; sql: reaproveitado) "
+    "e resultado (hit, stale: plano/SQL não vale no schema atual).",
+    labelnames=("kind", "result"),
+)
+
+
+def reason_label(reason: str) -> str:
+    """
+    Reduz o reason do plano ao prefixo (ex.: 'sum_template:area' -> 'sum_template',
+    'rag_plan_hit|fc:count' -> 'rag_plan_hit'), evitando cardinalidade por coluna nos labels.
+    """
+    return (reason or "unknown").split("|", 1)[0].split(":", 1)[0] or "unknown"
+
+
+def observe_ask_timings(
+    timings_ms: Dict[str, float],
+    mode: str,
+    reason: str,
+    datasource: str,
+    status: str,
+) -> None:
+    """
+    Registra as etapas (ms) nos histogramas. A chave 'total' alimenta o histograma geral.
+    """
+    labels = {
+        "mode": mode,
+        "reason": reason_label(reason),
+        "datasource": datasource or "unknown",
+    }
+    for stage, ms in timings_ms.items():
+        if stage == "total":
+            continue
+        STAGE_LATENCY_SECONDS.labels(stage=stage, **labels).observe(ms / 1000.0)
+
+    if "total" in timings_ms:
+        ASK_LATENCY_SECONDS.labels(status=status, **labels).observe(timings_ms["total"] / 1000.0)
+
+
+def observe_explanation(source: str) -> None:
+    """
+    source: 'template' | 'llm'
+    """
+    EXPLANATION_TOTAL.labels(source=source).inc()
+
+
+def observe_llm_cache(model: str, result: str) -> None:
+    """
+    result: 'hit_memory' | 'hit_disk' | 'miss'
+    """
+    LLM_CACHE_REQUESTS_TOTAL.labels(model=model, result=result).inc()
+
+
+def observe_llm_generation(model: str, metadata: Dict) -> None:
+    """
+    Estatísticas do Ollama (response_metadata): durações em nanossegundos.
+    """
+    if not metadata:
+        return
+    load_ns = metadata.get("load_duration") or 0
+    prompt_eval_ns = metadata.get("prompt_eval_duration") or 0
+    if load_ns or prompt_eval_ns:
+        LLM_PROMPT_EVAL_SECONDS.labels(model=model).observe((load_ns + prompt_eval_ns) / 1e9)
+    if metadata.get("prompt_eval_count") is not None:
+        LLM_PROMPT_EVAL_TOKENS.labels(model=model).observe(metadata["prompt_eval_count"])
+    if metadata.get("eval_count") is not None:
+        LLM_EVAL_TOKENS.labels(model=model).observe(metadata["eval_count"])
+
+
+def observe_fc_plan(model: str, mode: str, result: str, eval_tokens: Optional[int] = None) -> None:
+    """
+    mode: 'structured' | 'freeform'
+    result: 'ok' | 'parse_error' | 'validation_error' | 'rejected' (400 no structured: cai para o freeform)
+    """
+    FC_PLAN_TOTAL.labels(model=model, mode=mode, result=result).inc()
+    if eval_tokens is not None:
+        FC_PLAN_TOKENS.labels(model=model, mode=mode).observe(eval_tokens)
+
+
+def observe_llm_stream(model: str, reason: str, generated_tokens: int, num_predict: int) -> None:
+    """
+    reason: motivo do corte antecipado ou 'eos' (modelo terminou sozinho / num_predict).
+    """
+    LLM_STREAM_STOP_TOTAL.labels(model=model, reason=reason).inc()
+    if reason != "eos":
+        LLM_EVAL_TOKENS.labels(model=model).observe(generated_tokens)
+        LLM_STREAM_TOKENS_SAVED.labels(model=model).observe(max(0, num_predict - generated_tokens))
+
+
+def observe_llm_queue_state(model: str, depth: int, in_flight: int) -> None:
+    LLM_QUEUE_DEPTH.labels(model=model).set(depth)
+    LLM_IN_FLIGHT.labels(model=model).set(in_flight)
+
+
+def observe_llm_queue_wait(model: str, priority: str, seconds: float) -> None:
+    LLM_QUEUE_WAIT_SECONDS.labels(model=model, priority=priority).observe(seconds)
+
+
+def observe_llm_shed(model: str, priority: str, reason: str) -> None:
+    LLM_SHED_TOTAL.labels(model=model, priority=priority, reason=reason).inc()
+
+
+def observe_llm_degraded(action: str) -> None:
+    LLM_DEGRADED_TOTAL.labels(action=action).inc()
+
+
+def observe_llm_route(kind: str, route: str, result: str, seconds: float) -> None:
+    """
+    kind: 'sql' (IracemaLLMClient) ou 'fc' (plano FC).
+    """
+    LLM_ROUTE_TOTAL.labels(kind=kind, route=route, result=result).inc()
+    LLM_ROUTE_SECONDS.labels(kind=kind, route=route).observe(seconds)
+
+
+def observe_embedding_batch(requests: int, texts: int) -> None:
+    EMBEDDING_BATCH_REQUESTS.observe(requests)
+    EMBEDDING_BATCH_TEXTS.observe(texts)
+
+
+def observe_rag_compaction(collection: str, size_after: int, removed: Dict[str, int]) -> None:
+    RAG_COLLECTION_DOCUMENTS.labels(collection=collection).set(size_after)
+    for reason, count in removed.items():
+        RAG_COMPACTION_REMOVED_TOTAL.labels(reason=reason).inc(count)
+
+
+def observe_rag_near_hit(kind: str, result: str) -> None:
+    RAG_NEAR_HIT_TOTAL.labels(kind=kind, result=result).inc()
+
+
+def observe_rag_near_hit_audit(result: str) -> None:
+    RAG_NEAR_HIT_AUDIT_TOTAL.labels(result=result).inc()
+
+
+def observe_rag_exact_hit(kind: str, result: str) -> None:
+    RAG_EXACT_HIT_TOTAL.labels(kind=kind, result=result).inc()
+
+
+def observe_llm_endpoint_state(endpoint: str, outstanding: int, up: bool) -> None:
+    LLM_ENDPOINT_OUTSTANDING.labels(endpoint=endpoint).set(outstanding)
+    LLM_ENDPOINT_UP.labels(endpoint=endpoint).set(1 if up else 0)
+
+
+def observe_llm_endpoint_request(endpoint: str, result: str) -> None:
+    LLM_ENDPOINT_REQUESTS_TOTAL.labels(endpoint=endpoint, result=result).inc()
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """
+    Exposição no formato texto do Prometheus: (payload, content_type).
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,31 +1,63 @@
 # External/vector/chromadb_vector_store.py
 
-from typing import Optional, Dict, Any, List
+import threading
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 
+from langchain.schema import Document
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
+from chromadb import PersistentClient
 from chromadb.config import Settings
 
+from External.vector.iracema_vector_sidecar_client import VectorSidecarClient
+from External.vector.vector_store_base import StoreRetriever, VectorStoreBase
+
 client_settings = Settings(anonymized_telemetry=False)
 
-class ChromaDBVectorStore:
+# get/delete paginados: o Chroma limita o número de variáveis por consulta SQLite
+_PAGE_SIZE = 1000
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# um modelo por processo, compartilhado pelas coleções (partições por tabela)
+_shared_embeddings: Optional[HuggingFaceEmbeddings] = None
+_shared_embeddings_lock = threading.Lock()
+
+
+def _get_shared_embeddings() -> HuggingFaceEmbeddings:
+    global _shared_embeddings
+    with _shared_embeddings_lock:
+        if _shared_embeddings is None:
+            _shared_embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+        return _shared_embeddings
+
+
+class ChromaDBVectorStore(VectorStoreBase):
+    """
+    Modo local: Chroma + modelo de embeddings no próprio processo.
+    Modo cliente (sidecar informado): embeddings e coleção ficam no processo do
+    sidecar (Presentation/API/workers/vector_sidecar.py), compartilhado pelos workers.
+    """
+
     def __init__(
         self,
         persist_directory: str,
         collection_name: str = "iracema_memory",
+        sidecar: Optional[VectorSidecarClient] = None,
     ):
         self.persist_directory = persist_directory
         self.collection_name = collection_name
+        self._sidecar = sidecar
         self._vs = None
+        self._embeddings = None
 
     def _ensure_vs(self):
         if self._vs is not None:
             return
 
-        embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
+        embeddings = _get_shared_embeddings()
 
+        self._embeddings = embeddings
         self._vs = Chroma(
             persist_directory=self.persist_directory,
             embedding_function=embeddings,
@@ -40,15 +72,163 @@ class ChromaDBVectorStore:
         metadatas: Optional[List[Dict[str, Any]]] = None,
         ids: Optional[List[str]] = None,
     ) -> None:
+        if self._sidecar is not None:
+            self._sidecar.post("/add_texts", {
+                "collection": self.collection_name,
+                "texts": list(texts),
+                "metadatas": metadatas,
+                "ids": ids,
+            })
+            return
         self._ensure_vs()
         self._vs.add_texts(texts=texts, metadatas=metadatas, ids=ids)
         #self._vs.persist()
 
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[Sequence[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        if ids is None:
+            raise ValueError("add_embeddings exige ids estáveis para upsert.")
+        texts = list(texts)
+        embeddings = [list(map(float, e)) for e in embeddings]
+        metadatas = list(metadatas or [{} for _ in texts])
+        ids = list(ids)
+        if self._sidecar is not None:
+            self._sidecar.post("/add_embeddings", {
+                "collection": self.collection_name,
+                "texts": texts,
+                "embeddings": embeddings,
+                "metadatas": metadatas,
+                "ids": ids,
+            })
+            return
+        self._ensure_vs()
+        for i in range(0, len(ids), _PAGE_SIZE):
+            self._vs._collection.upsert(
+                ids=ids[i : i + _PAGE_SIZE],
+                embeddings=embeddings[i : i + _PAGE_SIZE],
+                documents=texts[i : i + _PAGE_SIZE],
+                metadatas=metadatas[i : i + _PAGE_SIZE],
+            )
+
     def similarity_search(self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None):
+        if self._sidecar is not None:
+            resp = self._sidecar.post("/similarity_search", {
+                "collection": self.collection_name,
+                "query": query,
+                "k": int(k),
+                "where": where or {},
+            })
+            return [
+                Document(page_content=d.get("page_content") or "", metadata=d.get("metadata") or {})
+                for d in resp.get("documents") or []
+            ]
         self._ensure_vs()
         return self._vs.similarity_search(query, k=int(k), filter=where or {})
 
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Busca com embedding já calculado (o sidecar embeda as consultas em lote).
+        """
+        self._ensure_vs()
+        return self._vs.similarity_search_by_vector(embedding, k=int(k), filter=where or {})
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeddings com o mesmo modelo da coleção (usado no schema linking).
+        """
+        if self._sidecar is not None:
+            resp = self._sidecar.post("/embed", {"texts": list(texts)})
+            return resp.get("embeddings") or []
+        self._ensure_vs()
+        return self._embeddings.embed_documents(list(texts))
+
+    def list_entries(self, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        if self._sidecar is not None:
+            resp = self._sidecar.post("/list_entries", {"collection": self.collection_name, "where": where or {}})
+            return [(e["id"], e.get("metadata") or {}) for e in resp.get("entries") or []]
+        self._ensure_vs()
+        entries: List[Tuple[str, Dict[str, Any]]] = []
+        offset = 0
+        while True:
+            page = self._vs.get(where=where or None, limit=_PAGE_SIZE, offset=offset, include=["metadatas"])
+            ids = list(page.get("ids") or [])
+            if not ids:
+                break
+            entries.extend(zip(ids, [m or {} for m in page.get("metadatas") or [{} for _ in ids]]))
+            offset += len(ids)
+        return entries
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        ids = list(ids or [])
+        if not ids:
+            return []
+        if self._sidecar is not None:
+            resp = self._sidecar.post("/get_by_ids", {"collection": self.collection_name, "ids": ids})
+            return [
+                Document(page_content=d.get("page_content") or "", metadata=d.get("metadata") or {})
+                for d in resp.get("documents") or []
+            ]
+        self._ensure_vs()
+        page = self._vs.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            doc_id: Document(page_content=doc or "", metadata=meta or {})
+            for doc_id, doc, meta in zip(page.get("ids") or [], page.get("documents") or [], page.get("metadatas") or [])
+        }
+        return [by_id[i] for i in ids if i in by_id]
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        ids = list(ids or [])
+        if not ids:
+            return
+        if self._sidecar is not None:
+            self._sidecar.post(
+                "/update_metadatas",
+                {"collection": self.collection_name, "ids": ids, "metadatas": list(metadatas)},
+            )
+            return
+        self._ensure_vs()
+        for i in range(0, len(ids), _PAGE_SIZE):
+            self._vs._collection.update(ids=ids[i : i + _PAGE_SIZE], metadatas=list(metadatas[i : i + _PAGE_SIZE]))
+
+    def delete(self, ids: List[str]) -> None:
+        ids = list(ids or [])
+        if not ids:
+            return
+        if self._sidecar is not None:
+            self._sidecar.post("/delete", {"collection": self.collection_name, "ids": ids})
+            return
+        self._ensure_vs()
+        for i in range(0, len(ids), _PAGE_SIZE):
+            self._vs.delete(ids=ids[i : i + _PAGE_SIZE])
+
+    def count(self) -> int:
+        if self._sidecar is not None:
+            return int(self._sidecar.post("/count", {"collection": self.collection_name}).get("count") or 0)
+        self._ensure_vs()
+        return int(self._vs._collection.count())
+
+    def list_collections(self) -> List[str]:
+        """
+        Nomes das coleções no mesmo diretório (partições do RAG).
+        """
+        if self._sidecar is not None:
+            return list(self._sidecar.post("/collections", {}).get("collections") or [])
+        client = PersistentClient(path=self.persist_directory, settings=client_settings)
+        # chromadb >= 0.6 devolve nomes; versões anteriores, objetos Collection
+        return [c if isinstance(c, str) else c.name for c in client.list_collections()]
 
     def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None):
+        if self._sidecar is not None:
+            return StoreRetriever(store=self, search_kwargs=search_kwargs or {})
         self._ensure_vs()
         return self._vs.as_retriever(search_kwargs=search_kwargs or {})
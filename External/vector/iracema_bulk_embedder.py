@@ -0,0 +1,47 @@
+# External/vector/iracema_bulk_embedder.py
+
+from typing import List, Optional
+
+from sentence_transformers import SentenceTransformer
+
+
+class BulkEmbedder:
+    """
+    Embeddings em lotes grandes para cargas offline (reconstrução da memória RAG).
+
+    - processes > 1: pool multiprocesso do sentence-transformers na CPU
+      (uma cópia do modelo por processo, cada um com um pedaço do lote)
+    - mesmo pré-processamento do HuggingFaceEmbeddings usado na indexação ao vivo
+      (quebras de linha viram espaço, sem normalização), para os vetores baterem
+    """
+
+    def __init__(self, model_name: str, processes: int = 1, batch_size: int = 64):
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self._batch_size = max(1, int(batch_size))
+        self._pool: Optional[dict] = None
+        if int(processes) > 1:
+            self._pool = self._model.start_multi_process_pool(target_devices=["cpu"] * int(processes))
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        texts = [t.replace("\n", " ") for t in texts]
+        if not texts:
+            return []
+        if self._pool is not None:
+            vectors = self._model.encode_multi_process(texts, self._pool, batch_size=self._batch_size)
+        else:
+            vectors = self._model.encode(texts, batch_size=self._batch_size, show_progress_bar=False)
+        return [list(map(float, v)) for v in vectors]
+
+    def dimensions(self) -> int:
+        return int(self._model.get_sentence_embedding_dimension())
+
+    def close(self) -> None:
+        if self._pool is not None:
+            SentenceTransformer.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def __enter__(self) -> "BulkEmbedder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,75 @@
+# External/vector/iracema_embedding_batcher.py
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+from External.metrics.iracema_prometheus_metrics import observe_embedding_batch
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+class EmbeddingBatcher:
+    """
+    Agrupa pedidos de embedding concorrentes (de vários workers/requisições) numa
+    única chamada ao modelo: a primeira requisição abre uma janela de max_wait_ms
+    e tudo que chegar até max_batch textos vai junto.
+    """
+
+    def __init__(self, embed_fn: EmbedFn, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self._embed_fn = embed_fn
+        self._max_batch = max(1, int(max_batch))
+        self._max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._pending: List[Tuple[List[str], Future]] = []
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="iracema-embed-batcher", daemon=True)
+        self._worker.start()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((texts, future))
+            self._cond.notify()
+        return future.result()
+
+    def _take_batch(self) -> List[Tuple[List[str], Future]]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            # janela curta para juntar pedidos que chegam quase juntos
+            deadline = time.monotonic() + self._max_wait
+            while sum(len(t) for t, _ in self._pending) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+
+            batch: List[Tuple[List[str], Future]] = []
+            size = 0
+            while self._pending and (not batch or size + len(self._pending[0][0]) <= self._max_batch):
+                item = self._pending.pop(0)
+                batch.append(item)
+                size += len(item[0])
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            try:
+                vectors = self._embed_fn(texts)
+            except Exception as ex:
+                for _, future in batch:
+                    future.set_exception(ex)
+                continue
+
+            observe_embedding_batch(requests=len(batch), texts=len(texts))
+            pos = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[pos : pos + len(item_texts)])
+                pos += len(item_texts)
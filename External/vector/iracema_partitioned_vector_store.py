@@ -0,0 +1,247 @@
+# External/vector/iracema_partitioned_vector_store.py
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain.schema import Document
+
+from External.vector.vector_store_base import StoreRetriever, VectorStoreBase
+
+# nome de coleção do Chroma: 3-63 caracteres [a-zA-Z0-9._-], começa/termina alfanumérico
+_MAX_COLLECTION_NAME = 63
+_UNSAFE = re.compile(r"[^a-zA-Z0-9_-]+")
+_SEPARATOR = "__"
+
+
+def partition_collection_name(base_collection: str, partition_key: str) -> str:
+    """
+    Coleção da partição: '<base>__<chave>' (chave saneada; nomes longos levam hash).
+    """
+    slug = _UNSAFE.sub("_", (partition_key or "").strip()).strip("_-") or "default"
+    name = f"{base_collection}{_SEPARATOR}{slug}"
+    if len(name) > _MAX_COLLECTION_NAME:
+        digest = hashlib.sha1(partition_key.encode("utf-8")).hexdigest()[:10]
+        name = f"{name[: _MAX_COLLECTION_NAME - len(digest) - 1].rstrip('_-')}_{digest}"
+    return name
+
+
+def _table_of_where(where: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not where:
+        return None
+    value = where.get("table_identifier")
+    if isinstance(value, str):
+        return value
+    for cond in where.get("$and") or []:
+        found = _table_of_where(cond)
+        if found:
+            return found
+    return None
+
+
+class PartitionedVectorStore(VectorStoreBase):
+    """
+    Memória RAG particionada por datasource: uma coleção por tabela (ou por grupo,
+    via partition_of) em vez de uma coleção global filtrada por table_identifier.
+    Cada busca percorre só o índice HNSW da partição, que não cresce com as demais.
+
+    - store_factory(nome_coleção) abre a coleção (sob demanda)
+    - partições abertas ficam num LRU de max_open; a menos usada é fechada
+    - documento sem table_identifier vai para a coleção base
+    - chamadas sem tabela (compactação, contagem) percorrem todas as partições
+    """
+
+    def __init__(
+        self,
+        store_factory: Callable[[str], VectorStoreBase],
+        list_collections: Callable[[], List[str]],
+        base_collection: str = "iracema_memory",
+        partition_of: Optional[Callable[[str], str]] = None,
+        max_open: int = 64,
+    ):
+        self.collection_name = base_collection
+        self._factory = store_factory
+        self._list_collections = list_collections
+        self._partition_of = partition_of or (lambda table_identifier: table_identifier)
+        self._max_open = max(1, int(max_open))
+
+        self._open: "OrderedDict[str, VectorStoreBase]" = OrderedDict()
+        self._lock = threading.Lock()
+        # id -> coleção (get/delete/update por id sem varrer todas as partições)
+        self._id_partition: Dict[str, str] = {}
+
+    # -------------------------------------------------------------------------
+    # Partições
+    # -------------------------------------------------------------------------
+
+    def collection_for_table(self, table_identifier: Optional[str]) -> str:
+        if not table_identifier:
+            return self.collection_name
+        return partition_collection_name(self.collection_name, self._partition_of(table_identifier))
+
+    def _store(self, collection: str) -> VectorStoreBase:
+        with self._lock:
+            store = self._open.get(collection)
+            if store is not None:
+                self._open.move_to_end(collection)
+                return store
+            store = self._factory(collection)
+            self._open[collection] = store
+            while len(self._open) > self._max_open:
+                self._open.popitem(last=False)
+            return store
+
+    def partitions(self) -> List[str]:
+        prefix = self.collection_name + _SEPARATOR
+        return sorted(
+            name for name in self._list_collections()
+            if name == self.collection_name or name.startswith(prefix)
+        )
+
+    def _remember(self, collection: str, ids: List[str]) -> None:
+        for doc_id in ids:
+            self._id_partition[doc_id] = collection
+
+    def _group_ids(self, ids: List[str]) -> Dict[str, List[str]]:
+        """
+        ids conhecidos -> sua coleção; desconhecidos -> todas as partições.
+        """
+        grouped: Dict[str, List[str]] = defaultdict(list)
+        unknown = []
+        for doc_id in ids:
+            collection = self._id_partition.get(doc_id)
+            if collection:
+                grouped[collection].append(doc_id)
+            else:
+                unknown.append(doc_id)
+        if unknown:
+            for collection in self.partitions():
+                grouped[collection].extend(unknown)
+        return grouped
+
+    # -------------------------------------------------------------------------
+    # VectorStoreBase
+    # -------------------------------------------------------------------------
+
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for i, meta in enumerate(metadatas):
+            groups[self.collection_for_table((meta or {}).get("table_identifier"))].append(i)
+
+        for collection, idx in groups.items():
+            group_ids = [ids[i] for i in idx] if ids is not None else None
+            self._store(collection).add_texts(
+                texts=[texts[i] for i in idx],
+                metadatas=[metadatas[i] for i in idx],
+                ids=group_ids,
+            )
+            if group_ids:
+                self._remember(collection, group_ids)
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[Sequence[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        if ids is None:
+            raise ValueError("add_embeddings exige ids estáveis para upsert.")
+        texts = list(texts)
+        embeddings = list(embeddings)
+        metadatas = metadatas or [{} for _ in texts]
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for i, meta in enumerate(metadatas):
+            groups[self.collection_for_table((meta or {}).get("table_identifier"))].append(i)
+
+        for collection, idx in groups.items():
+            group_ids = [ids[i] for i in idx]
+            self._store(collection).add_embeddings(
+                texts=[texts[i] for i in idx],
+                embeddings=[embeddings[i] for i in idx],
+                metadatas=[metadatas[i] for i in idx],
+                ids=group_ids,
+            )
+            self._remember(collection, group_ids)
+
+    def similarity_search(self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None):
+        table = _table_of_where(where)
+        if table:
+            return self._store(self.collection_for_table(table)).similarity_search(query, k=k, where=where)
+
+        # sem tabela no filtro: intercala os melhores de cada partição (sem score comum)
+        per_partition = [
+            self._store(c).similarity_search(query, k=k, where=where) for c in self.partitions()
+        ]
+        merged: List[Document] = []
+        for rank in range(int(k)):
+            merged.extend(docs[rank] for docs in per_partition if rank < len(docs))
+        return merged[: int(k)]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return self._store(self.collection_name).embed_texts(texts)
+
+    def list_entries(self, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        table = _table_of_where(where)
+        collections = [self.collection_for_table(table)] if table else self.partitions()
+        entries: List[Tuple[str, Dict[str, Any]]] = []
+        for collection in collections:
+            found = self._store(collection).list_entries(where=where)
+            self._remember(collection, [doc_id for doc_id, _ in found])
+            entries.extend(found)
+        return entries
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        ids = list(ids or [])
+        if not ids:
+            return []
+        by_id: Dict[str, Document] = {}
+        for collection, group in self._group_ids(ids).items():
+            pending = [doc_id for doc_id in group if doc_id not in by_id]
+            if not pending:
+                continue
+            store = self._store(collection)
+            docs = store.get_by_ids(pending)
+            if len(docs) == len(pending):
+                by_id.update(zip(pending, docs))
+                continue
+            # algum id não está nesta coleção: Documents não trazem o id, busca um a um
+            for doc_id in pending:
+                found = store.get_by_ids([doc_id]) if docs else []
+                if found:
+                    by_id[doc_id] = found[0]
+                    self._id_partition[doc_id] = collection
+        return [by_id[i] for i in ids if i in by_id]
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        groups: Dict[str, Tuple[List[str], List[Dict[str, Any]]]] = defaultdict(lambda: ([], []))
+        for doc_id, meta in zip(ids or [], metadatas or []):
+            collection = self._id_partition.get(doc_id) or self.collection_for_table(meta.get("table_identifier"))
+            groups[collection][0].append(doc_id)
+            groups[collection][1].append(meta)
+        for collection, (group_ids, group_metas) in groups.items():
+            self._store(collection).update_metadatas(group_ids, group_metas)
+
+    def delete(self, ids: List[str]) -> None:
+        ids = list(ids or [])
+        if not ids:
+            return
+        for collection, group in self._group_ids(ids).items():
+            self._store(collection).delete(group)
+        for doc_id in ids:
+            self._id_partition.pop(doc_id, None)
+
+    def count(self) -> int:
+        return sum(self._store(c).count() for c in self.partitions())
+
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None):
+        return StoreRetriever(store=self, search_kwargs=search_kwargs or {})
@@ -0,0 +1,90 @@
+# External/vector/iracema_vector_sidecar_client.py
+
+import http.client
+import json
+import socket
+import threading
+from typing import Any, Dict
+from urllib.parse import urlparse
+
+
+class VectorSidecarError(RuntimeError):
+    """
+    O sidecar de embeddings/vector store respondeu com erro ou está fora do ar.
+    """
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._socket_path)
+        self.sock = sock
+
+
+class VectorSidecarClient:
+    """
+    Cliente JSON do sidecar (Presentation/API/workers/vector_sidecar.py).
+
+    url: 'unix:///run/iracema/vector.sock' ou 'http://127.0.0.1:9191'.
+    Uma conexão keep-alive por thread (sem dependências além da stdlib).
+    """
+
+    def __init__(self, url: str, timeout_secs: float = 30.0):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("unix", "http"):
+            raise ValueError(f"URL do sidecar inválida: {url} (use unix:///caminho.sock ou http://host:porta)")
+        self._url = url
+        self._parsed = parsed
+        self._timeout = float(timeout_secs)
+        self._local = threading.local()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._parsed.scheme == "unix":
+            return _UnixHTTPConnection(self._parsed.path, timeout=self._timeout)
+        return http.client.HTTPConnection(
+            self._parsed.hostname or "127.0.0.1",
+            self._parsed.port or 80,
+            timeout=self._timeout,
+        )
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def request(self, method: str, path: str, payload: Dict[str, Any] = None) -> Dict[str, Any]:
+        body = json.dumps(payload or {}, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+
+        # conexão keep-alive pode ter sido fechada pelo servidor: uma nova tentativa
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body if method != "GET" else None, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (ConnectionError, http.client.HTTPException, socket.timeout, OSError) as ex:
+                self._drop_connection()
+                if attempt == 1:
+                    raise VectorSidecarError(f"Sidecar indisponível em {self._url}: {ex}") from ex
+
+        if resp.status != 200:
+            raise VectorSidecarError(f"Sidecar {path} -> HTTP {resp.status}: {data[:300]!r}")
+        return json.loads(data or b"{}")
+
+    def post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self.request("POST", path, payload)
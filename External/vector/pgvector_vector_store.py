@@ -0,0 +1,356 @@
+# External/vector/pgvector_vector_store.py
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain.schema import Document
+from langchain_huggingface import HuggingFaceEmbeddings
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from External.vector.vector_store_base import StoreRetriever, VectorStoreBase
+
+# metadados promovidos a colunas (filtros com índice B-tree); o resto fica no jsonb
+FILTER_COLUMNS = ("type", "table_identifier", "question_norm")
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,62}$")
+
+
+def _to_vector_literal(embedding: Sequence[float]) -> str:
+    return "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+
+
+def _filter_value(value: Any) -> str:
+    # ->> devolve texto: compara com a mesma representação do jsonb
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _where_to_sql(where: Dict[str, Any], params: Dict[str, Any]) -> List[str]:
+    """
+    Subconjunto do filtro do Chroma: igualdade, {"$eq": v} e {"$and": [...]}.
+    """
+    clauses: List[str] = []
+    for key, value in (where or {}).items():
+        if key == "$and":
+            for sub in value or []:
+                clauses.extend(_where_to_sql(sub, params))
+            continue
+        if key.startswith("$"):
+            raise ValueError(f"Operador de filtro não suportado no pgvector: {key}")
+
+        if isinstance(value, dict):
+            if set(value.keys()) != {"$eq"}:
+                raise ValueError(f"Operador de filtro não suportado no pgvector: {value}")
+            value = value["$eq"]
+
+        name = f"p{len(params)}"
+        if key in FILTER_COLUMNS:
+            clauses.append(f"{key} = :{name}")
+            params[name] = _filter_value(value)
+        else:
+            params[f"{name}k"] = key
+            clauses.append(f"metadata ->> :{name}k = :{name}")
+            params[name] = _filter_value(value)
+    return clauses
+
+
+class PgVectorStore(VectorStoreBase):
+    """
+    Memória RAG no Postgres (extensão pgvector), compartilhada entre réplicas da API.
+
+    - uma linha por documento: id, collection, documento, embedding, metadados (jsonb)
+    - type/table_identifier/question_norm como colunas reais (filtro indexado)
+    - índice ANN: hnsw (padrão) ou ivfflat, distância de cosseno
+    - escrita transacional (upsert por id)
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        collection_name: str = "iracema_memory",
+        table_name: str = "iracema_rag_memory",
+        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+        dimensions: int = 384,
+        index_type: str = "hnsw",
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 64,
+        hnsw_ef_search: int = 40,
+        ivfflat_lists: int = 100,
+        ivfflat_probes: int = 10,
+    ):
+        if not _IDENTIFIER.match(table_name):
+            raise ValueError(f"Nome de tabela inválido para o pgvector: {table_name}")
+        if index_type not in ("hnsw", "ivfflat"):
+            raise ValueError(f"Índice pgvector inválido: {index_type} (use hnsw ou ivfflat)")
+
+        self._engine = engine
+        self.collection_name = collection_name
+        self.table_name = table_name
+        self._embedding_model = embedding_model
+        self._dimensions = int(dimensions)
+        self._index_type = index_type
+        self._hnsw_m = int(hnsw_m)
+        self._hnsw_ef_construction = int(hnsw_ef_construction)
+        self._hnsw_ef_search = int(hnsw_ef_search)
+        self._ivfflat_lists = int(ivfflat_lists)
+        self._ivfflat_probes = int(ivfflat_probes)
+        self._embeddings = None
+
+    def _ensure_embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = HuggingFaceEmbeddings(model_name=self._embedding_model)
+        return self._embeddings
+
+    # -------------------------------------------------------------------------
+    # Schema
+    # -------------------------------------------------------------------------
+
+    def _vector_index_sql(self) -> str:
+        t = self.table_name
+        if self._index_type == "hnsw":
+            return (
+                f"CREATE INDEX IF NOT EXISTS ix_{t}_embedding_hnsw ON {t} "
+                f"USING hnsw (embedding vector_cosine_ops) "
+                f"WITH (m = {self._hnsw_m}, ef_construction = {self._hnsw_ef_construction})"
+            )
+        return (
+            f"CREATE INDEX IF NOT EXISTS ix_{t}_embedding_ivfflat ON {t} "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {self._ivfflat_lists})"
+        )
+
+    def ensure_schema(self) -> None:
+        """
+        Extensão + tabela + índices (idempotente).
+        """
+        t = self.table_name
+        with self._engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {t} (
+                    id               TEXT        NOT NULL,
+                    collection       TEXT        NOT NULL,
+                    document         TEXT        NOT NULL,
+                    embedding        vector({self._dimensions}) NOT NULL,
+                    type             TEXT        NULL,
+                    table_identifier TEXT        NULL,
+                    question_norm    TEXT        NULL,
+                    metadata         JSONB       NOT NULL DEFAULT '{{}}'::jsonb,
+                    created_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    updated_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (collection, id)
+                )
+            """))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{t}_filter "
+                f"ON {t} (collection, table_identifier, type)"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{t}_question "
+                f"ON {t} (collection, table_identifier, question_norm)"
+            ))
+            conn.execute(text(self._vector_index_sql()))
+
+    def rebuild_vector_index(self) -> None:
+        """
+        Recria o índice ANN (ivfflat calcula as listas com os dados existentes:
+        rode após a carga inicial/migração).
+        """
+        suffix = "hnsw" if self._index_type == "hnsw" else "ivfflat"
+        with self._engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX IF EXISTS ix_{self.table_name}_embedding_{suffix}"))
+            conn.execute(text(self._vector_index_sql()))
+
+    # -------------------------------------------------------------------------
+    # Escrita
+    # -------------------------------------------------------------------------
+
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        texts = list(texts)
+        if not texts:
+            return
+        embeddings = self.embed_texts(texts)
+        self.add_embeddings(texts, embeddings, metadatas=metadatas, ids=ids)
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[Sequence[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Upsert com embeddings já calculados (migração do Chroma, reindexação em lote).
+        """
+        if ids is None:
+            raise ValueError("PgVectorStore exige ids estáveis para upsert.")
+        metadatas = metadatas or [{} for _ in texts]
+
+        rows = []
+        for doc_id, doc, emb, meta in zip(ids, texts, embeddings, metadatas):
+            meta = dict(meta or {})
+            rows.append({
+                "id": str(doc_id),
+                "collection": self.collection_name,
+                "document": doc,
+                "embedding": _to_vector_literal(emb),
+                "type": meta.get("type"),
+                "table_identifier": meta.get("table_identifier"),
+                "question_norm": meta.get("question_norm"),
+                "metadata": json.dumps(meta, ensure_ascii=False),
+            })
+
+        sql = text(f"""
+            INSERT INTO {self.table_name}
+                (id, collection, document, embedding, type, table_identifier, question_norm, metadata)
+            VALUES
+                (:id, :collection, :document, CAST(:embedding AS vector), :type,
+                 :table_identifier, :question_norm, CAST(:metadata AS jsonb))
+            ON CONFLICT (collection, id) DO UPDATE SET
+                document = EXCLUDED.document,
+                embedding = EXCLUDED.embedding,
+                type = EXCLUDED.type,
+                table_identifier = EXCLUDED.table_identifier,
+                question_norm = EXCLUDED.question_norm,
+                metadata = EXCLUDED.metadata,
+                updated_at = now()
+        """)
+        with self._engine.begin() as conn:
+            conn.execute(sql, rows)
+
+    # -------------------------------------------------------------------------
+    # Leitura
+    # -------------------------------------------------------------------------
+
+    def _search_settings_sql(self) -> str:
+        if self._index_type == "hnsw":
+            return f"SET LOCAL hnsw.ef_search = {self._hnsw_ef_search}"
+        return f"SET LOCAL ivfflat.probes = {self._ivfflat_probes}"
+
+    def similarity_search(self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, where=where)]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        params: Dict[str, Any] = {"collection": self.collection_name, "k": int(k)}
+        clauses = ["collection = :collection"] + _where_to_sql(where or {}, params)
+
+        # filtro por question_norm já é busca exata: dispensa o embedding da consulta
+        exact = any(c.startswith("question_norm = ") for c in clauses)
+        if exact:
+            select_distance = "0.0 AS distance"
+            order_by = "updated_at DESC"
+        else:
+            params["q"] = _to_vector_literal(self.embed_texts([query])[0])
+            select_distance = "embedding <=> CAST(:q AS vector) AS distance"
+            order_by = "embedding <=> CAST(:q AS vector)"
+
+        sql = text(f"""
+            SELECT document, metadata, {select_distance}
+            FROM {self.table_name}
+            WHERE {" AND ".join(clauses)}
+            ORDER BY {order_by}
+            LIMIT :k
+        """)
+        with self._engine.begin() as conn:
+            if not exact:
+                conn.execute(text(self._search_settings_sql()))
+            rows = conn.execute(sql, params).fetchall()
+
+        return [
+            (Document(page_content=row[0], metadata=row[1] or {}), float(row[2]))
+            for row in rows
+        ]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return self._ensure_embeddings().embed_documents(list(texts))
+
+    def list_entries(self, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        params: Dict[str, Any] = {"collection": self.collection_name}
+        clauses = ["collection = :collection"] + _where_to_sql(where or {}, params)
+        sql = text(f"SELECT id, metadata FROM {self.table_name} WHERE {' AND '.join(clauses)}")
+        with self._engine.begin() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [(row[0], row[1] or {}) for row in rows]
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        ids = [str(i) for i in ids or []]
+        if not ids:
+            return []
+        sql = text(
+            f"SELECT id, document, metadata FROM {self.table_name} "
+            f"WHERE collection = :collection AND id = ANY(:ids)"
+        )
+        with self._engine.begin() as conn:
+            rows = conn.execute(sql, {"collection": self.collection_name, "ids": ids}).fetchall()
+        by_id = {row[0]: Document(page_content=row[1], metadata=row[2] or {}) for row in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        rows = [
+            {
+                "id": str(doc_id),
+                "collection": self.collection_name,
+                "type": meta.get("type"),
+                "table_identifier": meta.get("table_identifier"),
+                "question_norm": meta.get("question_norm"),
+                "metadata": json.dumps(meta, ensure_ascii=False),
+            }
+            for doc_id, meta in zip(ids or [], metadatas or [])
+        ]
+        if not rows:
+            return
+        sql = text(f"""
+            UPDATE {self.table_name} SET
+                type = :type,
+                table_identifier = :table_identifier,
+                question_norm = :question_norm,
+                metadata = CAST(:metadata AS jsonb),
+                updated_at = now()
+            WHERE collection = :collection AND id = :id
+        """)
+        with self._engine.begin() as conn:
+            conn.execute(sql, rows)
+
+    def delete(self, ids: List[str]) -> None:
+        ids = [str(i) for i in ids or []]
+        if not ids:
+            return
+        sql = text(f"DELETE FROM {self.table_name} WHERE collection = :collection AND id = ANY(:ids)")
+        with self._engine.begin() as conn:
+            conn.execute(sql, {"collection": self.collection_name, "ids": ids})
+
+    def count(self) -> int:
+        sql = text(f"SELECT count(*) FROM {self.table_name} WHERE collection = :collection")
+        with self._engine.begin() as conn:
+            return int(conn.execute(sql, {"collection": self.collection_name}).scalar() or 0)
+
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None):
+        return StoreRetriever(store=self, search_kwargs=search_kwargs or {})
+
+
+def build_pgvector_store(engine: Engine, settings, collection_name: str = "iracema_memory") -> PgVectorStore:
+    """
+    PgVectorStore com a configuração VectorStore.Pg* (API, migração e reconstrução da memória).
+    """
+    return PgVectorStore(
+        engine=engine,
+        collection_name=collection_name,
+        table_name=settings.VECTORSTORE_PG_TABLE,
+        dimensions=settings.VECTORSTORE_PG_DIMENSIONS,
+        index_type=settings.VECTORSTORE_PG_INDEX,
+        hnsw_m=settings.VECTORSTORE_PG_HNSW_M,
+        hnsw_ef_construction=settings.VECTORSTORE_PG_HNSW_EF_CONSTRUCTION,
+        hnsw_ef_search=settings.VECTORSTORE_PG_HNSW_EF_SEARCH,
+        ivfflat_lists=settings.VECTORSTORE_PG_IVFFLAT_LISTS,
+        ivfflat_probes=settings.VECTORSTORE_PG_IVFFLAT_PROBES,
+    )
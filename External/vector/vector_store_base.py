@@ -1,16 +1,111 @@
 # External/vector/vector_store_base.py
 
 from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain.schema import BaseRetriever, Document
 
 
 class VectorStoreBase(ABC):
     """
     Interface genérica para banco vetorial.
+
+    Filtros (where) seguem o subconjunto do Chroma usado pelo RAG:
+    igualdade {"campo": valor} e {"$and": [{...}, {...}]}.
     """
 
     @abstractmethod
-    def as_retriever(self):
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Upsert por id (mesmo id => substitui documento/metadados).
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[Sequence[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Upsert com embeddings já calculados (mesmo modelo da coleção): carga em lote.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def similarity_search(self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None):
+        """
+        Retorna até k Documents (page_content + metadata) mais próximos da query.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeddings com o mesmo modelo da coleção.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def list_entries(self, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        (id, metadados) de todos os documentos que casam com o filtro (sem embeddings).
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        """
+        Documents (page_content + metadata) dos ids existentes, na ordem pedida.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """
+        Substitui os metadados dos ids (sem recalcular embeddings).
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """
+        Remove documentos por id (ids inexistentes são ignorados).
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def count(self) -> int:
+        """
+        Total de documentos da coleção.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None):
         """
         Retorna um retriever compatível com LangChain.
         """
         raise NotImplementedError()
+
+
+class StoreRetriever(BaseRetriever):
+    """
+    Retriever LangChain sobre qualquer VectorStoreBase (search_kwargs: k, filter).
+    """
+    store: Any
+    search_kwargs: Dict[str, Any] = {}
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.store.similarity_search(
+            query,
+            k=int(self.search_kwargs.get("k", 4)),
+            where=self.search_kwargs.get("filter"),
+        )
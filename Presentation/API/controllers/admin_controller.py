@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from External.ai.iracema_llm_completion_cache import LLMCompletionCache
+from External.ai.iracema_ollama_endpoint_pool import OllamaEndpointPool
+from Application.dto.iracema_llm_usage_dto import IracemaLLMUsageStatsResponseDto
+from Application.interfaces.i_iracema_llm_usage_service import IIracemaLLMUsageService
+from Application.dto.iracema_rag_compaction_dto import IracemaRagCompactionReportDto, IracemaRagRekeyReportDto
+from Application.interfaces.i_iracema_rag_compaction_service import IIracemaRagCompactionService
+
+from Presentation.API.helpers.iracema_dependencies_helper import (
+    get_current_user,
+    get_llm_completion_cache,
+    get_llm_endpoint_pool,
+    get_llm_usage_service,
+    get_rag_compaction_service,
+)
+
+router = APIRouter()
+
+
+def _require_cache(cache: Optional[LLMCompletionCache]) -> LLMCompletionCache:
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Cache de completions desabilitado (LLMCache.Enabled=false).")
+    return cache
+
+
+@router.get("/llm-cache")
+def llm_cache_stats(
+    user: Dict[str, Any] = Depends(get_current_user),
+    cache: Optional[LLMCompletionCache] = Depends(get_llm_completion_cache),
+) -> Dict[str, Any]:
+    """
+    Entradas do cache de completions por modelo.
+    """
+    return _require_cache(cache).stats()
+
+
+@router.delete("/llm-cache")
+def llm_cache_purge(
+    model: Optional[str] = None,
+    user: Dict[str, Any] = Depends(get_current_user),
+    cache: Optional[LLMCompletionCache] = Depends(get_llm_completion_cache),
+) -> Dict[str, Any]:
+    """
+    Limpa o cache de completions (todo ou só de um modelo, ex.: após trocar o prompt/modelo).
+    """
+    purged = _require_cache(cache).purge(model=model)
+    return {"purged": purged, "model": model}
+
+
+@router.get("/llm-pool")
+def llm_pool_status(
+    user: Dict[str, Any] = Depends(get_current_user),
+    pool: Optional[OllamaEndpointPool] = Depends(get_llm_endpoint_pool),
+) -> Dict[str, Any]:
+    """
+    Hosts Ollama do pool: saúde, estado do circuito e requisições em andamento.
+    """
+    if pool is None:
+        raise HTTPException(status_code=404, detail="Pool de LLM não configurado (LLMPool.BaseUrls vazio).")
+    return pool.snapshot()
+
+
+@router.get("/llm-usage", response_model=IracemaLLMUsageStatsResponseDto)
+def llm_usage_stats(
+    since_hours: Optional[float] = Query(24.0, gt=0, description="Janela em horas (vazio = todo o histórico)."),
+    group_by: List[str] = Query(["model", "datasource", "mode"], description="model, kind, datasource, mode"),
+    include_cache_hits: bool = False,
+    user: Dict[str, Any] = Depends(get_current_user),
+    service: IIracemaLLMUsageService = Depends(get_llm_usage_service),
+) -> IracemaLLMUsageStatsResponseDto:
+    """
+    p50/p95 de latência (parede e durações do Ollama) e tokens por chamada ao LLM.
+    """
+    try:
+        return service.stats(since_hours=since_hours, group_by=group_by, include_cache_hits=include_cache_hits)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+
+
+@router.post("/rag-compaction", response_model=IracemaRagCompactionReportDto)
+def rag_compaction(
+    dry_run: bool = Query(True, description="Só calcula o que seria removido."),
+    user: Dict[str, Any] = Depends(get_current_user),
+    service: IIracemaRagCompactionService = Depends(get_rag_compaction_service),
+) -> IracemaRagCompactionReportDto:
+    """
+    Compacta a memória RAG sob demanda (o mesmo job roda diariamente no scheduler).
+    """
+    return service.compact(dry_run=dry_run)
+
+
+@router.post("/rag-rekey", response_model=IracemaRagRekeyReportDto)
+def rag_rekey(
+    dry_run: bool = Query(True, description="Só conta as chaves que seriam recalculadas."),
+    user: Dict[str, Any] = Depends(get_current_user),
+    service: IIracemaRagCompactionService = Depends(get_rag_compaction_service),
+) -> IracemaRagRekeyReportDto:
+    """
+    Recalcula a chave canônica (question_norm) da memória RAG em lote, após
+    mudança da versão da canonicalização ou dos sinônimos de coluna
+    (o job diário do scheduler faz o mesmo antes de compactar).
+    """
+    return service.rekey(dry_run=dry_run)
@@ -1,11 +1,14 @@
 from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 from Application.dto.iracema_ask_dto import (
     IracemaAskRequestDto,
     IracemaAskResponseDto,
-    IracemaAskWithFcaRequestDto
+    IracemaAskWithFcaRequestDto,
+    IracemaAskBatchRequestDto,
+    IracemaAskBatchResponseDto,
 )
 from Application.interfaces.i_iracema_ask_service import IIracemaAskService
 from Application.interfaces.i_iracema_ask_by_fc_service import IIracemaAskByFCService
@@ -37,8 +40,9 @@ async def ask_iracema(
     - Orquestra pergunta → SQL → PostgreSQL → explicação em linguagem natural.
     """
     try:
-        # service.ask é síncrono
-        return service.ask(body)
+        # service.ask é síncrono: roda no threadpool para não bloquear o event loop
+        # (e permitir que perguntas idênticas concorrentes sejam coalescidas)
+        return await run_in_threadpool(service.ask, body)
     except Exception as ex:
         # fallback defensivo (idealmente logar aqui)
         raise HTTPException(status_code=500, detail=str(ex))
@@ -60,8 +64,9 @@ async def ask_iracema_heuristic(
     - Orquestra pergunta → SQL → PostgreSQL → explicação em linguagem natural.
     """
     try:
-        # service.ask é síncrono
-        return service.ask_heuristic(body)
+        # service.ask_heuristic é síncrono: roda no threadpool para não bloquear o event loop
+        # (e permitir que perguntas idênticas concorrentes sejam coalescidas)
+        return await run_in_threadpool(service.ask_heuristic, body)
     except Exception as ex:
         # fallback defensivo (idealmente logar aqui)
         raise HTTPException(status_code=500, detail=str(ex))
@@ -83,8 +88,9 @@ async def ask_iracema_ai(
     - Orquestra pergunta → SQL → PostgreSQL → explicação em linguagem natural.
     """
     try:
-        # service.ask é síncrono
-        return service.ask_ai(body)
+        # service.ask_ai é síncrono: roda no threadpool para não bloquear o event loop
+        # (e permitir que perguntas idênticas concorrentes sejam coalescidas)
+        return await run_in_threadpool(service.ask_ai, body)
     except Exception as ex:
         # fallback defensivo (idealmente logar aqui)
         raise HTTPException(status_code=500, detail=str(ex))
@@ -101,4 +107,11 @@ def ask_fc_args(
     request: IracemaAskWithFcaRequestDto,
     svc: IIracemaAskByFCService = Depends(get_iracema_ask_fc_service),
 ):
-    return svc.ask_fc_with_args(request)
\ No newline at end of file
+    return svc.ask_fc_with_args(request)
+
+@router.post("/ask/fc/batch", response_model=IracemaAskBatchResponseDto)
+def ask_fc_batch(
+    request: IracemaAskBatchRequestDto,
+    svc: IIracemaAskByFCService = Depends(get_iracema_ask_fc_service),
+):
+    return svc.ask_fc_batch(request)
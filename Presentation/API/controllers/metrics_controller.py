@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+
+from External.metrics.iracema_prometheus_metrics import render_latest
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """
+    Exposição Prometheus (histogramas de latência por etapa do /ask).
+    """
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -10,6 +10,7 @@ from Data.db_context import DbContext
 from Data.repositories.iracema_conversation_repository import IracemaConversationRepository
 from Data.repositories.iracema_message_repository import IracemaMessageRepository
 from Data.repositories.iracema_sql_log_repository import IracemaSQLLogRepository
+from Data.repositories.iracema_llm_call_log_repository import IracemaLLMCallLogRepository
 
 from Domain.iracema_enums import LLMProviderEnum, LLMModelEnum
 
@@ -18,6 +19,10 @@ from Application.services.iracema_ask_service import IracemaAskService
 from Application.services.iracema_llm_client_service import IracemaLLMClient
 
 from External.vector.chromadb_vector_store import ChromaDBVectorStore
+from External.vector.iracema_vector_sidecar_client import VectorSidecarClient
+from External.vector.iracema_partitioned_vector_store import PartitionedVectorStore
+from External.vector.pgvector_vector_store import build_pgvector_store
+from External.vector.vector_store_base import VectorStoreBase
 from Application.services.iracema_rag_index_service import IracemaRagIndexService
 from Application.services.iracema_rag_retrieve_service import IracemaRagRetrieveService
 
@@ -33,8 +38,19 @@ from Application.interfaces.i_iracema_start_catalog_service import IIracemaStart
 from Application.services.iracema_start_catalog_service import IracemaStartCatalogService
 
 from External.ai.iracema_fc_client_ollama import IracemaFCOllamaClient
+from External.ai.iracema_llm_completion_cache import LLMCompletionCache
+from External.ai.iracema_llm_scheduler import LLMPriority, LLMScheduler
+from External.ai.iracema_ollama_endpoint_pool import OllamaEndpointPool
 from Application.interfaces.i_iracema_ask_by_fc_service import IIracemaAskByFCService
 from Application.services.iracema_ask_by_fc_service import IracemaAskByFCService
+from Application.interfaces.i_iracema_schema_linking_service import IIracemaSchemaLinkingService
+from Application.services.iracema_schema_linking_service import IracemaSchemaLinkingService
+from Application.helpers.iracema_single_flight_helper import SingleFlight
+from Application.interfaces.i_iracema_llm_usage_service import IIracemaLLMUsageService
+from Application.services.iracema_llm_usage_service import IracemaLLMUsageService
+from Application.interfaces.i_iracema_rag_compaction_service import IIracemaRagCompactionService
+from Application.services.iracema_rag_compaction_service import IracemaRagCompactionService
+from Application.helpers.iracema_partition_resolver_helper import DatasourcePartitionResolver
 # -----------------------------------------------------------------------------
 # Auth (JWT Bearer)
 # -----------------------------------------------------------------------------
@@ -91,26 +107,119 @@ _db_context = DbContext(
 _conversation_repo = IracemaConversationRepository(_db_context)
 _message_repo = IracemaMessageRepository(_db_context)
 _sql_log_repo = IracemaSQLLogRepository(_db_context)
+_llm_call_log_repo = IracemaLLMCallLogRepository(_db_context)
 _datasource_repo = IracemaDataSourceRepository(_db_context)
 _context_repo = IracemaConversationContextRepository(_db_context)
 
-# passar a usar esse database
-# Vector store (Chroma persistente)
+# Vector store: pgvector (mesmo Postgres, compartilhado entre réplicas) ou Chroma persistente
+# (local ou via sidecar: EmbeddingSidecar.Url => um único modelo/coleção para todos os workers)
+# VectorStore.Partitioning (Chroma): uma coleção por datasource/categoria, abertas sob demanda
+# (migração: python -m Presentation.API.workers.vectorstore_partition)
 # DICA DEV: use algo como ~/.iracema/chroma para evitar permissão em /var/lib
-_vector_store = ChromaDBVectorStore(
-    persist_directory=getattr(settings, "VECTORSTORE_DIR", "/var/lib/iracema/chroma"),
-    collection_name="iracema_memory",
+_vector_sidecar = (
+    VectorSidecarClient(settings.EMBEDDING_SIDECAR_URL, timeout_secs=settings.EMBEDDING_SIDECAR_TIMEOUT_SECS)
+    if settings.EMBEDDING_SIDECAR_URL
+    else None
 )
 
+
+def _chroma_store(collection_name: str) -> ChromaDBVectorStore:
+    return ChromaDBVectorStore(
+        persist_directory=getattr(settings, "VECTORSTORE_DIR", "/var/lib/iracema/chroma"),
+        collection_name=collection_name,
+        sidecar=_vector_sidecar,
+    )
+
+
+_vector_store: VectorStoreBase
+if settings.VECTORSTORE_BACKEND == "pgvector":
+    _vector_store = build_pgvector_store(_db_context.engine, settings, collection_name="iracema_memory")
+elif settings.VECTORSTORE_PARTITIONING in ("table", "category"):
+    _vector_store = PartitionedVectorStore(
+        store_factory=_chroma_store,
+        list_collections=_chroma_store("iracema_memory").list_collections,
+        base_collection="iracema_memory",
+        partition_of=DatasourcePartitionResolver(_db_context, _datasource_repo, mode=settings.VECTORSTORE_PARTITIONING),
+        max_open=settings.VECTORSTORE_MAX_OPEN_PARTITIONS,
+    )
+else:
+    _vector_store = _chroma_store("iracema_memory")
+
 _rag_index_service = IracemaRagIndexService(_vector_store)
-_rag_retrieve_service = IracemaRagRetrieveService(_vector_store)
+_rag_retrieve_service = IracemaRagRetrieveService(
+    _vector_store,
+    hybrid=settings.RAG_HYBRID_ENABLED,
+    rrf_k=settings.RAG_HYBRID_RRF_K,
+    lexical_cache_ttl_secs=settings.RAG_HYBRID_LEXICAL_CACHE_TTL_SECS,
+)
+
+# Cache de completions (prompt idêntico => resposta idêntica; compartilhado entre SQL/explainer/FC)
+_llm_completion_cache: Optional[LLMCompletionCache] = (
+    LLMCompletionCache(
+        path=settings.LLM_CACHE_PATH,
+        memory_max_entries=settings.LLM_CACHE_MEMORY_MAX_ENTRIES,
+    )
+    if settings.LLM_CACHE_ENABLED
+    else None
+)
+
+# Scheduler do LLM (compartilhado por SQL/FC/explainer: mesma instância do Ollama)
+_llm_scheduler: Optional[LLMScheduler] = (
+    LLMScheduler(
+        default_concurrency=settings.LLM_SCHEDULER_DEFAULT_CONCURRENCY,
+        model_concurrency=settings.LLM_SCHEDULER_MODEL_CONCURRENCY,
+        max_queue_depth={
+            LLMPriority.GENERATE: settings.LLM_SCHEDULER_MAX_QUEUE_GENERATE,
+            LLMPriority.EXPLAIN: settings.LLM_SCHEDULER_MAX_QUEUE_EXPLAIN,
+        },
+        queue_timeout_secs={
+            LLMPriority.GENERATE: settings.LLM_SCHEDULER_QUEUE_TIMEOUT_GENERATE_SECS,
+            LLMPriority.EXPLAIN: settings.LLM_SCHEDULER_QUEUE_TIMEOUT_EXPLAIN_SECS,
+        },
+    )
+    if settings.LLM_SCHEDULER_ENABLED
+    else None
+)
+
+# Pool de hosts Ollama (só quando LLMPool tiver hosts; senão usa LLM_BASE_URL direto)
+_llm_endpoint_pool: Optional[OllamaEndpointPool] = (
+    OllamaEndpointPool(
+        default_base_urls=settings.LLM_POOL_BASE_URLS or [settings.LLM_BASE_URL],
+        model_base_urls=settings.LLM_POOL_MODEL_BASE_URLS,
+        failure_threshold=settings.LLM_POOL_FAILURE_THRESHOLD,
+        open_secs=settings.LLM_POOL_OPEN_SECS,
+        sticky_max_extra_outstanding=settings.LLM_POOL_STICKY_MAX_EXTRA_OUTSTANDING,
+    )
+    if settings.LLM_POOL_BASE_URLS or settings.LLM_POOL_MODEL_BASE_URLS
+    else None
+)
 
 # Cliente LLM (orquestra provider + prompts)
 _llm_client = IracemaLLMClient(
     rag_retriever=_rag_retrieve_service,
     settings=settings,
+    completion_cache=_llm_completion_cache,
+    scheduler=_llm_scheduler,
+    pool=_llm_endpoint_pool,
+)
+
+# Schema linking (tabelas largas: prompt só com as colunas relevantes para a pergunta)
+_schema_linking_service: Optional[IIracemaSchemaLinkingService] = (
+    IracemaSchemaLinkingService(
+        db_context=_db_context,
+        sql_log_repo=_sql_log_repo,
+        embed_fn=_vector_store.embed_texts,
+        top_n=settings.SCHEMA_LINKING_TOP_N,
+        min_columns=settings.SCHEMA_LINKING_MIN_COLUMNS,
+        cache_ttl_secs=settings.SCHEMA_LINKING_CACHE_TTL_SECS,
+    )
+    if settings.SCHEMA_LINKING_ENABLED
+    else None
 )
 
+# Coalescência de perguntas idênticas em andamento (compartilhada entre /ask e /ask/fc)
+_single_flight = SingleFlight()
+
 # Service principal
 _ask_service: IIracemaAskService = IracemaAskService(
     db_context=_db_context,
@@ -123,6 +232,16 @@ _ask_service: IIracemaAskService = IracemaAskService(
     llm_client=_llm_client,
     llm_provider=LLMProviderEnum.OLLAMA,  # para log/auditoria
     llm_model=LLMModelEnum.OTHER,         # para log/auditoria
+    single_flight=_single_flight,
+    explain_summary_max_tokens=settings.LLM_EXPLAIN_SUMMARY_MAX_TOKENS,
+    schema_linking_service=_schema_linking_service,
+    deadline_ms=settings.ASK_DEADLINE_MS,
+    template_confidence_high=settings.TEMPLATE_CONFIDENCE_HIGH,
+    explain_min_budget_ms=settings.EXPLAIN_MIN_BUDGET_MS,
+    speculative_max_workers=settings.SPECULATIVE_MAX_WORKERS,
+    difficulty_routing=settings.LLM_ROUTING_ENABLED,
+    routing_easy_max_score=settings.LLM_ROUTING_EASY_MAX_SCORE,
+    llm_call_log_repo=_llm_call_log_repo if settings.LLM_CALL_LOG_ENABLED else None,
 )
 
 _start_service: IIracemaStartService = IracemaStartService(
@@ -139,7 +258,12 @@ _catalog_service: IIracemaStartCatalogService = IracemaStartCatalogService(
     version="1.0",
 )
 
-_fc_client = IracemaFCOllamaClient(settings=settings)
+_fc_client = IracemaFCOllamaClient(
+    settings=settings,
+    completion_cache=_llm_completion_cache,
+    scheduler=_llm_scheduler,
+    pool=_llm_endpoint_pool,
+)
 
 _ask_fc_service: IIracemaAskByFCService = IracemaAskByFCService(
     db_context=_db_context,
@@ -153,8 +277,41 @@ _ask_fc_service: IIracemaAskByFCService = IracemaAskByFCService(
     llm_client=_llm_client,  # explainer
     llm_provider=LLMProviderEnum.OLLAMA,
     llm_model=LLMModelEnum.OTHER,
+    single_flight=_single_flight,
+    batch_max_workers=settings.BATCH_MAX_WORKERS,
+    explain_summary_max_tokens=settings.LLM_EXPLAIN_SUMMARY_MAX_TOKENS,
+    schema_linking_service=_schema_linking_service,
+    difficulty_routing=settings.LLM_ROUTING_ENABLED,
+    routing_easy_max_score=settings.LLM_ROUTING_EASY_MAX_SCORE,
+    llm_call_log_repo=_llm_call_log_repo if settings.LLM_CALL_LOG_ENABLED else None,
+    near_duplicate_enabled=settings.RAG_NEAR_HIT_ENABLED,
+    near_duplicate_min_similarity=settings.RAG_NEAR_HIT_MIN_SIMILARITY,
+    near_duplicate_audit_rate=settings.RAG_NEAR_HIT_AUDIT_RATE,
+    plan_cache_enabled=settings.RAG_PLAN_CACHE_ENABLED,
 )
 
+_llm_usage_service: IIracemaLLMUsageService = IracemaLLMUsageService(
+    db_context=_db_context,
+    llm_call_log_repo=_llm_call_log_repo,
+)
+
+_rag_compaction_service: IIracemaRagCompactionService = IracemaRagCompactionService(
+    db_context=_db_context,
+    datasource_repo=_datasource_repo,
+    vector_store=_vector_store,
+    max_per_table=settings.RAG_COMPACTION_MAX_PER_TABLE,
+)
+
+
+def ensure_iracema_tables() -> None:
+    """
+    Tabelas criadas pela própria API (as demais vêm do seed/migração).
+    """
+    if settings.LLM_CALL_LOG_ENABLED:
+        _llm_call_log_repo.ensure_table()
+    if settings.VECTORSTORE_BACKEND == "pgvector":
+        _vector_store.ensure_schema()
+
 
 def get_iracema_start_catalog_service() -> IIracemaStartCatalogService:
     return _catalog_service
@@ -171,3 +328,15 @@ def get_iracema_start_service() -> IIracemaStartService:
 def get_iracema_ask_fc_service() -> IIracemaAskByFCService:
     return _ask_fc_service
 
+def get_llm_completion_cache() -> Optional[LLMCompletionCache]:
+    return _llm_completion_cache
+
+def get_llm_endpoint_pool() -> Optional[OllamaEndpointPool]:
+    return _llm_endpoint_pool
+
+def get_llm_usage_service() -> IIracemaLLMUsageService:
+    return _llm_usage_service
+
+def get_rag_compaction_service() -> IIracemaRagCompactionService:
+    return _rag_compaction_service
+
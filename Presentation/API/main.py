@@ -32,7 +32,10 @@ from Presentation.API.settings import settings
 from Presentation.API.controllers.auth_controller import router as auth_router
 from Presentation.API.controllers.ask_controller import router as ask_router
 from Presentation.API.controllers.start_controller import router as start_router
+from Presentation.API.controllers.metrics_controller import router as metrics_router
+from Presentation.API.controllers.admin_controller import router as admin_router
 from Presentation.API.workers.scheduler import start_scheduler
+from Presentation.API.helpers.iracema_dependencies_helper import ensure_iracema_tables
 
 
 # -------------------------------------------------
@@ -44,11 +47,16 @@ async def lifespan(app: FastAPI):
     """
     Lifespan handler do FastAPI.
 
+    - Garante as tabelas da própria API (iracema_llm_call_log)
     - Inicializa o APScheduler no startup
     - Finaliza o scheduler no shutdown
     """
     scheduler = None
     try:
+        try:
+            ensure_iracema_tables()
+        except Exception as e:
+            print(f"[Startup] Falha ao garantir tabelas da API: {e}")
         scheduler = start_scheduler()
         yield
     finally:
@@ -79,6 +87,10 @@ app.add_middleware(
 app.include_router(auth_router, prefix=f"{settings.API_PREFIX}/auth", tags=["Auth"])
 app.include_router(ask_router, prefix=f"{settings.API_PREFIX}/chat", tags=["Iracema"])
 app.include_router(start_router, prefix=f"{settings.API_PREFIX}/start", tags=["Iracema"])
+app.include_router(admin_router, prefix=f"{settings.API_PREFIX}/admin", tags=["Admin"])
+
+# Prometheus (sem prefixo: /metrics)
+app.include_router(metrics_router, tags=["Metrics"])
 
 
 # -------------------------------------------------
@@ -1,7 +1,7 @@
 import json
 import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 from pydantic import BaseModel, Field
 
@@ -42,11 +42,110 @@ class _Settings(BaseModel):
     LLM_MODEL_EXPLAINER: str = Field(default="phi3")
     LLM_TEMPERATURE: float = Field(default=0.0)
     LLM_MODEL_FC: str = Field(default="phi3")
+    LLM_EXPLAIN_SUMMARY_MAX_TOKENS: int = Field(default=256)
+    LLM_KEEP_ALIVE: str = Field(default="30m")
+    LLM_FC_STRUCTURED_OUTPUT: bool = Field(default=True)
+    LLM_SQL_STREAM_STOP: bool = Field(default=True)
+    # modelos pequenos para perguntas fáceis (vazio = sempre o modelo principal)
+    LLM_MODEL_SQL_SMALL: str = Field(default="")
+    LLM_MODEL_FC_SMALL: str = Field(default="")
+
+    # Roteamento por dificuldade (pequeno -> escala para o grande se a validação falhar)
+    LLM_ROUTING_ENABLED: bool = Field(default=True)
+    LLM_ROUTING_EASY_MAX_SCORE: int = Field(default=1)
+
+    # Contabilidade por chamada ao LLM (iracema_llm_call_log)
+    LLM_CALL_LOG_ENABLED: bool = Field(default=True)
+
+    # Cache de completions do LLM (LRU em memória + SQLite)
+    LLM_CACHE_ENABLED: bool = Field(default=True)
+    LLM_CACHE_PATH: str = Field(default="/var/lib/iracema/llm_cache.sqlite3")
+    LLM_CACHE_MEMORY_MAX_ENTRIES: int = Field(default=1024)
+
+    # Scheduler do LLM (concorrência por modelo + fila com prioridade)
+    LLM_SCHEDULER_ENABLED: bool = Field(default=True)
+    LLM_SCHEDULER_DEFAULT_CONCURRENCY: int = Field(default=1)
+    LLM_SCHEDULER_MODEL_CONCURRENCY: Dict[str, int] = Field(default_factory=dict)
+    LLM_SCHEDULER_MAX_QUEUE_GENERATE: int = Field(default=16)
+    LLM_SCHEDULER_MAX_QUEUE_EXPLAIN: int = Field(default=4)
+    LLM_SCHEDULER_QUEUE_TIMEOUT_GENERATE_SECS: float = Field(default=60.0)
+    LLM_SCHEDULER_QUEUE_TIMEOUT_EXPLAIN_SECS: float = Field(default=15.0)
+
+    # Pool de hosts Ollama (vazio = só LLM_BASE_URL)
+    LLM_POOL_BASE_URLS: List[str] = Field(default_factory=list)
+    LLM_POOL_MODEL_BASE_URLS: Dict[str, List[str]] = Field(default_factory=dict)
+    LLM_POOL_FAILURE_THRESHOLD: int = Field(default=3)
+    LLM_POOL_OPEN_SECS: float = Field(default=30.0)
+    LLM_POOL_HEALTH_INTERVAL_SECS: int = Field(default=15)
+    LLM_POOL_STICKY_MAX_EXTRA_OUTSTANDING: int = Field(default=2)
+
+    # SLO do /ask (prazo por requisição e degradação para o planner determinístico)
+    ASK_DEADLINE_MS: int = Field(default=20000)
+    TEMPLATE_CONFIDENCE_HIGH: float = Field(default=0.8)
+    EXPLAIN_MIN_BUDGET_MS: int = Field(default=1500)
+    SPECULATIVE_MAX_WORKERS: int = Field(default=4)
     
     VECTORSTORE_DIR: str = Field(default="/var/lib/iracema/chroma")
+    # chroma (disco local do container) | pgvector (Postgres compartilhado entre réplicas)
+    VECTORSTORE_BACKEND: str = Field(default="chroma")
+    VECTORSTORE_PG_TABLE: str = Field(default="iracema_rag_memory")
+    VECTORSTORE_PG_DIMENSIONS: int = Field(default=384)
+    VECTORSTORE_PG_INDEX: str = Field(default="hnsw")
+    VECTORSTORE_PG_HNSW_M: int = Field(default=16)
+    VECTORSTORE_PG_HNSW_EF_CONSTRUCTION: int = Field(default=64)
+    VECTORSTORE_PG_HNSW_EF_SEARCH: int = Field(default=40)
+    VECTORSTORE_PG_IVFFLAT_LISTS: int = Field(default=100)
+    VECTORSTORE_PG_IVFFLAT_PROBES: int = Field(default=10)
+    # Chroma: coleção por datasource ("table") ou por categoria ("category"); "none" = coleção única
+    VECTORSTORE_PARTITIONING: str = Field(default="none")
+    VECTORSTORE_MAX_OPEN_PARTITIONS: int = Field(default=64)
+
+    # Recuperação híbrida (BM25 + embedding, fusão RRF)
+    RAG_HYBRID_ENABLED: bool = Field(default=True)
+    RAG_HYBRID_RRF_K: int = Field(default=60)
+    RAG_HYBRID_LEXICAL_CACHE_TTL_SECS: int = Field(default=300)
+
+    # Cache de quase-duplicatas (paráfrase / slot de valor ou coluna)
+    RAG_NEAR_HIT_ENABLED: bool = Field(default=True)
+    RAG_NEAR_HIT_MIN_SIMILARITY: float = Field(default=0.5)
+    RAG_NEAR_HIT_AUDIT_RATE: float = Field(default=0.05)
+
+    # Memória de planos: acerto exato recompila o QueryPlan/FCA guardado
+    RAG_PLAN_CACHE_ENABLED: bool = Field(default=True)
+
+    # Few-shot do RAG (seleção por MMR + orçamento de tokens)
+    RAG_EXAMPLES_MAX: int = Field(default=4)
+    RAG_EXAMPLES_FETCH_K: int = Field(default=16)
+    RAG_EXAMPLES_MMR_LAMBDA: float = Field(default=0.5)
+    RAG_EXAMPLES_TOKEN_BUDGET: int = Field(default=600)
+    RAG_EXAMPLES_TOKEN_BUDGET_BY_DATASOURCE: Dict[str, int] = Field(default_factory=dict)
+    RAG_EXAMPLES_TOKENIZER: str = Field(default="")
+
+    # Compactação da memória RAG (job diário)
+    RAG_COMPACTION_ENABLED: bool = Field(default=True)
+    RAG_COMPACTION_HOUR: int = Field(default=4)
+    RAG_COMPACTION_MAX_PER_TABLE: int = Field(default=200)
+
+    # Sidecar de embeddings/vector store (vazio => tudo no processo da API)
+    EMBEDDING_SIDECAR_URL: str = Field(default="")
+    EMBEDDING_SIDECAR_TIMEOUT_SECS: float = Field(default=30.0)
+    EMBEDDING_SIDECAR_SOCKET: str = Field(default="")
+    EMBEDDING_SIDECAR_HOST: str = Field(default="127.0.0.1")
+    EMBEDDING_SIDECAR_PORT: int = Field(default=9191)
+    EMBEDDING_SIDECAR_MAX_BATCH: int = Field(default=64)
+    EMBEDDING_SIDECAR_MAX_WAIT_MS: float = Field(default=5.0)
 
     TOP_K: int = Field(default=1000)
 
+    # Batch (/ask/fc/batch)
+    BATCH_MAX_WORKERS: int = Field(default=4)
+
+    # Schema linking (poda de colunas no prompt)
+    SCHEMA_LINKING_ENABLED: bool = Field(default=True)
+    SCHEMA_LINKING_TOP_N: int = Field(default=25)
+    SCHEMA_LINKING_MIN_COLUMNS: int = Field(default=30)
+    SCHEMA_LINKING_CACHE_TTL_SECS: int = Field(default=900)
+
 
 def _load_json(path: Path) -> dict:
     with path.open("r", encoding="utf-8") as f:
@@ -111,7 +210,104 @@ settings = _Settings(
     LLM_MODEL_EXPLAINER=_get("LLM.ModelExplainer", "phi3"),
     LLM_MODEL_FC = _get("LLM.ModelFC", "phi3"),
     LLM_TEMPERATURE=float(_get("LLM.Temperature", 0.0)),
+    LLM_EXPLAIN_SUMMARY_MAX_TOKENS=int(_get("LLM.ExplainSummaryMaxTokens", 256)),
+    LLM_KEEP_ALIVE=str(_get("LLM.KeepAlive", "30m")),
+    LLM_FC_STRUCTURED_OUTPUT=bool(_get("LLM.FcStructuredOutput", True)),
+    LLM_SQL_STREAM_STOP=bool(_get("LLM.SqlStreamStop", True)),
+    LLM_MODEL_SQL_SMALL=str(_get("LLM.ModelSqlSmall", "") or ""),
+    LLM_MODEL_FC_SMALL=str(_get("LLM.ModelFCSmall", "") or ""),
+
+    # Roteamento por dificuldade
+    LLM_ROUTING_ENABLED=bool(_get("LLMRouting.Enabled", True)),
+    LLM_ROUTING_EASY_MAX_SCORE=int(_get("LLMRouting.EasyMaxScore", 1)),
+
+    # Contabilidade por chamada ao LLM
+    LLM_CALL_LOG_ENABLED=bool(_get("LLMCallLog.Enabled", True)),
+
+    # LLM cache
+    LLM_CACHE_ENABLED=bool(_get("LLMCache.Enabled", True)),
+    LLM_CACHE_PATH=_get("LLMCache.Path", "/var/lib/iracema/llm_cache.sqlite3"),
+    LLM_CACHE_MEMORY_MAX_ENTRIES=int(_get("LLMCache.MemoryMaxEntries", 1024)),
+
+    # Scheduler do LLM
+    LLM_SCHEDULER_ENABLED=bool(_get("LLMScheduler.Enabled", True)),
+    LLM_SCHEDULER_DEFAULT_CONCURRENCY=int(_get("LLMScheduler.DefaultConcurrency", 1)),
+    LLM_SCHEDULER_MODEL_CONCURRENCY=dict(_get("LLMScheduler.ModelConcurrency", {}) or {}),
+    LLM_SCHEDULER_MAX_QUEUE_GENERATE=int(_get("LLMScheduler.MaxQueueGenerate", 16)),
+    LLM_SCHEDULER_MAX_QUEUE_EXPLAIN=int(_get("LLMScheduler.MaxQueueExplain", 4)),
+    LLM_SCHEDULER_QUEUE_TIMEOUT_GENERATE_SECS=float(_get("LLMScheduler.QueueTimeoutGenerateSecs", 60.0)),
+    LLM_SCHEDULER_QUEUE_TIMEOUT_EXPLAIN_SECS=float(_get("LLMScheduler.QueueTimeoutExplainSecs", 15.0)),
+
+    # Pool de hosts Ollama
+    LLM_POOL_BASE_URLS=list(_get("LLMPool.BaseUrls", []) or []),
+    LLM_POOL_MODEL_BASE_URLS=dict(_get("LLMPool.ModelBaseUrls", {}) or {}),
+    LLM_POOL_FAILURE_THRESHOLD=int(_get("LLMPool.FailureThreshold", 3)),
+    LLM_POOL_OPEN_SECS=float(_get("LLMPool.OpenSecs", 30.0)),
+    LLM_POOL_HEALTH_INTERVAL_SECS=int(_get("LLMPool.HealthIntervalSecs", 15)),
+    LLM_POOL_STICKY_MAX_EXTRA_OUTSTANDING=int(_get("LLMPool.StickyMaxExtraOutstanding", 2)),
+
+    # SLO do /ask
+    ASK_DEADLINE_MS=int(_get("Slo.AskDeadlineMs", 20000)),
+    TEMPLATE_CONFIDENCE_HIGH=float(_get("Slo.TemplateConfidenceHigh", 0.8)),
+    EXPLAIN_MIN_BUDGET_MS=int(_get("Slo.ExplainMinBudgetMs", 1500)),
+    SPECULATIVE_MAX_WORKERS=int(_get("Slo.SpeculativeMaxWorkers", 4)),
     
     VECTORSTORE_DIR=_get("VectorStore.Dir", "/var/lib/iracema/chroma"),
+    VECTORSTORE_BACKEND=str(_get("VectorStore.Backend", "chroma")).lower(),
+    VECTORSTORE_PG_TABLE=_get("VectorStore.PgTable", "iracema_rag_memory"),
+    VECTORSTORE_PG_DIMENSIONS=int(_get("VectorStore.PgDimensions", 384)),
+    VECTORSTORE_PG_INDEX=str(_get("VectorStore.PgIndex", "hnsw")).lower(),
+    VECTORSTORE_PG_HNSW_M=int(_get("VectorStore.PgHnswM", 16)),
+    VECTORSTORE_PG_HNSW_EF_CONSTRUCTION=int(_get("VectorStore.PgHnswEfConstruction", 64)),
+    VECTORSTORE_PG_HNSW_EF_SEARCH=int(_get("VectorStore.PgHnswEfSearch", 40)),
+    VECTORSTORE_PG_IVFFLAT_LISTS=int(_get("VectorStore.PgIvfflatLists", 100)),
+    VECTORSTORE_PG_IVFFLAT_PROBES=int(_get("VectorStore.PgIvfflatProbes", 10)),
+    VECTORSTORE_PARTITIONING=str(_get("VectorStore.Partitioning", "none")).lower(),
+    VECTORSTORE_MAX_OPEN_PARTITIONS=int(_get("VectorStore.MaxOpenPartitions", 64)),
+
+    # Recuperação híbrida
+    RAG_HYBRID_ENABLED=bool(_get("RagHybrid.Enabled", True)),
+    RAG_HYBRID_RRF_K=int(_get("RagHybrid.RrfK", 60)),
+    RAG_HYBRID_LEXICAL_CACHE_TTL_SECS=int(_get("RagHybrid.LexicalCacheTtlSecs", 300)),
+
+    # Cache de quase-duplicatas
+    RAG_NEAR_HIT_ENABLED=bool(_get("RagNearHit.Enabled", True)),
+    RAG_NEAR_HIT_MIN_SIMILARITY=float(_get("RagNearHit.MinSimilarity", 0.5)),
+    RAG_NEAR_HIT_AUDIT_RATE=float(_get("RagNearHit.AuditRate", 0.05)),
+
+    RAG_PLAN_CACHE_ENABLED=bool(_get("RagPlanCache.Enabled", True)),
+
+    # Few-shot do RAG
+    RAG_EXAMPLES_MAX=int(_get("RagExamples.Max", 4)),
+    RAG_EXAMPLES_FETCH_K=int(_get("RagExamples.FetchK", 16)),
+    RAG_EXAMPLES_MMR_LAMBDA=float(_get("RagExamples.MmrLambda", 0.5)),
+    RAG_EXAMPLES_TOKEN_BUDGET=int(_get("RagExamples.TokenBudget", 600)),
+    RAG_EXAMPLES_TOKEN_BUDGET_BY_DATASOURCE={
+        str(k): int(v) for k, v in (_get("RagExamples.TokenBudgetByDatasource", {}) or {}).items()
+    },
+    RAG_EXAMPLES_TOKENIZER=str(_get("RagExamples.Tokenizer", "") or ""),
+
+    # Compactação da memória RAG
+    RAG_COMPACTION_ENABLED=bool(_get("RagCompaction.Enabled", True)),
+    RAG_COMPACTION_HOUR=int(_get("RagCompaction.Hour", 4)),
+    RAG_COMPACTION_MAX_PER_TABLE=int(_get("RagCompaction.MaxPerTable", 200)),
+
+    # Sidecar de embeddings/vector store
+    EMBEDDING_SIDECAR_URL=str(_get("EmbeddingSidecar.Url", "") or ""),
+    EMBEDDING_SIDECAR_TIMEOUT_SECS=float(_get("EmbeddingSidecar.TimeoutSecs", 30.0)),
+    EMBEDDING_SIDECAR_SOCKET=str(_get("EmbeddingSidecar.Socket", "") or ""),
+    EMBEDDING_SIDECAR_HOST=_get("EmbeddingSidecar.Host", "127.0.0.1"),
+    EMBEDDING_SIDECAR_PORT=int(_get("EmbeddingSidecar.Port", 9191)),
+    EMBEDDING_SIDECAR_MAX_BATCH=int(_get("EmbeddingSidecar.MaxBatch", 64)),
+    EMBEDDING_SIDECAR_MAX_WAIT_MS=float(_get("EmbeddingSidecar.MaxWaitMs", 5.0)),
+
+    # Batch
+    BATCH_MAX_WORKERS=int(_get("Batch.MaxWorkers", 4)),
+
+    # Schema linking
+    SCHEMA_LINKING_ENABLED=bool(_get("SchemaLinking.Enabled", True)),
+    SCHEMA_LINKING_TOP_N=int(_get("SchemaLinking.TopN", 25)),
+    SCHEMA_LINKING_MIN_COLUMNS=int(_get("SchemaLinking.MinColumns", 30)),
+    SCHEMA_LINKING_CACHE_TTL_SECS=int(_get("SchemaLinking.CacheTtlSecs", 900)),
 
 )
\ No newline at end of file
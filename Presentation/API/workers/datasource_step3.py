@@ -24,6 +24,11 @@ from typing import Any, Dict, List, Optional
 
 import psycopg2
 
+from Application.helpers.iracema_schema_prompt_builder_helper import (
+    build_prompt_inicial,
+    build_prompt_inicial_fc,
+)
+
 
 # -----------------------------------------------------------------------------
 # Schema / migrations (colunas prompt)
@@ -150,140 +155,6 @@ def get_table_columns(conn, schema: str, table: str, default_srid: int) -> List[
     return cols
 
 
-# -----------------------------------------------------------------------------
-# Prompt builders
-# -----------------------------------------------------------------------------
-
-def build_prompt_inicial(
-    table_name: str,
-    cols: List[Dict[str, Any]],
-    question_placeholder: str = "{PERGUNTA_DO_USUARIO}",
-) -> str:
-    """
-    Template SQLCoder (PT-BR). Termina com "### SQL".
-    """
-    col_defs: List[str] = []
-    for c in cols or []:
-        col_name = str(c.get("name", "")).strip()
-        col_type = str(c.get("type", "TEXT")).strip() or "TEXT"
-        nullable = bool(c.get("nullable", True))
-
-        if not col_name:
-            continue
-
-        null_sql = "" if nullable else " NOT NULL"
-        col_defs.append(f"  {col_name} {col_type}{null_sql}")
-
-    if col_defs:
-        create_table = "CREATE TABLE " + table_name + " (\n" + ",\n".join(col_defs) + "\n);"
-    else:
-        create_table = f"CREATE TABLE {table_name} (\n  -- (sem colunas detectadas)\n);"
-
-    return f"""### Tarefa
-Escreva UMA consulta SELECT em PostgreSQL que responda à pergunta.
-Retorne APENAS a consulta SQL.
-
-### Esquema
-{create_table}
-
-### Pergunta
-{question_placeholder}
-
-### SQL
-"""
-
-
-def build_prompt_inicial_fc(
-    table_name: str,
-    cols: List[Dict[str, Any]],
-    question_placeholder: str = "{PERGUNTA_DO_USUARIO}",
-) -> str:
-    non_geom_cols: List[str] = []
-    geom_cols: List[str] = []
-
-    for c in cols or []:
-        name = str(c.get("name") or "").strip()
-        if not name:
-            continue
-        if c.get("is_geometry"):
-            geom_cols.append(name)
-        else:
-            non_geom_cols.append(name)
-
-    non_geom_str = ", ".join(non_geom_cols) if non_geom_cols else "(nenhuma detectada)"
-    geom_str = ", ".join(geom_cols) if geom_cols else "(nenhuma)"
-
-    numeric_cols: List[str] = []
-    text_cols: List[str] = []
-
-    for c in cols or []:
-        name = str(c.get("name") or "").strip()
-        ctype = str(c.get("type") or "").lower()
-        if not name or c.get("is_geometry"):
-            continue
-        if any(t in ctype for t in ["numeric", "double", "real", "float", "int", "bigint", "smallint", "decimal"]):
-            numeric_cols.append(name)
-        else:
-            text_cols.append(name)
-
-    numeric_str = ", ".join(numeric_cols) if numeric_cols else "(nenhuma)"
-    text_str = ", ".join(text_cols) if text_cols else "(nenhuma)"
-
-    return f"""Você é um assistente que converte perguntas em linguagem natural em um PLANO ESTRUTURADO (JSON) para consultas em PostgreSQL.
-
-REGRAS OBRIGATÓRIAS:
-- NÃO gere SQL.
-- NÃO gere explicações em texto.
-- RETORNE APENAS um JSON compatível com QueryPlanArgsDto.
-- Use SOMENTE colunas existentes na tabela.
-- NUNCA use colunas geométricas para cálculos, filtros, agrupamentos ou seleção.
-
-TABELA ALVO:
-{table_name}
-
-COLUNAS DISPONÍVEIS (não-geom):
-{non_geom_str}
-
-COLUNAS NUMÉRICAS (candidatas a SUM):
-{numeric_str}
-
-COLUNAS TEXTUAIS (candidatas a GROUP BY / DISTINCT):
-{text_str}
-
-COLUNAS GEOMÉTRICAS (PROIBIDAS):
-{geom_str}
-
-INTENÇÕES SUPORTADAS (campo 'intent'):
-- schema        -> listar colunas / estrutura
-- count         -> contar registros
-- distinct      -> listar valores distintos (1+ colunas)
-- sum           -> somar valores de uma coluna numérica
-- grouped_sum   -> somar valores agrupados por 1+ colunas
-- detail        -> retornar linhas detalhadas (pode selecionar 1+ colunas)
-
-MAPEAMENTO OBRIGATÓRIO PARA DETAIL (MULTI-COLUNA):
-- Se a pergunta pedir "consultar/trazer/mostrar/listar A e B" (ou múltiplas colunas),
-  use intent="detail" e preencha "select_columns" com uma LISTA de colunas.
-  Exemplo: "Consultar data e num_proces" -> intent="detail", select_columns=["data","num_proces"].
-
-REGRAS PARA CAMPOS:
-- detail:
-  - use select_columns (lista) quando houver colunas explícitas.
-  - se o usuário não citar colunas, pode omitir select_columns (executor usa "*").
-- distinct:
-  - use select_columns com 1+ colunas para DISTINCT.
-- grouped_sum:
-  - group_by DEVE ser lista (1+ colunas).
-  - value_column DEVE ser uma coluna numérica.
-
-PERGUNTA:
-{question_placeholder}
-
-RETORNE APENAS JSON. Sem markdown. Sem texto extra.
-Campos esperados: intent, select_columns, target_column, value_column, group_by, filters, order_by, order_dir, limit.
-"""
-
-
 # -----------------------------------------------------------------------------
 # Update datasource
 # -----------------------------------------------------------------------------
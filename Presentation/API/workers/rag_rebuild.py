@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+rag_rebuild.py
+
+Reconstrói a memória RAG (exemplos Pergunta -> SQL) a partir do iracema_sql_log,
+sem depender do tráfego: troca do modelo de embeddings, perda do VectorStore.Dir
+ou troca de backend (VectorStore.Backend / --backend).
+
+1) varre os logs de sucesso com a pergunta do usuário, em páginas por (created_at, id)
+2) canonicaliza a pergunta e deduplica: um exemplo por (tabela, pergunta canônica)
+3) embeda em lotes grandes (--processes > 1: um processo por núcleo da CPU)
+   e carrega em bulk no vector store configurado (upsert por id)
+4) checkpoint a cada lote: --resume continua do último lote gravado
+
+Com o Chroma local, rode com a API parada (ou use o sidecar, EmbeddingSidecar.Url).
+
+Uso:
+    python -m Presentation.API.workers.rag_rebuild [--processes 4] [--batch-size 512] [--resume]
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from Presentation.API.settings import settings
+from Data.db_context import DbContext
+from Data.repositories.iracema_datasource_repository import IracemaDataSourceRepository
+from Data.repositories.iracema_sql_log_repository import IracemaSQLLogRepository
+from Application.helpers.iracema_rag_rebuild_helper import RagRebuildCollector
+from Application.helpers.iracema_partition_resolver_helper import DatasourcePartitionResolver
+from External.vector.chromadb_vector_store import EMBEDDING_MODEL, ChromaDBVectorStore
+from External.vector.iracema_bulk_embedder import BulkEmbedder
+from External.vector.iracema_partitioned_vector_store import PartitionedVectorStore
+from External.vector.pgvector_vector_store import build_pgvector_store
+from External.vector.iracema_vector_sidecar_client import VectorSidecarClient
+from External.vector.vector_store_base import VectorStoreBase
+
+
+def build_target_store(
+    db_context: DbContext,
+    datasource_repo: IracemaDataSourceRepository,
+    backend: str,
+    collection: str,
+) -> VectorStoreBase:
+    """
+    Mesmo vector store da API (iracema_dependencies_helper), para o backend pedido.
+    """
+    if backend == "pgvector":
+        store = build_pgvector_store(db_context.engine, settings, collection_name=collection)
+        store.ensure_schema()
+        return store
+
+    sidecar = (
+        VectorSidecarClient(settings.EMBEDDING_SIDECAR_URL, timeout_secs=settings.EMBEDDING_SIDECAR_TIMEOUT_SECS)
+        if settings.EMBEDDING_SIDECAR_URL
+        else None
+    )
+
+    def chroma_store(collection_name: str) -> ChromaDBVectorStore:
+        return ChromaDBVectorStore(
+            persist_directory=settings.VECTORSTORE_DIR,
+            collection_name=collection_name,
+            sidecar=sidecar,
+        )
+
+    if settings.VECTORSTORE_PARTITIONING in ("table", "category"):
+        return PartitionedVectorStore(
+            store_factory=chroma_store,
+            list_collections=chroma_store(collection).list_collections,
+            base_collection=collection,
+            partition_of=DatasourcePartitionResolver(db_context, datasource_repo, mode=settings.VECTORSTORE_PARTITIONING),
+            max_open=settings.VECTORSTORE_MAX_OPEN_PARTITIONS,
+        )
+    return chroma_store(collection)
+
+
+def _load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    # grava e troca: um kill no meio não corrompe o checkpoint anterior
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def rebuild(
+    db_context: DbContext,
+    backend: str,
+    collection: str = "iracema_memory",
+    checkpoint_path: str = "rag_rebuild.checkpoint.json",
+    resume: bool = False,
+    page_size: int = 2000,
+    batch_size: int = 512,
+    processes: int = 1,
+) -> int:
+    datasource_repo = IracemaDataSourceRepository(db_context)
+    sql_log_repo = IracemaSQLLogRepository(db_context)
+
+    state = _load_checkpoint(checkpoint_path) if resume else None
+    if state and (state.get("backend"), state.get("collection")) != (backend, collection):
+        raise ValueError(
+            f"Checkpoint de {state.get('backend')}/{state.get('collection')}; "
+            f"pedido {backend}/{collection}. Rode sem --resume."
+        )
+    # o corte fixo torna o conjunto de exemplos reproduzível entre execuções
+    until = datetime.fromisoformat(state["until"]) if state else datetime.utcnow()
+    last_id = state.get("last_id") if state else None
+    loaded = int(state.get("loaded") or 0) if state else 0
+
+    # 1) varredura do log + deduplicação
+    session = db_context.create_session()
+    try:
+        datasources = datasource_repo.list_all(session=session)
+        collector = RagRebuildCollector(
+            columns_by_table={ds.identificador_tabela: ds.colunas_tabela for ds in datasources},
+            updated_at_by_table={ds.identificador_tabela: ds.updated_at for ds in datasources},
+        )
+        start = time.perf_counter()
+        after = None
+        while True:
+            rows = sql_log_repo.list_success_for_rag(session=session, after=after, until=until, limit=page_size)
+            if not rows:
+                break
+            for row in rows:
+                collector.offer(row)
+            after = (rows[-1].created_at, rows[-1].id)
+            elapsed = time.perf_counter() - start
+            print(f"[Rebuild] Log: {collector.rows} linhas ({collector.rows / elapsed if elapsed else 0.0:.0f} linhas/s)")
+    finally:
+        session.close()
+
+    entries = collector.entries()
+    skipped = ", ".join(f"{reason}={n}" for reason, n in sorted(collector.skipped.items())) or "nenhum"
+    print(f"[Rebuild] {len(entries)} exemplos únicos de {collector.rows} logs (descartados: {skipped}).")
+    if last_id is not None:
+        entries = [e for e in entries if e[0] > last_id]
+        print(f"[Rebuild] Retomando após {loaded} exemplos: faltam {len(entries)}.")
+
+    # 2) embeddings em lote + carga
+    target = build_target_store(db_context, datasource_repo, backend, collection)
+    start = time.perf_counter()
+    embed_secs = 0.0
+    done = 0
+    with BulkEmbedder(EMBEDDING_MODEL, processes=processes) as embedder:
+        if backend == "pgvector" and embedder.dimensions() != settings.VECTORSTORE_PG_DIMENSIONS:
+            raise ValueError(
+                f"Dimensão do modelo ({embedder.dimensions()}) difere de "
+                f"VectorStore.PgDimensions ({settings.VECTORSTORE_PG_DIMENSIONS})."
+            )
+        for i in range(0, len(entries), batch_size):
+            batch = entries[i : i + batch_size]
+            ids = [doc_id for doc_id, _, _ in batch]
+            docs = [doc for _, doc, _ in batch]
+
+            t0 = time.perf_counter()
+            embeddings = embedder.embed(docs)
+            embed_secs += time.perf_counter() - t0
+            target.add_embeddings(texts=docs, embeddings=embeddings, metadatas=[m for _, _, m in batch], ids=ids)
+
+            done += len(batch)
+            _save_checkpoint(checkpoint_path, {
+                "backend": backend,
+                "collection": collection,
+                "until": until.isoformat(),
+                "last_id": ids[-1],
+                "loaded": loaded + done,
+            })
+            elapsed = time.perf_counter() - start
+            print(
+                f"[Rebuild]   {done}/{len(entries)} ({done / elapsed if elapsed else 0.0:.0f} docs/s; "
+                f"embedding {done / embed_secs if embed_secs else 0.0:.0f} docs/s)"
+            )
+
+    # ivfflat calcula as listas com os dados presentes: recria após a carga
+    if backend == "pgvector" and settings.VECTORSTORE_PG_INDEX == "ivfflat":
+        target.rebuild_vector_index()
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return loaded + done
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reconstrói a memória RAG a partir do iracema_sql_log.")
+    parser.add_argument("--backend", choices=("chroma", "pgvector"), default=settings.VECTORSTORE_BACKEND)
+    parser.add_argument("--collection", default="iracema_memory")
+    parser.add_argument("--checkpoint", default="rag_rebuild.checkpoint.json")
+    parser.add_argument("--resume", action="store_true", help="Continua do checkpoint (mesmo corte do log).")
+    parser.add_argument("--page-size", type=int, default=2000, help="Linhas do log por consulta.")
+    parser.add_argument("--batch-size", type=int, default=512, help="Documentos por lote de embedding/carga.")
+    parser.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="Processos de embedding na CPU (1 = no próprio processo).")
+    args = parser.parse_args()
+
+    db_context = DbContext(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        db=settings.DB_NAME,
+    )
+    try:
+        total = rebuild(
+            db_context,
+            backend=args.backend,
+            collection=args.collection,
+            checkpoint_path=args.checkpoint,
+            resume=args.resume,
+            page_size=args.page_size,
+            batch_size=args.batch_size,
+            processes=args.processes,
+        )
+    except Exception as e:
+        print(f"[Rebuild] Erro: {e}")
+        return 1
+    print(f"[Rebuild] OK: {total} exemplos carregados ({args.backend}/{args.collection}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,10 +10,15 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from Presentation.API.settings import settings
 from Presentation.API.workers.datasource_builder import run_pipeline_as_seed
+from Presentation.API.helpers.iracema_dependencies_helper import (
+    get_llm_endpoint_pool,
+    get_rag_compaction_service,
+)
 
 
 # Um inteiro 64-bit fixo para identificar o lock global do job
 PG_ADVISORY_LOCK_KEY = 987654321012345678  # int8
+RAG_COMPACTION_LOCK_KEY = 987654321012345679  # int8
 
 
 def _build_config_from_settings() -> Dict[str, Any]:
@@ -45,18 +50,18 @@ def _build_config_from_settings() -> Dict[str, Any]:
     }
 
 
-def _try_pg_advisory_lock(conn) -> bool:
+def _try_pg_advisory_lock(conn, key: int = PG_ADVISORY_LOCK_KEY) -> bool:
     """
     Tenta pegar lock sem bloquear. Retorna True se conseguiu.
     """
     with conn.cursor() as cur:
-        cur.execute("SELECT pg_try_advisory_lock(%s);", (PG_ADVISORY_LOCK_KEY,))
+        cur.execute("SELECT pg_try_advisory_lock(%s);", (key,))
         return bool(cur.fetchone()[0])
 
 
-def _pg_advisory_unlock(conn) -> None:
+def _pg_advisory_unlock(conn, key: int = PG_ADVISORY_LOCK_KEY) -> None:
     with conn.cursor() as cur:
-        cur.execute("SELECT pg_advisory_unlock(%s);", (PG_ADVISORY_LOCK_KEY,))
+        cur.execute("SELECT pg_advisory_unlock(%s);", (key,))
 
 
 def _get_pg_conn(db: Dict[str, Any]):
@@ -113,6 +118,51 @@ def datasource_seed_job() -> None:
             pass
 
 
+def rag_compaction_job() -> None:
+    """
+    Job agendado: re-chaveia e compacta a memória RAG (dedup, limite por tabela,
+    datasources inativas, schema alterado). Mesmo esquema de advisory lock do seed.
+    """
+    cfg = _build_config_from_settings()
+
+    conn = None
+    locked = False
+    try:
+        conn = _get_pg_conn(cfg["db"])
+        conn.autocommit = True
+
+        locked = _try_pg_advisory_lock(conn, RAG_COMPACTION_LOCK_KEY)
+        if not locked:
+            print("[Scheduler] Outro worker/container já está compactando o RAG. Ignorando.")
+            return
+
+        # chaves antigas primeiro: o dedup da compactação agrupa pela chave atual
+        rekey = get_rag_compaction_service().rekey()
+        if rekey.rekeyed_total:
+            print(f"[Scheduler] RAG re-chaveado: {rekey.rekeyed_total} de {rekey.scanned} documentos ({rekey.rekeyed}).")
+
+        report = get_rag_compaction_service().compact()
+        print(
+            f"[Scheduler] RAG compactado: {report.size_before} -> {report.size_after} documentos "
+            f"({report.removed}) em {report.duration_ms:.0f} ms."
+        )
+
+    except Exception as e:
+        print(f"[Scheduler] Erro na compactação do RAG: {e}")
+        traceback.print_exc()
+    finally:
+        try:
+            if conn and locked:
+                _pg_advisory_unlock(conn, RAG_COMPACTION_LOCK_KEY)
+        except Exception:
+            pass
+        try:
+            if conn:
+                conn.close()
+        except Exception:
+            pass
+
+
 def start_scheduler() -> AsyncIOScheduler:
     """
     Inicializa o scheduler com timezone America/Sao_Paulo e agenda o job às 03:00.
@@ -132,6 +182,33 @@ def start_scheduler() -> AsyncIOScheduler:
         misfire_grace_time=3600,  # 1h de tolerância se o container estava ocupado
     )
 
+    # compactação da memória RAG (depois do seed, que pode desativar datasources)
+    if settings.RAG_COMPACTION_ENABLED:
+        scheduler.add_job(
+            rag_compaction_job,
+            trigger="cron",
+            hour=settings.RAG_COMPACTION_HOUR,
+            minute=0,
+            id="rag_compaction",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=3600,
+        )
+
+    # health check dos hosts Ollama (só com pool configurado)
+    pool = get_llm_endpoint_pool()
+    if pool is not None:
+        scheduler.add_job(
+            pool.check_health,
+            trigger="interval",
+            seconds=settings.LLM_POOL_HEALTH_INTERVAL_SECS,
+            id="llm_pool_health",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+
     scheduler.start()
     print("[Scheduler] APScheduler iniciado. Job diário 03:00 agendado.")
     return scheduler
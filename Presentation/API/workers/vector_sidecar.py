@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+vector_sidecar.py
+
+Processo único de embeddings + vector store (Chroma) compartilhado pelos workers
+da API: um só modelo carregado em memória, pedidos de embedding agrupados em lote
+(EmbeddingBatcher) e um único escritor por coleção.
+
+Uso:
+    python -m Presentation.API.workers.vector_sidecar [--socket /run/iracema/vector.sock | --port 9191]
+
+Na API: EmbeddingSidecar.Url = "unix:///run/iracema/vector.sock" (ou "http://127.0.0.1:9191").
+"""
+
+import argparse
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Response
+from pydantic import BaseModel, Field
+
+from Presentation.API.settings import settings
+from External.metrics.iracema_prometheus_metrics import render_latest
+from External.vector.chromadb_vector_store import ChromaDBVectorStore
+from External.vector.iracema_embedding_batcher import EmbeddingBatcher
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str] = Field(default_factory=list)
+
+
+class AddTextsRequest(BaseModel):
+    collection: str = "iracema_memory"
+    texts: List[str] = Field(default_factory=list)
+    metadatas: Optional[List[Dict[str, Any]]] = None
+    ids: Optional[List[str]] = None
+
+
+class AddEmbeddingsRequest(BaseModel):
+    collection: str = "iracema_memory"
+    texts: List[str] = Field(default_factory=list)
+    embeddings: List[List[float]] = Field(default_factory=list)
+    metadatas: Optional[List[Dict[str, Any]]] = None
+    ids: List[str] = Field(default_factory=list)
+
+
+class CollectionRequest(BaseModel):
+    collection: str = "iracema_memory"
+
+
+class ListEntriesRequest(BaseModel):
+    collection: str = "iracema_memory"
+    where: Dict[str, Any] = Field(default_factory=dict)
+
+
+class IdsRequest(BaseModel):
+    collection: str = "iracema_memory"
+    ids: List[str] = Field(default_factory=list)
+
+
+class DeleteRequest(BaseModel):
+    collection: str = "iracema_memory"
+    ids: List[str] = Field(default_factory=list)
+
+
+class UpdateMetadatasRequest(BaseModel):
+    collection: str = "iracema_memory"
+    ids: List[str] = Field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class SimilaritySearchRequest(BaseModel):
+    collection: str = "iracema_memory"
+    query: str
+    k: int = 5
+    where: Dict[str, Any] = Field(default_factory=dict)
+
+
+# coleções abertas (partições por tabela): LRU, o modelo de embeddings é compartilhado
+_stores: "OrderedDict[str, ChromaDBVectorStore]" = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def _store(collection: str) -> ChromaDBVectorStore:
+    with _stores_lock:
+        store = _stores.get(collection)
+        if store is None:
+            store = ChromaDBVectorStore(
+                persist_directory=settings.VECTORSTORE_DIR,
+                collection_name=collection,
+            )
+            _stores[collection] = store
+            while len(_stores) > max(1, settings.VECTORSTORE_MAX_OPEN_PARTITIONS):
+                _stores.popitem(last=False)
+        else:
+            _stores.move_to_end(collection)
+        return store
+
+
+# o modelo é o mesmo para todas as coleções: embeda pela coleção padrão
+_batcher = EmbeddingBatcher(
+    embed_fn=lambda texts: _store("iracema_memory").embed_texts(texts),
+    max_batch=settings.EMBEDDING_SIDECAR_MAX_BATCH,
+    max_wait_ms=settings.EMBEDDING_SIDECAR_MAX_WAIT_MS,
+)
+
+app = FastAPI(title="Iracema Vector Sidecar")
+
+
+# Endpoints síncronos: rodam no threadpool, e as requisições simultâneas se
+# encontram no batcher.
+
+@app.get("/health")
+def health() -> Dict[str, Any]:
+    return {"status": "ok", "collections": sorted(_stores.keys())}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
+
+
+@app.post("/embed")
+def embed(req: EmbedRequest) -> Dict[str, Any]:
+    return {"embeddings": _batcher.embed(req.texts)}
+
+
+@app.post("/add_texts")
+def add_texts(req: AddTextsRequest) -> Dict[str, Any]:
+    if req.texts:
+        _store(req.collection).add_texts(texts=req.texts, metadatas=req.metadatas, ids=req.ids)
+    return {"added": len(req.texts)}
+
+
+@app.post("/add_embeddings")
+def add_embeddings(req: AddEmbeddingsRequest) -> Dict[str, Any]:
+    if req.texts:
+        _store(req.collection).add_embeddings(
+            texts=req.texts, embeddings=req.embeddings, metadatas=req.metadatas, ids=req.ids
+        )
+    return {"added": len(req.texts)}
+
+
+@app.post("/similarity_search")
+def similarity_search(req: SimilaritySearchRequest) -> Dict[str, Any]:
+    embedding = _batcher.embed([req.query])[0]
+    docs = _store(req.collection).similarity_search_by_vector(embedding, k=req.k, where=req.where)
+    return {
+        "documents": [
+            {"page_content": d.page_content, "metadata": d.metadata or {}}
+            for d in docs
+        ]
+    }
+
+
+@app.post("/list_entries")
+def list_entries(req: ListEntriesRequest) -> Dict[str, Any]:
+    entries = _store(req.collection).list_entries(where=req.where)
+    return {"entries": [{"id": doc_id, "metadata": meta} for doc_id, meta in entries]}
+
+
+@app.post("/get_by_ids")
+def get_by_ids(req: IdsRequest) -> Dict[str, Any]:
+    docs = _store(req.collection).get_by_ids(req.ids)
+    return {"documents": [{"page_content": d.page_content, "metadata": d.metadata or {}} for d in docs]}
+
+
+@app.post("/update_metadatas")
+def update_metadatas(req: UpdateMetadatasRequest) -> Dict[str, Any]:
+    _store(req.collection).update_metadatas(req.ids, req.metadatas)
+    return {"updated": len(req.ids)}
+
+
+@app.post("/delete")
+def delete(req: DeleteRequest) -> Dict[str, Any]:
+    _store(req.collection).delete(req.ids)
+    return {"deleted": len(req.ids)}
+
+
+@app.post("/count")
+def count(req: CollectionRequest) -> Dict[str, Any]:
+    return {"count": _store(req.collection).count()}
+
+
+@app.post("/collections")
+def collections() -> Dict[str, Any]:
+    return {"collections": _store("iracema_memory").list_collections()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sidecar de embeddings/vector store da Iracema.")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SIDECAR_SOCKET, help="Unix socket (tem prioridade sobre a porta).")
+    parser.add_argument("--host", default=settings.EMBEDDING_SIDECAR_HOST)
+    parser.add_argument("--port", type=int, default=settings.EMBEDDING_SIDECAR_PORT)
+    args = parser.parse_args()
+
+    # um único processo: o objetivo é justamente compartilhar modelo e coleção
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        uvicorn.run(app, uds=args.socket, workers=1)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, workers=1)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
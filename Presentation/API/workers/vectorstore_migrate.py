@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+vectorstore_migrate.py
+
+Copia as coleções do Chroma (VectorStore.Dir) para o pgvector, reaproveitando
+os embeddings já calculados (mesmo modelo: não reembeda nada).
+
+Uso:
+    python -m Presentation.API.workers.vectorstore_migrate [--collection iracema_memory] [--batch-size 500]
+"""
+
+import argparse
+import time
+from typing import List, Optional
+
+from chromadb import PersistentClient
+from chromadb.config import Settings
+
+from Presentation.API.settings import settings
+from Data.db_context import DbContext
+from External.vector.pgvector_vector_store import build_pgvector_store
+
+
+def _collection_names(client: PersistentClient, only: Optional[str]) -> List[str]:
+    if only:
+        return [only]
+    # chromadb >= 0.6 devolve nomes; versões anteriores, objetos Collection
+    return [c if isinstance(c, str) else c.name for c in client.list_collections()]
+
+
+def migrate(
+    chroma_dir: str,
+    db_context: DbContext,
+    collection: Optional[str] = None,
+    batch_size: int = 500,
+) -> int:
+    client = PersistentClient(path=chroma_dir, settings=Settings(anonymized_telemetry=False))
+    total_docs = 0
+
+    for name in _collection_names(client, collection):
+        source = client.get_collection(name)
+        expected = source.count()
+        target = build_pgvector_store(db_context.engine, settings, collection_name=name)
+        target.ensure_schema()
+
+        print(f"[Migrate] Coleção '{name}': {expected} documentos -> {settings.VECTORSTORE_PG_TABLE}")
+        start = time.perf_counter()
+        copied = 0
+        offset = 0
+        while offset < expected:
+            page = source.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"],
+            )
+            ids = list(page.get("ids") or [])
+            if not ids:
+                break
+
+            embeddings = [list(map(float, e)) for e in page["embeddings"]]
+            if embeddings and len(embeddings[0]) != settings.VECTORSTORE_PG_DIMENSIONS:
+                raise ValueError(
+                    f"Dimensão do embedding no Chroma ({len(embeddings[0])}) difere de "
+                    f"VectorStore.PgDimensions ({settings.VECTORSTORE_PG_DIMENSIONS})."
+                )
+
+            target.add_embeddings(
+                texts=list(page["documents"]),
+                embeddings=embeddings,
+                metadatas=list(page.get("metadatas") or [{} for _ in ids]),
+                ids=ids,
+            )
+            copied += len(ids)
+            offset += len(ids)
+
+            elapsed = time.perf_counter() - start
+            print(f"[Migrate]   {copied}/{expected} ({copied / elapsed if elapsed else 0.0:.0f} docs/s)")
+
+        # ivfflat calcula as listas com os dados presentes: recria após a carga
+        if settings.VECTORSTORE_PG_INDEX == "ivfflat":
+            target.rebuild_vector_index()
+
+        total_docs += copied
+        print(f"[Migrate] Coleção '{name}' concluída: {copied} documentos.")
+
+    return total_docs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Copia coleções do Chroma para o pgvector.")
+    parser.add_argument("--chroma-dir", default=settings.VECTORSTORE_DIR)
+    parser.add_argument("--collection", default=None, help="Só esta coleção (padrão: todas).")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db_context = DbContext(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        db=settings.DB_NAME,
+    )
+    try:
+        total = migrate(args.chroma_dir, db_context, collection=args.collection, batch_size=args.batch_size)
+    except Exception as e:
+        print(f"[Migrate] Erro: {e}")
+        return 1
+    print(f"[Migrate] OK: {total} documentos copiados.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+vectorstore_partition.py
+
+Divide a coleção única do RAG (iracema_memory) em uma coleção por datasource
+(VectorStore.Partitioning = "table") ou por categoria ("category"), copiando
+os embeddings já calculados (não reembeda nada).
+
+Rode com a API e o sidecar parados (o Chroma não aceita dois processos
+escrevendo no mesmo diretório).
+
+Uso:
+    python -m Presentation.API.workers.vectorstore_partition [--mode table|category] [--drop-source]
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from chromadb import PersistentClient
+from chromadb.config import Settings
+
+from Presentation.API.settings import settings
+from Data.db_context import DbContext
+from Data.repositories.iracema_datasource_repository import IracemaDataSourceRepository
+from Application.helpers.iracema_partition_resolver_helper import DatasourcePartitionResolver
+from External.vector.iracema_partitioned_vector_store import partition_collection_name
+
+
+def split(
+    chroma_dir: str,
+    resolver: DatasourcePartitionResolver,
+    source: str = "iracema_memory",
+    batch_size: int = 500,
+    drop_source: bool = False,
+) -> int:
+    client = PersistentClient(path=chroma_dir, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_collection(source)
+    expected = collection.count()
+    print(f"[Partition] Coleção '{source}': {expected} documentos.")
+
+    start = time.perf_counter()
+    per_partition: Dict[str, int] = defaultdict(int)
+    copied = 0
+    offset = 0
+    while offset < expected:
+        page = collection.get(
+            limit=batch_size,
+            offset=offset,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        ids = list(page.get("ids") or [])
+        if not ids:
+            break
+        metadatas = list(page.get("metadatas") or [{} for _ in ids])
+
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for i, meta in enumerate(metadatas):
+            table = (meta or {}).get("table_identifier")
+            # sem tabela: fica na coleção base
+            target = partition_collection_name(source, resolver(table)) if table else source
+            groups[target].append(i)
+
+        for target, idx in groups.items():
+            if target == source:
+                continue
+            # mesma configuração do índice (hnsw:space etc.) da coleção original
+            client.get_or_create_collection(target, metadata=collection.metadata).upsert(
+                ids=[ids[i] for i in idx],
+                embeddings=[list(map(float, page["embeddings"][i])) for i in idx],
+                documents=[page["documents"][i] for i in idx],
+                metadatas=[metadatas[i] for i in idx],
+            )
+            per_partition[target] += len(idx)
+            copied += len(idx)
+        offset += len(ids)
+
+        elapsed = time.perf_counter() - start
+        print(f"[Partition]   {offset}/{expected} ({offset / elapsed if elapsed else 0.0:.0f} docs/s)")
+
+    for target, n in sorted(per_partition.items()):
+        print(f"[Partition]   {target}: {n}")
+
+    if drop_source:
+        total = sum(client.get_collection(t).count() for t in per_partition)
+        if total < copied:
+            raise RuntimeError(f"Partições com {total} documentos, esperado >= {copied}: origem mantida.")
+        # só os copiados saem (os sem tabela continuam na coleção base)
+        moved = [doc_id for doc_id, meta in _iter_ids(collection, batch_size) if (meta or {}).get("table_identifier")]
+        for i in range(0, len(moved), batch_size):
+            collection.delete(ids=moved[i : i + batch_size])
+        print(f"[Partition] {len(moved)} documentos removidos de '{source}'.")
+
+    return copied
+
+
+def _iter_ids(collection, batch_size: int):
+    offset = 0
+    while True:
+        page = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+        ids = list(page.get("ids") or [])
+        if not ids:
+            return
+        yield from zip(ids, page.get("metadatas") or [{} for _ in ids])
+        offset += len(ids)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Divide a memória RAG do Chroma em coleções por datasource.")
+    parser.add_argument("--chroma-dir", default=settings.VECTORSTORE_DIR)
+    parser.add_argument("--source", default="iracema_memory")
+    parser.add_argument("--mode", choices=("table", "category"), default=None,
+                        help="Padrão: VectorStore.Partitioning (ou 'table').")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--drop-source", action="store_true", help="Remove da origem o que foi copiado.")
+    args = parser.parse_args()
+
+    mode: Optional[str] = args.mode or (
+        settings.VECTORSTORE_PARTITIONING if settings.VECTORSTORE_PARTITIONING in ("table", "category") else "table"
+    )
+    db_context = DbContext(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        db=settings.DB_NAME,
+    )
+    resolver = DatasourcePartitionResolver(db_context, IracemaDataSourceRepository(db_context), mode=mode)
+    try:
+        total = split(
+            args.chroma_dir,
+            resolver,
+            source=args.source,
+            batch_size=args.batch_size,
+            drop_source=args.drop_source,
+        )
+    except Exception as e:
+        print(f"[Partition] Erro: {e}")
+        return 1
+    print(f"[Partition] OK: {total} documentos copiados ({mode}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())